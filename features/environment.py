@@ -6,7 +6,7 @@ Behave environment configuration for PMS BDD testing.
 
 This module sets up the testing environment for Behave scenarios,
 including Playwright browser setup, screenshot capture, database cleanup,
-and optional GreenMail email server.
+and an optional GreenMail or in-process (local) email server.
 """
 
 import os
@@ -26,6 +26,7 @@ from tests.config.playwright_config import (
     get_launch_options,
 )
 from tests.utils.greenmail_client import GreenMailClient, GreenMailContainer
+from tests.utils.local_mail import LocalMailServer
 
 
 # Screenshot directory
@@ -94,10 +95,20 @@ def greenmail_server(context):
     This fixture starts a GreenMail container that will be shared
     across all scenarios that need email testing.
     """
-    # Check if GreenMail mode is enabled
-    use_greenmail = os.getenv("EMAIL_TEST_MODE", "pipe").lower() == "greenmail"
+    email_test_mode = os.getenv("EMAIL_TEST_MODE", "pipe").lower()
+
+    if email_test_mode == "local":
+        # In-process SMTP sink on the GreenMail SMTP port, no container needed;
+        # it implements the GreenMailClient mailbox methods
+        context.greenmail_client = LocalMailServer(port=3025)
+        print("\n[LocalMail] Starting email server...")
+        if not context.greenmail_client.start():
+            raise RuntimeError("Failed to start local email server")
+        yield context
+        context.greenmail_client.stop()
+        return
 
-    if not use_greenmail:
+    if email_test_mode != "greenmail":
         yield context
         return
 
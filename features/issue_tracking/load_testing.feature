@@ -31,6 +31,13 @@ Feature: Load Testing and Concurrent Users
     And the operation should complete within 120 seconds
     And the performance metrics should be recorded
 
+  @load-test @performance
+  Scenario: Bulk creation of 1000 issues via API
+    When 1000 issues are created via the bulk API in chunks of 100
+    Then all 1000 issues should be created successfully
+    And the operation should complete within 120 seconds
+    And the performance metrics should be recorded
+
   @load-test @performance
   Scenario: Concurrent email processing
     When 20 emails are processed concurrently via mailgw
@@ -272,9 +272,10 @@ def step_send_email_to_gateway(context):
     """
     Send the composed email to the mail gateway.
 
-    Supports two modes:
+    Supports three modes:
     - PIPE mode (default): Send via roundup-mailgw stdin
     - GreenMail mode: Send via SMTP to GreenMail, then poll via roundup-mailgw
+    - Local mode: Same as GreenMail mode with the in-process SMTP sink
     """
     tracker_dir = os.getenv("TRACKER_DIR", "tracker")
     context.tracker_dir = tracker_dir
@@ -290,8 +291,8 @@ def step_send_email_to_gateway(context):
 
     email_test_mode = os.getenv("EMAIL_TEST_MODE", "pipe").lower()
 
-    if email_test_mode == "greenmail":
-        # GreenMail mode: Hybrid approach (SMTP + mailgw)
+    if email_test_mode in ("greenmail", "local"):
+        # GreenMail/local mode: Hybrid approach (SMTP + mailgw)
         # Send via SMTP to test delivery, then process via mailgw to create issue
         if not hasattr(context, "greenmail_client"):
             raise RuntimeError("GreenMail mode enabled but client not available")
@@ -300,10 +301,12 @@ def step_send_email_to_gateway(context):
             # Step 1: Send email via SMTP to GreenMail (tests SMTP delivery)
             context.greenmail_client.send_raw_email(context.email_message)
 
-            # Wait a bit for email to be processed by GreenMail
-            import time
+            # Wait a bit for email to be processed by GreenMail (the local
+            # server has delivered it when the SMTP transaction completes)
+            if email_test_mode == "greenmail":
+                import time
 
-            time.sleep(0.5)
+                time.sleep(0.5)
 
             # Step 2: Also process via roundup-mailgw (creates issue in Roundup)
             # This hybrid approach validates SMTP delivery + issue creation
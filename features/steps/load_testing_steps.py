@@ -275,6 +275,48 @@ def step_concurrent_api_create(context: Context, count: int) -> None:
     context.load_test_count = count
 
 
+@when("{count:d} issues are created via the bulk API in chunks of {chunk_size:d}")
+def step_bulk_api_create(context: Context, count: int, chunk_size: int) -> None:
+    """Create issues with one bulk REST request, committed in chunks."""
+    base_url = "http://localhost:9080/pms"
+    operations = [
+        {
+            "op": "create",
+            "class": "issue",
+            "props": {"title": f"Load Test Issue {i}", "status": "1", "priority": "2"},
+        }
+        for i in range(1, count + 1)
+    ]
+    start_time = time.time()
+    response = requests.post(
+        f"{base_url}/rest/data/@bulk",
+        json={"operations": operations, "@chunk_size": chunk_size},
+        headers={
+            "Content-Type": "application/json",
+            "X-Requested-With": "XMLHttpRequest",
+            "Origin": base_url,
+            "Referer": base_url,
+        },
+        auth=HTTPBasicAuth("admin", "admin"),
+        timeout=300,
+    )
+    total_duration = time.time() - start_time
+    response.raise_for_status()
+
+    context.load_test_results = [
+        {
+            "success": result["status"] == 201,
+            "issue_num": i,
+            "issue_id": result.get("id"),
+            "duration": total_duration / count,
+            "error": result.get("error"),
+        }
+        for i, result in enumerate(response.json()["data"]["results"], start=1)
+    ]
+    context.load_test_duration = total_duration
+    context.load_test_count = count
+
+
 @when("{count:d} emails are processed concurrently via mailgw")
 def step_concurrent_email_create(context: Context, count: int) -> None:
     """Execute concurrent issue creation via email gateway."""
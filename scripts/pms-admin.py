@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+PMS maintenance commands that roundup-admin does not provide.
+
+Usage:
+    ./scripts/pms-admin.py [-t TRACKER_HOME] <command> [options]
+
+Commands:
+    flush-nosy              Send queued nosy notifications that are due
+    rebuild-address-index   Rebuild the user address uniqueness index
+    rebuild-thread-index    Rebuild the Message-ID index used to route replies
+    rebuild-ip-index        Rebuild the CI IP address index
+    rebuild-name-index      Rebuild the CI name index used for typo-tolerant lookups
+    dedupe-files            Move existing msg and file content into the blob store
+    gc-blobs                Remove blobs no longer used by any msg or file
+    compress-messages       Store message bodies with the configured compression
+    ingest-mail PATH        Feed a whole maildir or mbox to the mail gateway
+    rebuild-fulltext        Recreate the full-text index and reindex every item
+    index-queue             Index the items saved in deferred full-text classes
+    search QUERY            Full-text search of one class, best matches first
+    refresh-queries         Recompute the matches of materialized saved queries
+
+The tracker home defaults to $TRACKER_HOME, then to "tracker". Commands that
+are meant to run periodically (e.g. flush-nosy) can be called from cron:
+
+    * * * * * cd /opt/pms && ./scripts/pms-admin.py flush-nosy
+"""
+
+import argparse
+import os
+import sys
+import time
+
+
+def open_tracker(tracker_home):
+    """Open the tracker instance and make its lib/ directory importable."""
+    from roundup import instance
+
+    tracker = instance.open(tracker_home)
+    libdir = os.path.join(os.path.abspath(tracker_home), "lib")
+    if libdir not in sys.path:
+        sys.path.insert(1, libdir)
+    return tracker
+
+
+def cmd_flush_nosy(tracker, args):
+    """Send queued nosy notifications that are due."""
+    import nosy_queue
+
+    db = tracker.open("admin")
+    try:
+        sent = nosy_queue.flush(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Sent {sent} queued notification email(s)")
+    return 0
+
+
+def cmd_rebuild_address_index(tracker, args):
+    """Rebuild the user address uniqueness index."""
+    import address_index
+
+    db = tracker.open("admin")
+    try:
+        count = address_index.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Indexed {count} user address(es)")
+    return 0
+
+
+def cmd_rebuild_thread_index(tracker, args):
+    """Rebuild the Message-ID index used to route replies."""
+    import thread_index
+
+    db = tracker.open("admin")
+    try:
+        count = thread_index.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Indexed {count} Message-ID(s)")
+    return 0
+
+
+def cmd_rebuild_ip_index(tracker, args):
+    """Rebuild the CI IP address index."""
+    import ip_index
+
+    db = tracker.open("admin")
+    try:
+        count = ip_index.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Indexed {count} IP address(es)")
+    return 0
+
+
+def cmd_rebuild_name_index(tracker, args):
+    """Rebuild the CI name index used for typo-tolerant lookups."""
+    import name_index
+
+    db = tracker.open("admin")
+    try:
+        count = name_index.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Indexed the names of {count} CI(s)")
+    return 0
+
+
+def cmd_rebuild_fulltext(tracker, args):
+    """Recreate the full-text index with prefix indexes and reindex every item."""
+    import fts_index
+
+    db = tracker.open("admin")
+    try:
+        result = fts_index.rebuild(
+            db, workers=args.workers, chunk_size=args.chunk_size, resume=args.resume
+        )
+    finally:
+        db.close()
+    print(
+        f"Indexed {result.texts} text(s) of {result.items} item(s) "
+        f"in {result.seconds:.1f}s ({result.rate:.1f} items/s)"
+    )
+    return 0
+
+
+def cmd_index_queue(tracker, args):
+    """Index the items saved in classes with deferred full-text indexing."""
+    import fts_index
+
+    db = tracker.open("admin")
+    indexed = 0
+    try:
+        while True:
+            while count := fts_index.drain(db):
+                indexed += count
+            if not args.watch:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
+    print(f"Indexed {indexed} queued item(s)")
+    return 0
+
+
+def cmd_search(tracker, args):
+    """Full-text search of one class, best matches first."""
+    import fts_index
+    from roundup.cgi.exceptions import IndexerQueryError
+
+    db = tracker.open("admin")
+    try:
+        klass = db.getclass(args.classname)
+        labelprop = klass.labelprop()
+        try:
+            results = fts_index.ranked(db, args.query, args.classname, args.limit)
+        except IndexerQueryError as e:
+            print(e, file=sys.stderr)
+            return 1
+        for itemid, score in results:
+            print(f"{args.classname}{itemid}\t{-score:.2f}\t{klass.get(itemid, labelprop)}")
+    finally:
+        db.close()
+    return 0
+
+
+def cmd_refresh_queries(tracker, args):
+    """Recompute the matches of materialized saved queries."""
+    import saved_query
+
+    db = tracker.open("admin")
+    try:
+        count = saved_query.refresh_all(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Refreshed {count} materialized query(ies)")
+    return 0
+
+
+def cmd_dedupe_files(tracker, args):
+    """Move existing msg and file content into the blob store."""
+    import blob_store
+
+    db = tracker.open("admin")
+    try:
+        converted, freed = blob_store.dedupe_files(db)
+    finally:
+        db.close()
+    print(f"Moved {converted} file(s) into the blob store, freed {freed} bytes")
+    return 0
+
+
+def cmd_gc_blobs(tracker, args):
+    """Remove blobs no longer used by any msg or file."""
+    import blob_store
+
+    db = tracker.open("admin")
+    try:
+        removed, freed = blob_store.gc(db)
+    finally:
+        db.close()
+    print(f"Removed {removed} unused blob(s), freed {freed} bytes")
+    return 0
+
+
+def cmd_compress_messages(tracker, args):
+    """Store message bodies with the configured compression."""
+    import blob_store
+
+    db = tracker.open("admin")
+    try:
+        converted, before, after = blob_store.compress_messages(db)
+    finally:
+        db.close()
+    print(f"Converted {converted} message(s): {before} -> {after} bytes")
+    return 0
+
+
+def cmd_ingest_mail(tracker, args):
+    """Feed a whole maildir or mbox to the mail gateway."""
+    import mail_batch
+
+    result = mail_batch.ingest(
+        tracker,
+        args.mailbox,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        keep=args.keep,
+    )
+    print(
+        f"Ingested {result.messages} message(s) in {result.seconds:.1f}s "
+        f"({result.rate:.1f} messages/s, {result.ignored} ignored, "
+        f"{result.retried} handled one at a time)"
+    )
+    return 0
+
+
+def build_parser():
+    """Build the command line parser."""
+    parser = argparse.ArgumentParser(
+        prog="pms-admin.py", description="PMS tracker maintenance commands"
+    )
+    parser.add_argument(
+        "-t",
+        "--tracker",
+        default=os.environ.get("TRACKER_HOME", "tracker"),
+        help="tracker home directory (default: $TRACKER_HOME or ./tracker)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    flush_nosy = commands.add_parser("flush-nosy", help=cmd_flush_nosy.__doc__)
+    flush_nosy.set_defaults(func=cmd_flush_nosy)
+
+    rebuild_index = commands.add_parser(
+        "rebuild-address-index", help=cmd_rebuild_address_index.__doc__
+    )
+    rebuild_index.set_defaults(func=cmd_rebuild_address_index)
+
+    rebuild_threads = commands.add_parser(
+        "rebuild-thread-index", help=cmd_rebuild_thread_index.__doc__
+    )
+    rebuild_threads.set_defaults(func=cmd_rebuild_thread_index)
+
+    rebuild_ips = commands.add_parser("rebuild-ip-index", help=cmd_rebuild_ip_index.__doc__)
+    rebuild_ips.set_defaults(func=cmd_rebuild_ip_index)
+
+    rebuild_names = commands.add_parser("rebuild-name-index", help=cmd_rebuild_name_index.__doc__)
+    rebuild_names.set_defaults(func=cmd_rebuild_name_index)
+
+    rebuild_fulltext = commands.add_parser("rebuild-fulltext", help=cmd_rebuild_fulltext.__doc__)
+    rebuild_fulltext.add_argument(
+        "--workers", type=int, default=None, help="content reader processes (default: CPU count)"
+    )
+    rebuild_fulltext.add_argument(
+        "--chunk-size", type=int, default=500, help="items per transaction (default: 500)"
+    )
+    rebuild_fulltext.add_argument(
+        "--resume", action="store_true", help="continue an interrupted rebuild"
+    )
+    rebuild_fulltext.set_defaults(func=cmd_rebuild_fulltext)
+
+    index_queue = commands.add_parser("index-queue", help=cmd_index_queue.__doc__)
+    index_queue.add_argument(
+        "--watch", action="store_true", help="keep running, checking the queue every interval"
+    )
+    index_queue.add_argument(
+        "--interval", type=float, default=2, help="seconds between checks (default: 2)"
+    )
+    index_queue.set_defaults(func=cmd_index_queue)
+
+    search = commands.add_parser("search", help=cmd_search.__doc__)
+    search.add_argument("query", help="FTS5 query, e.g. 'backup* AND \"db01\"'")
+    search.add_argument(
+        "--class", dest="classname", default="issue", help="class to search (default: issue)"
+    )
+    search.add_argument(
+        "--limit", type=int, default=20, help="maximum number of results (default: 20)"
+    )
+    search.set_defaults(func=cmd_search)
+
+    refresh_queries = commands.add_parser("refresh-queries", help=cmd_refresh_queries.__doc__)
+    refresh_queries.set_defaults(func=cmd_refresh_queries)
+
+    dedupe_files = commands.add_parser("dedupe-files", help=cmd_dedupe_files.__doc__)
+    dedupe_files.set_defaults(func=cmd_dedupe_files)
+
+    gc_blobs = commands.add_parser("gc-blobs", help=cmd_gc_blobs.__doc__)
+    gc_blobs.set_defaults(func=cmd_gc_blobs)
+
+    compress = commands.add_parser("compress-messages", help=cmd_compress_messages.__doc__)
+    compress.set_defaults(func=cmd_compress_messages)
+
+    ingest_mail = commands.add_parser("ingest-mail", help=cmd_ingest_mail.__doc__)
+    ingest_mail.add_argument("mailbox", help="maildir directory or mbox file")
+    ingest_mail.add_argument(
+        "--workers", type=int, default=None, help="MIME parser processes (default: CPU count)"
+    )
+    ingest_mail.add_argument(
+        "--batch-size", type=int, default=100, help="messages per transaction (default: 100)"
+    )
+    ingest_mail.add_argument(
+        "--keep", action="store_true", help="leave handled messages in the mailbox"
+    )
+    ingest_mail.set_defaults(func=cmd_ingest_mail)
+
+    return parser
+
+
+def main(argv=None):
+    """Run a maintenance command."""
+    args = build_parser().parse_args(argv)
+    tracker = open_tracker(args.tracker)
+    return args.func(tracker, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Shared fixtures: tracker lib on the path and a scratch tracker."""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+
+TRACKER_HOME = os.path.join(os.path.dirname(__file__), "..", "tracker")
+
+# Add tracker lib to path
+sys.path.insert(0, os.path.join(TRACKER_HOME, "lib"))
+
+
+@pytest.fixture(scope="session")
+def tracker_template(tmp_path_factory):
+    """A copy of ``tracker/`` initialised with ``roundup-admin``, once per session."""
+    home = tmp_path_factory.mktemp("template") / "tracker"
+    shutil.copytree(
+        TRACKER_HOME, home, ignore=shutil.ignore_patterns("__pycache__", "db", "sessions")
+    )
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "roundup.scripts.roundup_admin",
+            "-i",
+            str(home),
+            "initialise",
+            "admin",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return home
+
+
+@pytest.fixture
+def tracker(tracker_template, tmp_path):
+    """A scratch copy of the initialised tracker, as a Roundup instance."""
+    from roundup import instance
+
+    home = tmp_path / "tracker"
+    shutil.copytree(tracker_template, home)
+    return instance.open(str(home))
+
+
+@pytest.fixture
+def tracker_db(tracker):
+    """The admin database of the scratch tracker, with its detectors installed."""
+    db = tracker.open("admin")
+    yield db
+    db.close()
@@ -0,0 +1,265 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+"""
+Mail throughput benchmark for Pasture Management System.
+
+Measures end-to-end email performance on a scratch copy of the tracker, with
+an in-process SMTP sink (tests/utils/local_mail.py) instead of a GreenMail
+container:
+
+- Mail to issue: alerts are submitted over SMTP one at a time, handed to the
+  tracker's mail gateway on delivery (like an MTA pipe alias) and committed
+  as issues.
+- Mail to nosy mail: from SMTP submission to the nosy notification of the new
+  issue arriving in the author's mailbox.
+- Issue to nosy mail: from adding a message to an issue (as the web UI does)
+  to the notification arriving.
+
+Target: 95th percentile latency < 1 second.
+
+Usage:
+    uv run python tests/performance/test_mail_throughput.py [MESSAGES]
+"""
+
+import argparse
+import email
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from email.message import Message
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from roundup import date, instance, mailgw  # noqa: E402
+
+from tests.utils.local_mail import LocalMailServer  # noqa: E402
+
+
+ADMIN_ADDRESS = "admin@localhost"
+TARGET_LATENCY = 1.0
+SUBJECT_PATTERN = re.compile(r"Benchmark alert (\d+)")
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Return the value below which ``fraction`` of the values fall."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class MailThroughputTest:
+    """Mail gateway and nosy notification throughput testing for PMS."""
+
+    def __init__(self, messages: int = 100, template: str = "tracker"):
+        """Initialize mail throughput test.
+
+        Args:
+            messages: Number of alert emails to send
+            template: Tracker directory to copy (its database is not used)
+        """
+        self.messages = messages
+        self.template = template
+        self.results = {}
+        self.server = LocalMailServer()
+        self._inbound = queue.Queue()
+        self._condition = threading.Condition()
+        self._issues = {}
+        self._committed = {}
+        self._notified = {}
+
+    def setup(self) -> None:
+        """Create and initialise a scratch tracker that sends mail to the sink."""
+        self.workdir = tempfile.mkdtemp(prefix="pms-mail-bench-")
+        self.home = os.path.join(self.workdir, "tracker")
+        shutil.copytree(
+            self.template,
+            self.home,
+            ignore=shutil.ignore_patterns("db", "sessions", "__pycache__"),
+        )
+        os.mkdir(os.path.join(self.home, "db"))
+        subprocess.run(
+            ["roundup-admin", "-i", self.home, "initialise", "admin"],
+            check=True,
+            capture_output=True,
+        )
+
+        self.server.start()
+        self.server.add_listener(self._on_delivery)
+        os.environ.pop("SENDMAILDEBUG", None)
+
+        self.tracker = instance.open(self.home)
+        self.tracker.config["MAIL_HOST"] = self.server.host
+        self.tracker.config["MAIL_PORT"] = self.server.port
+        self.tracker.config["MAIL_DEBUG"] = ""
+        self.tracker_address = self.tracker.config["TRACKER_EMAIL"]
+
+        db = self.tracker.open("admin")
+        try:
+            db.user.set("1", address=ADMIN_ADDRESS)
+            db.commit()
+        finally:
+            db.close()
+
+        self._gateway_thread = threading.Thread(target=self._run_gateway, daemon=True)
+        self._gateway_thread.start()
+
+    def teardown(self) -> None:
+        """Stop the mail gateway and the SMTP sink, remove the scratch tracker."""
+        self._inbound.put(None)
+        self._gateway_thread.join(timeout=30)
+        self.server.stop()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def _on_delivery(self, mail_from: str, recipients: list, message: Message) -> None:
+        """Hand mail for the tracker to the gateway and record notifications."""
+        if self.tracker_address in recipients:
+            self._inbound.put(message.as_bytes())
+            return
+        match = SUBJECT_PATTERN.search(message.get("Subject", ""))
+        if match and ADMIN_ADDRESS in recipients:
+            with self._condition:
+                self._notified.setdefault(int(match.group(1)), time.monotonic())
+                self._condition.notify_all()
+
+    def _run_gateway(self) -> None:
+        """Feed delivered mail to the tracker's mail gateway, one message at a time."""
+        gateway = self.tracker.MailGW(
+            self.tracker, argparse.Namespace(default_class="", set_value=[])
+        )
+        while (raw := self._inbound.get()) is not None:
+            message = email.message_from_bytes(raw, mailgw.RoundupMessage)
+            issueid = gateway.handle_Message(message)
+            n = int(SUBJECT_PATTERN.search(message["Subject"]).group(1))
+            with self._condition:
+                self._issues[n] = issueid
+                self._committed[n] = time.monotonic()
+                self._condition.notify_all()
+
+    def _wait_for(self, times: dict, count: int) -> None:
+        """Wait until ``times`` has ``count`` entries."""
+        deadline = time.monotonic() + 60 + count
+        with self._condition:
+            while len(times) < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Only {len(times)} of {count} events received")
+                self._condition.wait(remaining)
+
+    def _record(self, name: str, started: float, sent: dict, done: dict) -> dict:
+        """Store throughput and latency figures for one measurement."""
+        latencies = [done[n] - sent[n] for n in sent]
+        elapsed = max(done.values()) - started
+        self.results[name] = {
+            "messages": len(latencies),
+            "throughput": len(latencies) / elapsed if elapsed else 0.0,
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "max": max(latencies),
+            "passed": percentile(latencies, 0.95) < TARGET_LATENCY,
+        }
+        return self.results[name]
+
+    def test_mail_to_issue(self) -> dict:
+        """Test alert emails becoming issues and their nosy notifications.
+
+        Target: 95% of alerts committed, and notified, in <1 second
+        """
+        sent = {}
+        started = time.monotonic()
+        for n in range(self.messages):
+            sent[n] = time.monotonic()
+            self.server.send_raw_email(
+                f"From: Monitoring <{ADMIN_ADDRESS}>\r\n"
+                f"To: {self.tracker_address}\r\n"
+                f"Subject: Benchmark alert {n}\r\n"
+                f"Message-ID: <bench-{n}@localhost>\r\n"
+                "\r\n"
+                f"Disk usage on web{n:03d} is above 90%.\r\n"
+            )
+            # one message in flight, as an MTA delivering to the gateway
+            self._wait_for(self._committed, n + 1)
+        self._wait_for(self._notified, self.messages)
+
+        self._record("mail_to_nosy", started, sent, self._notified)
+        return self._record("mail_to_issue", started, sent, self._committed)
+
+    def test_issue_to_nosy(self) -> dict:
+        """Test messages added to issues reaching the nosy list.
+
+        Target: 95% of notifications delivered in <1 second
+        """
+        with self._condition:
+            self._notified.clear()
+        sent = {}
+        db = self.tracker.open("admin")
+        try:
+            started = time.monotonic()
+            for n, issueid in sorted(self._issues.items()):
+                sent[n] = time.monotonic()
+                msgid = db.msg.create(
+                    content=f"Cleaned up web{n:03d}.", author="1", date=date.Date(".")
+                )
+                messages = db.issue.get(issueid, "messages")
+                db.issue.set(issueid, messages=[*messages, msgid])
+                db.commit()
+        finally:
+            db.close()
+        self._wait_for(self._notified, len(sent))
+        return self._record("issue_to_nosy", started, sent, self._notified)
+
+    def run_all_tests(self) -> dict:
+        """Run all mail throughput tests.
+
+        Returns:
+            Complete results dictionary
+        """
+        print("=" * 60)
+        print("MAIL THROUGHPUT TESTS")
+        print("=" * 60)
+        print(f"Messages: {self.messages}")
+        print(f"Target: 95th percentile latency < {TARGET_LATENCY:.1f} second")
+        print("=" * 60)
+
+        self.setup()
+        try:
+            self.test_mail_to_issue()
+            self.test_issue_to_nosy()
+        finally:
+            self.teardown()
+
+        names = [
+            ("Mail to Issue", "mail_to_issue"),
+            ("Mail to Nosy Mail", "mail_to_nosy"),
+            ("Issue to Nosy Mail", "issue_to_nosy"),
+        ]
+        for label, name in names:
+            result = self.results[name]
+            status = "✅ PASS" if result["passed"] else "❌ FAIL"
+            print(
+                f"{status} {label}: {result['throughput']:.1f} msg/s, "
+                f"p50 {result['p50'] * 1000:.0f}ms, p95 {result['p95'] * 1000:.0f}ms, "
+                f"max {result['max'] * 1000:.0f}ms"
+            )
+
+        print("=" * 60)
+        passed_tests = sum(1 for r in self.results.values() if r["passed"])
+        print(f"Results: {passed_tests}/{len(self.results)} passed")
+        print("=" * 60)
+
+        return self.results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    tester = MailThroughputTest(messages=count)
+    results = tester.run_all_tests()
+
+    passed = all(r["passed"] for r in results.values())
+    exit(0 if passed else 1)
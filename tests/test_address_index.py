@@ -0,0 +1,117 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for the user address uniqueness index."""
+
+from unittest.mock import Mock
+
+import address_index
+import pytest
+
+
+class FakeAddressClass:
+    """In-memory stand-in for the useraddress class."""
+
+    def __init__(self, entries):
+        self.nodes = {str(i): dict(entry) for i, entry in enumerate(entries, 1)}
+
+    def lookup(self, address):
+        for nodeid, node in self.nodes.items():
+            if node["address"] == address:
+                return nodeid
+        raise KeyError(address)
+
+    def get(self, nodeid, prop):
+        return self.nodes[nodeid][prop]
+
+    def filter(self, search_matches, filterspec, limit=None):
+        return list(self.nodes)[:limit]
+
+    def find(self, user):
+        return [nodeid for nodeid, node in self.nodes.items() if node["user"] == user]
+
+    def create(self, **values):
+        nodeid = str(max(map(int, self.nodes), default=0) + 1)
+        self.nodes[nodeid] = values
+        return nodeid
+
+    def destroy(self, nodeid):
+        del self.nodes[nodeid]
+
+    def indexed(self):
+        return sorted((node["address"], node["user"]) for node in self.nodes.values())
+
+
+class TestUserAddresses:
+    """Test address normalization."""
+
+    def test_primary_and_alternates(self):
+        """Addresses are stripped, lower-cased and deduplicated."""
+        assert address_index.user_addresses(
+            " Alice@Example.com", "a2@example.com\n\nALICE@example.com \n"
+        ) == {"alice@example.com", "a2@example.com"}
+
+    @pytest.mark.parametrize(("address", "alternates"), [(None, None), ("", ""), ("  ", "\n")])
+    def test_no_addresses(self, address, alternates):
+        """Users without addresses have no index entries."""
+        assert address_index.user_addresses(address, alternates) == set()
+
+
+class TestIndex:
+    """Test lookups and index maintenance."""
+
+    @pytest.fixture
+    def db(self):
+        db = Mock()
+        db.useraddress = FakeAddressClass(
+            [
+                {"address": "alice@example.com", "user": "3"},
+                {"address": "old@example.com", "user": "3"},
+            ]
+        )
+        db.user.is_retired.return_value = False
+        db.user.get.side_effect = lambda userid, prop: {
+            ("3", "address"): "Alice@example.com",
+            ("3", "alternate_addresses"): "new@example.com",
+        }[(userid, prop)]
+        return db
+
+    def test_owner_is_case_insensitive(self, db):
+        """Lookups use the normalized address."""
+        assert address_index.owner(db, " ALICE@example.com") == "3"
+        assert address_index.owner(db, "lice@example.com") is None
+
+    def test_sync_user(self, db):
+        """Stale entries are removed and new addresses are added."""
+        address_index.sync_user(db, "3")
+        assert db.useraddress.indexed() == [("alice@example.com", "3"), ("new@example.com", "3")]
+
+    def test_retired_user_is_removed(self, db):
+        """Retired users release their addresses."""
+        db.user.is_retired.return_value = True
+        address_index.sync_user(db, "3")
+        assert db.useraddress.indexed() == []
+
+    def test_address_of_other_user_is_skipped(self, db):
+        """An address already indexed for someone else is left alone."""
+        db.useraddress.create(address="new@example.com", user="4")
+        address_index.sync_user(db, "3")
+        assert db.useraddress.indexed() == [("alice@example.com", "3"), ("new@example.com", "4")]
+
+
+def test_empty_index_is_filled_on_first_use(tracker):
+    """A tracker upgraded from before the index still rejects addresses in use."""
+    db = tracker.open("admin")
+    db.user.create(username="alice", address="alice@example.com", alternate_addresses="a@x.org")
+    for entryid in db.useraddress.list():
+        db.useraddress.destroy(entryid)
+    db.commit()
+    db.close()
+
+    db = tracker.open("admin")
+    try:
+        with pytest.raises(ValueError, match="already in use"):
+            db.user.create(username="bob", address="A@x.org")
+        assert address_index.owner(db, "alice@example.com") == db.user.lookup("alice")
+    finally:
+        db.close()
@@ -0,0 +1,127 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for repeated alert email suppression."""
+
+from unittest.mock import Mock
+
+import alert_dedup
+import pytest
+from roundup import date
+
+
+class FakeFingerprints:
+    """In-memory stand-in for the alertfingerprint class."""
+
+    def __init__(self):
+        self.nodes = {}
+
+    def lookup(self, key):
+        for nodeid, node in self.nodes.items():
+            if node.fingerprint == key:
+                return nodeid
+        raise KeyError(key)
+
+    def getnode(self, nodeid):
+        return self.nodes[nodeid]
+
+    def create(self, **values):
+        nodeid = str(len(self.nodes) + 1)
+        self.nodes[nodeid] = Mock(**values)
+        return nodeid
+
+    def set(self, nodeid, **values):
+        for name, value in values.items():
+            setattr(self.nodes[nodeid], name, value)
+
+
+@pytest.fixture
+def db():
+    db = Mock()
+    db.config.detectors = {"ALERTDEDUP_DEDUP_WINDOW": "3600"}
+    db.alertfingerprint = FakeFingerprints()
+    db.issue.is_retired.return_value = False
+    db.issue.get.return_value = "2"
+    statuses = Mock()
+    statuses.getkey.return_value = "name"
+    statuses.getnodeids.return_value = ["1", "2", "3", "4"]
+    statuses.get.side_effect = lambda itemid, key: ["new", "in-progress", "resolved", "closed"][
+        int(itemid) - 1
+    ]
+    db.getclass.return_value = statuses
+    return db
+
+
+START = date.Date("2025-06-01.10:00:00")
+
+
+class TestFingerprint:
+    """Test which emails count as the same alert."""
+
+    def test_timestamps_case_and_prefixes_are_ignored(self):
+        """Copies of an alert differing only in times, case and prefixes match."""
+        first = alert_dedup.fingerprint(
+            "3", "Disk full on web01", "Disk full at 2025-06-01 10:00:00Z\n\nUsage 98%"
+        )
+        repeat = alert_dedup.fingerprint(
+            "3", "Re: [ALERT] disk FULL on web01", "Disk full at 2025-06-01T10:05:12Z  Usage 98%"
+        )
+        assert first == repeat
+
+    def test_author_and_content_matter(self):
+        """The same text from another author, or another host, is another alert."""
+        base = alert_dedup.fingerprint("3", "Disk full on web01", "Usage 98%")
+        assert alert_dedup.fingerprint("4", "Disk full on web01", "Usage 98%") != base
+        assert alert_dedup.fingerprint("3", "Disk full on web02", "Usage 98%") != base
+        assert alert_dedup.fingerprint("3", "Disk full on web01", None) != base
+
+
+class TestFold:
+    """Test folding repeats into the counter of the first issue."""
+
+    def test_repeats_within_window_are_counted(self, db):
+        """Repeats are folded while they keep arriving within the window."""
+        alert_dedup.record(db, "abc", "12", now=START)
+
+        assert alert_dedup.fold(db, "abc", now=START + date.Interval("00:50")) == "12"
+        assert alert_dedup.fold(db, "abc", now=START + date.Interval("01:40")) == "12"
+        entry = db.alertfingerprint.getnode("1")
+        assert entry.suppressed == 2
+        assert entry.last_seen == START + date.Interval("01:40")
+
+    def test_unknown_expired_or_retired_alerts_are_not_folded(self, db):
+        """A new issue is created for new alerts, stale alerts or retired issues."""
+        assert alert_dedup.fold(db, "abc", now=START) is None
+
+        alert_dedup.record(db, "abc", "12", now=START)
+        assert alert_dedup.fold(db, "abc", now=START + date.Interval("01:00:01")) is None
+
+        db.issue.is_retired.return_value = True
+        assert alert_dedup.fold(db, "abc", now=START + date.Interval("00:10")) is None
+        assert db.alertfingerprint.getnode("1").suppressed == 0
+
+    @pytest.mark.parametrize("status", ["3", "4"])
+    def test_resolved_or_closed_issues_are_not_folded(self, db, status):
+        """A repeat after the issue was resolved or closed creates a new issue."""
+        alert_dedup.record(db, "abc", "12", now=START)
+        db.issue.get.return_value = status
+
+        assert alert_dedup.fold(db, "abc", now=START + date.Interval("00:10")) is None
+        assert db.alertfingerprint.getnode("1").suppressed == 0
+        db.issue.get.assert_called_with("12", "status")
+
+    def test_record_reuses_expired_entry(self, db):
+        """A new issue for an expired alert takes over its entry with a fresh counter."""
+        alert_dedup.record(db, "abc", "12", now=START)
+        alert_dedup.fold(db, "abc", now=START + date.Interval("00:10"))
+        alert_dedup.record(db, "abc", "15", now=START + date.Interval("03:00"))
+
+        assert len(db.alertfingerprint.nodes) == 1
+        entry = db.alertfingerprint.getnode("1")
+        assert (entry.issue, entry.suppressed) == ("15", 0)
+
+    def test_disabled_by_default(self, db):
+        """Nothing is folded when dedup_window is 0."""
+        db.config.detectors = {}
+        alert_dedup.record(db, "abc", "12", now=START)
+        assert alert_dedup.fold(db, "abc", now=START) is None
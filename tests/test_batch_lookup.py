@@ -0,0 +1,66 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for batched property reads."""
+
+from unittest.mock import Mock
+
+import batch_lookup
+import pytest
+from roundup import hyperdb
+
+
+class TestExistingIds:
+    """Test the batched replacement for db.hasnode()."""
+
+    def test_invalid_ids_are_dropped_without_query(self):
+        """Non-numeric and out-of-range IDs never reach the database."""
+        db = Mock()
+        assert batch_lookup.existing_ids(db, "user", ["abc", "", None, str(2**31)]) == set()
+        db.getclass.assert_not_called()
+
+    def test_ids_are_chunked(self, monkeypatch):
+        """Large ID lists are split into several IN (...) queries."""
+        monkeypatch.setattr(batch_lookup, "CHUNK_SIZE", 2)
+        cl = Mock()
+        cl.filter.side_effect = lambda _sm, spec, retired: spec["id"][:1]
+        db = Mock()
+        db.getclass.return_value = cl
+
+        result = batch_lookup.existing_ids(db, "user", ["1", "2", "3", "2"])
+
+        assert result == {"1", "3"}
+        assert cl.filter.call_count == 2
+
+
+class TestGetValues:
+    """Test reading one property for several items."""
+
+    @pytest.fixture
+    def db(self):
+        """A non-SQL database mock with a msg class."""
+        cl = Mock(spec=["getprops", "get"])
+        cl.getprops.return_value = {
+            "author": hyperdb.Link("user"),
+            "recipients": hyperdb.Multilink("user"),
+        }
+        cl.get.side_effect = lambda nodeid, prop: {
+            ("1", "author"): "3",
+            ("2", "author"): "4",
+            ("1", "recipients"): ["5"],
+            ("2", "recipients"): [],
+        }[(nodeid, prop)]
+        db = Mock(spec=["getclass"])
+        db.getclass.return_value = cl
+        return db
+
+    def test_link_values_fall_back_to_get(self, db):
+        """Without SQL access, values are read with Class.get()."""
+        assert batch_lookup.get_values(db, "msg", ["1", "2"], "author") == {"1": "3", "2": "4"}
+
+    def test_multilink_values_fall_back_to_get(self, db):
+        """Multilinks are also read per item without SQL access."""
+        assert batch_lookup.get_values(db, "msg", ["2", "1", "2"], "recipients") == {
+            "2": [],
+            "1": ["5"],
+        }
@@ -0,0 +1,125 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for batched status transitions."""
+
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import batch_transition
+import detector_settings
+import pytest
+
+
+STATUSES = {"1": "new", "2": "in-progress", "3": "resolved", "4": "closed"}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Database mock with issues 1 new, 2 in-progress, 3 resolved, 4 closed, 5 retired."""
+    names = {name: itemid for itemid, name in STATUSES.items()}
+    monkeypatch.setattr(
+        detector_settings,
+        "get",
+        lambda _db: SimpleNamespace(item_id=lambda _cls, name: names.get(name)),
+    )
+    status = Mock()
+    status.get.side_effect = lambda itemid, prop: STATUSES[itemid]
+    status.hasnode.side_effect = lambda itemid: itemid in STATUSES
+    issue = Mock()
+    db = Mock()
+    db.getclass.side_effect = lambda classname: {"status": status, "issue": issue}[classname]
+    db.security.hasPermission.return_value = True
+
+    current = {"1": "1", "2": "2", "3": "3", "4": "4", "5": "3"}
+    monkeypatch.setattr(
+        batch_transition.batch_lookup,
+        "existing_ids",
+        lambda _db, _cls, itemids, retired=None: {
+            i for i in itemids if i in current and not (retired is False and i == "5")
+        },
+    )
+    monkeypatch.setattr(
+        batch_transition.batch_lookup,
+        "get_values",
+        lambda _db, _cls, itemids, _prop: {i: current[i] for i in itemids},
+    )
+    return db
+
+
+class TestParseItemIds:
+    """Test normalization of submitted item IDs."""
+
+    def test_lists_commas_prefixes_and_duplicates(self):
+        """IDs may be repeated fields, comma-separated and designators."""
+        assert batch_transition.parse_item_ids(["issue12, 13", "12", "", " 7 "], "issue") == [
+            "12",
+            "13",
+            "7",
+        ]
+
+    def test_designators_are_case_insensitive(self):
+        """Upper-case designators keep their digits."""
+        assert batch_transition.parse_item_ids(["ISSUE31", "Issue2"], "issue") == ["31", "2"]
+
+    def test_anything_else_is_rejected(self):
+        """Every malformed entry is reported."""
+        with pytest.raises(batch_transition.BatchTransitionError) as excinfo:
+            batch_transition.parse_item_ids(["12, issue-3", "3a", "12"], "issue")
+        assert excinfo.value.errors == [("issue-3", "not an item id"), ("3a", "not an item id")]
+
+    def test_designators_of_other_classes_are_rejected(self):
+        """A change designator sent for issues does not move the issue with its number."""
+        with pytest.raises(batch_transition.BatchTransitionError) as excinfo:
+            batch_transition.parse_item_ids(["change12", "issue_12", "12"], "issue")
+        assert excinfo.value.errors == [
+            ("change12", "not in class issue"),
+            ("issue_12", "not in class issue"),
+        ]
+
+
+class TestValidate:
+    """Test up-front validation of a whole batch."""
+
+    def test_status_by_name_or_id(self, db):
+        """The target status can be given by name or ID."""
+        assert batch_transition.validate(db, "1", "issue", ["3"], "closed") == ("4", ["3"])
+        assert batch_transition.validate(db, "1", "issue", ["3"], "4") == ("4", ["3"])
+
+    def test_items_already_at_target_are_skipped(self, db):
+        """Items already in the target status are not changed."""
+        assert batch_transition.validate(db, "1", "issue", ["2", "3"], "resolved") == ("3", ["2"])
+
+    def test_every_failure_is_reported(self, db):
+        """Missing or retired items, denied edits and invalid moves are all listed."""
+        db.security.hasPermission.side_effect = lambda *args, itemid, **kw: itemid != "2"
+
+        with pytest.raises(batch_transition.BatchTransitionError) as excinfo:
+            batch_transition.validate(db, "1", "issue", ["1", "2", "3", "5", "9"], "closed")
+
+        assert [item for item, _reason in excinfo.value.errors] == [
+            "issue1",
+            "issue2",
+            "issue5",
+            "issue9",
+        ]
+        assert "new -> closed" in str(excinfo.value)
+
+    @pytest.mark.parametrize(
+        ("classname", "itemids", "status"),
+        [("issue", ["1"], "bogus"), ("issue", [], "closed"), ("ci", ["1"], "closed")],
+    )
+    def test_unusable_requests(self, db, classname, itemids, status):
+        """Unknown statuses, empty batches and classes without workflow are rejected."""
+        with pytest.raises(batch_transition.BatchTransitionError):
+            batch_transition.validate(db, "1", classname, itemids, status)
+
+    def test_apply_sets_only_valid_batches(self, db):
+        """Nothing is written when validation fails."""
+        issue = db.getclass("issue")
+        with pytest.raises(batch_transition.BatchTransitionError):
+            batch_transition.apply(db, "1", "issue", ["1", "3"], "closed")
+        issue.set.assert_not_called()
+
+        assert batch_transition.apply(db, "1", "issue", ["3"], "closed") == ["3"]
+        issue.set.assert_called_once_with("3", status="4")
@@ -0,0 +1,163 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for the content-addressed blob store."""
+
+import os
+from unittest.mock import Mock
+
+import blob_store
+import pytest
+from roundup.backends.blobfiles import FileStorage
+
+
+class FakeDatabase(FileStorage):
+    """Roundup's file storage with just enough of a database around it."""
+
+    def __init__(self, directory):
+        super().__init__(0o002)
+        self.dir = str(directory)
+        self.transactions = []
+        self.nodeids = {"msg": [], "file": []}
+        self.config = Mock()
+        self.config.detectors = {"BLOBSTORE_COMPRESSION": "none"}
+
+    def getclass(self, classname):
+        cl = Mock()
+        cl.getnodeids.side_effect = lambda retired: self.nodeids[classname]
+        return cl
+
+    def commit(self):
+        for method, args in self.transactions:
+            method(*args)
+        self.transactions = []
+
+    def rollback(self):
+        for _method, args in self.transactions:
+            self.rollbackStoreFile(*args)
+        self.transactions = []
+
+
+@pytest.fixture
+def db(tmp_path):
+    """File storage in a temporary directory with the blob store installed."""
+    db = FakeDatabase(tmp_path)
+    blob_store.install(db)
+    return db
+
+
+def links(db, classname, nodeid):
+    return os.stat(db.filename(classname, nodeid)).st_nlink
+
+
+class TestStorefile:
+    """Test storing content through the blob store."""
+
+    def test_identical_content_is_stored_once(self, db):
+        """Items with the same content share one inode with the blob."""
+        db.storefile("file", "1", None, b"same log")
+        db.storefile("msg", "1", None, b"same log")
+        db.commit()
+
+        assert os.path.samefile(db.filename("file", "1"), db.filename("msg", "1"))
+        assert links(db, "file", "1") == 3
+        assert db.getfile("msg", "1", None) == b"same log"
+
+    def test_edit_and_rollback_keep_counts(self, db):
+        """Rolled back and replaced content releases its blob reference."""
+        db.storefile("file", "1", None, b"same log")
+        db.storefile("file", "2", None, b"same log")
+        db.commit()
+
+        db.storefile("file", "2", None, b"new")
+        db.rollback()
+        assert links(db, "file", "1") == 3
+
+        db.storefile("file", "2", None, b"new")
+        db.storefile("file", "2", None, b"newer")
+        db.commit()
+        assert links(db, "file", "1") == 2
+        assert db.getfile("file", "2", None) == b"newer"
+        assert db.getfile("file", "1", None) == b"same log"
+
+    def test_other_classes_are_copied(self, db):
+        """Only msg and file content goes through the blob store."""
+        db.storefile("user", "1", None, b"avatar")
+        db.commit()
+        assert links(db, "user", "1") == 1
+
+
+class TestCompression:
+    """Test transparent compression of message bodies."""
+
+    BODY = b"disk /dev/sda1 is 97% full\n" * 100
+
+    @pytest.mark.parametrize("compression", ["zlib", "lzma"])
+    def test_message_bodies_are_compressed(self, db, compression):
+        """Large bodies are stored compressed and read back as plain content."""
+        db.config.detectors["BLOBSTORE_COMPRESSION"] = compression
+        db.storefile("msg", "1", None, self.BODY)
+        db.commit()
+
+        path = db.filename("msg", "1")
+        assert blob_store.stored_compression(path) == compression
+        assert os.path.getsize(path) < len(self.BODY) // 10
+        assert db.getfile("msg", "1", None) == self.BODY
+
+    def test_small_bodies_and_attachments_are_not_compressed(self, db):
+        """Short messages and file content are stored as they are."""
+        db.config.detectors["BLOBSTORE_COMPRESSION"] = "zlib"
+        db.storefile("msg", "1", None, b"short")
+        db.storefile("file", "1", None, self.BODY)
+        db.commit()
+
+        assert blob_store.stored_compression(db.filename("msg", "1")) == "none"
+        assert blob_store.stored_compression(db.filename("file", "1")) == "none"
+
+    def test_compress_existing_messages(self, db):
+        """Existing bodies are converted to the configured compression and back."""
+        db.storefile("msg", "1", None, self.BODY)
+        db.commit()
+        db.nodeids["msg"] = ["1"]
+        # settings are parsed once per database open
+        db.__dict__.pop("_detector_settings", None)
+        db.config.detectors["BLOBSTORE_COMPRESSION"] = "lzma"
+
+        converted, before, after = blob_store.compress_messages(db)
+        assert (converted, before) == (1, len(self.BODY))
+        assert after < before // 10
+        assert blob_store.compress_messages(db) == (0, 0, 0)
+        assert db.getfile("msg", "1", None) == self.BODY
+
+        db.__dict__.pop("_detector_settings")
+        db.config.detectors["BLOBSTORE_COMPRESSION"] = "none"
+        assert blob_store.compress_messages(db)[0] == 1
+        assert blob_store.stored_compression(db.filename("msg", "1")) == "none"
+
+
+class TestMaintenance:
+    """Test converting existing content and removing unused blobs."""
+
+    def test_gc_removes_unreferenced_blobs(self, db):
+        """Blobs whose items changed content are removed."""
+        db.storefile("file", "1", None, b"old")
+        db.commit()
+        db.storefile("file", "1", None, b"new")
+        db.commit()
+
+        assert blob_store.gc(db) == (1, 3)
+        assert blob_store.gc(db) == (0, 0)
+        assert db.getfile("file", "1", None) == b"new"
+
+    def test_dedupe_existing_files(self, tmp_path):
+        """Files stored without the blob store are linked to shared blobs."""
+        db = FakeDatabase(tmp_path)
+        for nodeid in ("1", "2", "3"):
+            db.storefile("file", nodeid, None, b"copy" if nodeid != "3" else b"unique")
+        db.commit()
+        db.nodeids["file"] = ["1", "2", "3"]
+
+        assert blob_store.dedupe_files(db) == (3, 4)
+        assert os.path.samefile(db.filename("file", "1"), db.filename("file", "2"))
+        assert links(db, "file", "3") == 2
+        assert blob_store.dedupe_files(db) == (0, 0)
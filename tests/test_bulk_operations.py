@@ -0,0 +1,219 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for bulk create/update operations."""
+
+import sqlite3
+from unittest.mock import Mock
+
+import bulk_operations
+import pytest
+from roundup import hyperdb
+from roundup.exceptions import Reject
+
+
+class FakeClass:
+    """Items in a dict; an auditor rejects titles containing "spam"."""
+
+    def __init__(self, classname):
+        self.classname = classname
+        self.nodes = {"1": {"title": "Existing"}}
+
+    def getprops(self, protected=True):
+        return {"title": hyperdb.String(), "ram_gb": hyperdb.Number()}
+
+    def hasnode(self, itemid):
+        return itemid in self.nodes
+
+    def _audit(self, values):
+        if "spam" in (values.get("title") or ""):
+            raise Reject("no spam")
+
+    def create(self, **values):
+        if "title" not in values:
+            raise KeyError("'title'")
+        self._audit(values)
+        itemid = str(len(self.nodes) + 1)
+        self.nodes[itemid] = values
+        return itemid
+
+    def set(self, itemid, **values):
+        self._audit(values)
+        self.nodes[itemid].update(values)
+
+
+class SqliteDatabase:
+    """Issues in an sqlite file; newid() commits like Roundup's sqlite backend."""
+
+    arg = "?"
+    dbtype = "sqlite"
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.cursor = self.conn.cursor()
+        self.cursor.execute("create table ids (name varchar, num integer)")
+        self.cursor.execute("insert into ids values ('issue', 1)")
+        self.cursor.execute("create table issue (id varchar, title varchar)")
+        self.conn.commit()
+        self.issue = SqliteIssueClass(self)
+        self.security = Mock()
+        self.security.hasPermission.return_value = True
+
+    def sql(self, sql, args=()):
+        self.cursor.execute(sql, args)
+
+    def newid(self, classname):
+        self.sql("select num from ids where name=?", (classname,))
+        newid = self.cursor.fetchone()[0]
+        self.sql("update ids set num=num+1 where name=?", (classname,))
+        self.conn.commit()
+        return str(newid)
+
+    def getclass(self, classname):
+        return self.issue
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+
+class SqliteIssueClass(FakeClass):
+    """Issue class of SqliteDatabase; a title "crash" fails in a reactor."""
+
+    def __init__(self, db):
+        super().__init__("issue")
+        self.db = db
+
+    def create(self, **values):
+        itemid = self.db.newid("issue")
+        self.db.sql("insert into issue values (?, ?)", (itemid, values["title"]))
+        if values["title"] == "crash":
+            raise RuntimeError("reactor failed")
+        return itemid
+
+
+@pytest.fixture
+def db():
+    db = Mock()
+    classes = {name: FakeClass(name) for name in bulk_operations.BULK_CLASSES}
+    db.getclass.side_effect = classes.__getitem__
+    db.security.hasPermission.return_value = True
+    return db
+
+
+def operation(op="create", classname="issue", itemid=None, **props):
+    found = {"op": op, "class": classname, "props": props}
+    if itemid:
+        found["id"] = itemid
+    return found
+
+
+class TestParseOperations:
+    """Test checking the structure of a request."""
+
+    def test_valid_operations(self):
+        """Operations become (op, class, id, props) tuples."""
+        parsed = bulk_operations.parse_operations(
+            [operation(title="A"), operation("update", "ci", 12, ram_gb=8)]
+        )
+        assert parsed == [
+            ("create", "issue", None, {"title": "A"}),
+            ("update", "ci", "12", {"ram_gb": 8}),
+        ]
+
+    @pytest.mark.parametrize(
+        "operations",
+        [
+            [],
+            "create",
+            [operation("delete")],
+            [operation(classname="user", title="A")],
+            [operation("update", title="A")],
+            [operation("update", itemid="1")],
+            [{"op": "create", "class": "issue", "props": ["title"]}],
+        ],
+    )
+    def test_malformed_requests_are_refused(self, operations):
+        """Any malformed operation rejects the whole request."""
+        with pytest.raises(ValueError):
+            bulk_operations.parse_operations(operations)
+
+    def test_size_limit(self, monkeypatch):
+        """Requests are limited to MAX_OPERATIONS operations."""
+        monkeypatch.setattr(bulk_operations, "MAX_OPERATIONS", 2)
+        with pytest.raises(ValueError, match="at most 2"):
+            bulk_operations.parse_operations([operation(title="A")] * 3)
+
+
+class TestApply:
+    """Test applying operations and reporting per-item results."""
+
+    def test_results_per_operation(self, db):
+        """Failures are reported with a status and do not stop the other operations."""
+        operations = bulk_operations.parse_operations(
+            [
+                operation(title="Disk full", ram_gb=16),
+                operation(title="Buy spam"),
+                operation(colour="red"),
+                operation(ram_gb="many"),
+                operation(ram_gb=4),
+                operation("update", itemid="1", title="Renamed", ram_gb=""),
+                operation("update", itemid="9", title="Missing"),
+            ]
+        )
+
+        results = bulk_operations.apply(db, "1", operations)
+
+        assert [(r["id"], r["status"]) for r in results] == [
+            ("2", 201),
+            (None, 400),
+            (None, 400),
+            (None, 400),
+            (None, 400),
+            ("1", 200),
+            ("9", 404),
+        ]
+        assert results[1]["error"] == "no spam"
+        assert "colour" in results[2]["error"]
+        assert "title" in results[4]["error"]
+        issues = db.getclass("issue").nodes
+        assert issues["2"] == {"title": "Disk full", "ram_gb": 16.0}
+        assert issues["1"] == {"title": "Renamed", "ram_gb": None}
+        assert db.commit.call_count == 1
+
+    def test_permissions(self, db):
+        """Class and property permissions are both checked."""
+        db.security.hasPermission.side_effect = lambda perm, uid, cls, property=None, itemid=None: (
+            property != "ram_gb"
+        )
+        operations = bulk_operations.parse_operations([operation(title="A", ram_gb=1)])
+        [result] = bulk_operations.apply(db, "2", operations)
+        assert result["status"] == 403
+        assert "issue.ram_gb" in result["error"]
+
+    @pytest.mark.parametrize(("chunk_size", "commits"), [(None, 2), (1, 5), (3, 2), (9, 2)])
+    def test_commits_per_chunk(self, db, monkeypatch, chunk_size, commits):
+        """Operations are committed every chunk_size operations, bounded by default."""
+        monkeypatch.setattr(bulk_operations, "DEFAULT_CHUNK_SIZE", 4)
+        monkeypatch.setattr(bulk_operations, "MAX_CHUNK_SIZE", 4)
+        operations = bulk_operations.parse_operations([operation(title="A")] * 5)
+        bulk_operations.apply(db, "1", operations, chunk_size)
+        assert db.commit.call_count == commits
+
+    def test_failure_rolls_back_the_chunk(self, tmp_path):
+        """An unexpected error after several creates leaves nothing behind on sqlite."""
+        path = str(tmp_path / "db")
+        db = SqliteDatabase(path)
+        operations = bulk_operations.parse_operations(
+            [operation(title="A"), operation(title="B"), operation(title="crash")]
+        )
+
+        with pytest.raises(RuntimeError):
+            bulk_operations.apply(db, "1", operations)
+
+        other = sqlite3.connect(path)
+        assert other.execute("select count(*) from issue").fetchone() == (0,)
+        assert other.execute("select num from ids").fetchone() == (1,)
+        assert db.newid.__func__ is SqliteDatabase.newid
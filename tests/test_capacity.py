@@ -0,0 +1,139 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for CI range filters and capacity aggregates."""
+
+import sqlite3
+
+import capacity
+import pytest
+from roundup import hyperdb
+
+
+class FakeClass:
+    def __init__(self, props, labels=None):
+        self.props = props
+        self.labels = labels or {}
+
+    def getprops(self):
+        return self.props
+
+    def labelprop(self):
+        return "name"
+
+    def get(self, itemid, prop):
+        return self.labels[itemid]
+
+
+class FakeDatabase:
+    """An sqlite connection with a ``_ci`` table and CI types."""
+
+    arg = "?"
+
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.cursor = self.conn.cursor()
+        self.cursor.execute(
+            "create table _ci (id integer, _type integer, _location varchar, "
+            "_ram_gb real, _cpu_cores real, __retired__ integer)"
+        )
+        self.cursor.executemany(
+            "insert into _ci values (?, ?, ?, ?, ?, ?)",
+            [
+                (1, 1, "Rack A", 64, 16, 0),
+                (2, 1, "Rack A", 128, 32, 0),
+                (3, 1, "Rack B", 256, None, 0),
+                (4, 6, "Rack A", 8, 2, 0),
+                (5, 6, None, 16, 4, 0),
+                (6, 1, "Rack A", 512, 64, 1),
+            ],
+        )
+        self.classes = {
+            "ci": FakeClass(
+                {
+                    "name": hyperdb.String(),
+                    "type": hyperdb.Link("citype"),
+                    "location": hyperdb.String(),
+                    "ram_gb": hyperdb.Number(),
+                    "cpu_cores": hyperdb.Number(),
+                }
+            ),
+            "citype": FakeClass({}, {"1": "Server", "6": "Virtual Machine"}),
+        }
+
+    def sql(self, sql, args=()):
+        self.cursor.execute(sql, args)
+
+    def getclass(self, classname):
+        return self.classes[classname]
+
+
+@pytest.fixture
+def db():
+    return FakeDatabase()
+
+
+@pytest.mark.parametrize(
+    "spec, conditions",
+    [
+        (">=64", [(">=", 64.0)]),
+        ("< 8", [("<", 8.0)]),
+        ("48", [("=", 48.0)]),
+        ("1000..4000", [(">=", 1000.0), ("<=", 4000.0)]),
+    ],
+)
+def test_parse_range(spec, conditions):
+    """Comparisons, exact values and inclusive ranges are accepted."""
+    assert capacity.parse_range(spec) == conditions
+
+
+@pytest.mark.parametrize("spec", ["lots", "=>64", "10..2", "64-"])
+def test_invalid_range(spec):
+    """Anything else is rejected."""
+    with pytest.raises(ValueError):
+        capacity.parse_range(spec)
+
+
+def test_matching_ids(db):
+    """All conditions must hold; retired items and NULL values never match."""
+    assert capacity.matching_ids(db, "ci", {"ram_gb": ">=64"}) == ["1", "2", "3"]
+    assert capacity.matching_ids(db, "ci", {"ram_gb": "10..200", "cpu_cores": ">4"}) == [
+        "1",
+        "2",
+    ]
+    assert capacity.matching_ids(db, "ci", {"ram_gb": " ", "cpu_cores": ""}) is None
+    with pytest.raises(ValueError, match="not a Number"):
+        capacity.matching_ids(db, "ci", {"location": "1"})
+
+
+def test_aggregate_by_link(db):
+    """Groups are labelled and each field is summarized over its non-empty values."""
+    groups = capacity.aggregate(db, "ci", "type", ["ram_gb", "cpu_cores"])
+
+    assert [(row["label"], row["count"]) for row in groups] == [
+        ("Server", 3),
+        ("Virtual Machine", 2),
+    ]
+    servers = groups[0]["fields"]
+    assert servers["ram_gb"] == {
+        "count": 3,
+        "sum": 448,
+        "avg": 448 / 3,
+        "min": 64,
+        "max": 256,
+        "p50": 128,
+        "p90": 230.4,
+        "p95": pytest.approx(243.2),
+    }
+    assert servers["cpu_cores"]["count"] == 2
+
+
+def test_aggregate_by_string_of_some_items(db):
+    """Items without a value are grouped last; ``itemids`` restricts the items."""
+    groups = capacity.aggregate(db, "ci", "location", ["ram_gb"], itemids=["1", "4", "5"])
+    assert [(row["group"], row["fields"]["ram_gb"]["sum"]) for row in groups] == [
+        ("Rack A", 72),
+        (None, 16),
+    ]
+    with pytest.raises(ValueError, match="cannot group"):
+        capacity.aggregate(db, "ci", "ram_gb", ["ram_gb"])
@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for the detector logging facility."""
+
+import logging
+from unittest.mock import Mock
+
+import detector_log
+import pytest
+
+
+class ListHandler(logging.Handler):
+    """Collect emitted records."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def root_handler():
+    """Attach a collecting handler to the root logger at INFO."""
+    root = logging.getLogger()
+    handler = ListHandler()
+    old_level = root.level
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    yield handler
+    detector_log.stop()
+    root.removeHandler(handler)
+    root.setLevel(old_level)
+
+
+class TestDetectorLogger:
+    """Test level guards, lazy fields and background delivery."""
+
+    def test_disabled_level_evaluates_nothing(self, root_handler):
+        """Callable fields are not called below the enabled level."""
+        field = Mock()
+        detector_log.get_logger("detectors.test").debug("Not emitted", newvalues=field)
+        detector_log.stop()
+        field.assert_not_called()
+        assert root_handler.records == []
+
+    def test_records_reach_root_handlers(self, root_handler):
+        """Records are written by the listener with their fields as attributes."""
+        log = detector_log.get_logger("detectors.test")
+        log.info("Changed %s", "issue1", fields=lambda: ["status"], nodeid="1", name="x")
+        detector_log.stop()
+
+        [record] = root_handler.records
+        assert record.name == "pms.detectors.test"
+        assert record.getMessage() == "Changed issue1"
+        assert record.fields == ["status"]
+        assert record.nodeid == "1"
+        assert record.field_name == "x"
+
+    def test_full_queue_drops_records(self, root_handler, monkeypatch):
+        """A full queue drops records instead of blocking, and says so."""
+        detector_log.stop()
+        monkeypatch.setattr(detector_log, "QUEUE_SIZE", 1)
+        detector_log.start()
+        listener = detector_log._listener
+        listener.stop()  # writer paused: records pile up in the queue
+        detector_log._listener = listener
+
+        log = detector_log.get_logger("detectors.test")
+        for i in range(3):
+            log.warning("Record %d", i)
+        listener.start()
+        detector_log.stop()
+
+        messages = [record.getMessage() for record in root_handler.records]
+        assert messages == ["2 log record(s) dropped: log queue full", "Record 0"]
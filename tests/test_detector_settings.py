@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for the shared detector settings."""
+
+from unittest.mock import Mock
+
+import detector_settings
+import pytest
+
+
+def make_db(options=None, statuses=None):
+    """Build a database mock with detector options and a keyed status class."""
+    statuses = statuses if statuses is not None else {"1": "new", "2": "chatting"}
+    status = Mock()
+    status.classname = "status"
+    status.getkey.return_value = "name"
+    status.getnodeids.side_effect = lambda retired: list(statuses)
+    status.get.side_effect = lambda itemid, prop: statuses[itemid]
+    db = Mock()
+    db.config.detectors = options or {}
+    db.getclass.return_value = status
+    return db
+
+
+class TestOptions:
+    """Test parsing of detectors/config.ini options."""
+
+    def test_typed_values(self):
+        """Options are converted with their Roundup option type."""
+        settings = detector_settings.get(
+            make_db(
+                {
+                    "STATUSAUDITOR_CHATTING_REQUIRES_TWO_USERS": "yes",
+                    "NOSYREACTION_COALESCE_WINDOW": "300",
+                }
+            )
+        )
+        assert settings.chatting_requires_two_users
+        assert settings.coalesce_window == 300
+
+    @pytest.mark.parametrize("value", [None, "-1", "often"])
+    def test_missing_or_invalid_values_use_default(self, value):
+        """Unusable values fall back to the declared default."""
+        options = {} if value is None else {"NOSYREACTION_DIGEST_HOUR": value}
+        assert detector_settings.get(make_db(options)).digest_hour == 7
+
+    def test_parsed_once_per_database(self):
+        """Settings are cached for the lifetime of the database object."""
+        db = make_db()
+        assert detector_settings.get(db) is detector_settings.get(db)
+        assert detector_settings.get(make_db()) is not detector_settings.get(db)
+
+
+class TestItemIds:
+    """Test cached item ID lookups."""
+
+    def test_lookup_and_missing(self):
+        """Known names resolve to IDs, unknown names to None."""
+        settings = detector_settings.get(make_db())
+        assert settings.item_id("status", "chatting") == "2"
+        assert settings.item_id("status", "unread") is None
+
+    def test_ids_are_cached_until_class_changes(self):
+        """A reactor on the class drops the cached IDs."""
+        statuses = {"1": "new"}
+        db = make_db(statuses=statuses)
+        settings = detector_settings.get(db)
+        assert settings.item_id("status", "unread") is None
+
+        statuses["2"] = "unread"
+        assert settings.item_id("status", "unread") is None
+
+        status = db.getclass("status")
+        reactor = status.react.call_args_list[0].args[1]
+        reactor(db, status, "2", None)
+        assert settings.item_id("status", "unread") == "2"
+        assert status.react.call_count == 4
@@ -0,0 +1,62 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Tests for email property directives."""
+
+import pytest
+from email_directives import parse_directives
+
+
+class TestParseDirectives:
+    """Test extraction of [prop=value] directives from message summaries."""
+
+    @pytest.mark.parametrize(
+        "text",
+        ["[status=in-progress]", "[status:in-progress]", "[STATUS = in-progress]"],
+    )
+    def test_status_separators_and_case(self, text):
+        """Both separators are accepted and property names are case-insensitive."""
+        assert parse_directives(text) == {"status": "in-progress"}
+
+    def test_multiple_directives(self):
+        """Several directives in one line are all returned."""
+        text = "Looking into it [status=in-progress] [priority=urgent] [assignedto=alice]"
+        assert parse_directives(text) == {
+            "status": "in-progress",
+            "priority": "urgent",
+            "assignedto": "alice",
+        }
+
+    def test_semicolon_separated_block(self):
+        """Assignments can share one bracket."""
+        assert parse_directives("[keyword=+network,-storage;affected_cis=web-01]") == {
+            "keyword": "+network,-storage",
+            "affected_cis": "web-01",
+        }
+
+    def test_later_directive_wins(self):
+        """A repeated property keeps the last value."""
+        assert parse_directives("[status=resolved] [status=closed]") == {"status": "closed"}
+
+    @pytest.mark.parametrize(
+        "text",
+        ["", None, "No directives here", "[issue42] Re: outage", "[title=new title]"],
+    )
+    def test_no_directives(self, text):
+        """Unknown properties and issue designators are ignored."""
+        assert parse_directives(text) == {}
+
+
+@pytest.mark.parametrize(
+    ("source", "status"),
+    [("email", "in-progress"), ("email-sig-openpgp", "in-progress"), ("web", "new"), (None, "new")],
+)
+def test_directives_only_apply_to_email(tracker_db, source, status):
+    """Directives quoted in a comment on the web leave the issue alone."""
+    db = tracker_db
+    db.tx_Source = source
+    issueid = db.issue.create(title="Disk full")
+    msgid = db.msg.create(author="1", content="x", summary="On it [status=in-progress]")
+    db.issue.set(issueid, messages=[msgid])
+
+    assert db.status.get(db.issue.get(issueid, "status"), "name") == status
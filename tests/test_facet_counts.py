@@ -0,0 +1,86 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for one-pass facet counts."""
+
+import sqlite3
+
+import facet_counts
+import pytest
+from roundup import hyperdb
+
+
+class FakeClass:
+    def getprops(self):
+        return {
+            "name": hyperdb.String(),
+            "location": hyperdb.String(),
+            "type": hyperdb.Link("citype"),
+            "status": hyperdb.Link("cistatus"),
+        }
+
+
+class FakeDatabase:
+    """An sqlite connection with a ``_ci`` table."""
+
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.cursor = self.conn.cursor()
+        self.cursor.execute(
+            "create table _ci (id integer, _name varchar, _location varchar, "
+            "_type integer, _status integer, __retired__ integer)"
+        )
+        self.cursor.executemany(
+            "insert into _ci values (?, ?, ?, ?, ?, ?)",
+            [
+                (1, "web01", "Rack A", 1, 5, 0),
+                (2, "web02", "Rack B", 1, 4, 0),
+                (3, "san01", "Rack A", 3, 5, 0),
+                (4, "db01", "Rack A", 1, 5, 0),
+                (5, "old01", "Rack A", 1, 5, 4),
+                (6, "vm01", None, None, 5, 0),
+            ],
+        )
+        self.calls = 0
+
+    def sql(self, sql, args=()):
+        self.calls += 1
+        self.cursor.execute(sql, args)
+
+    def getclass(self, classname):
+        return FakeClass()
+
+
+@pytest.fixture
+def db():
+    return FakeDatabase()
+
+
+def test_counts_without_filters(db):
+    """Every live item counts for its value of each facet, in one query."""
+    assert facet_counts.counts(db, "ci", {"type": "", "status": None}) == {
+        "type": {"1": 3, "3": 1},
+        "status": {"5": 4, "4": 1},
+    }
+    assert db.calls == 1
+
+
+def test_each_facet_ignores_its_own_filter(db):
+    """Facet counts apply the text and the other facets' selections."""
+    found = facet_counts.counts(
+        db, "ci", {"type": "1", "status": "5"}, "RACK a", ("name", "location")
+    )
+    # type counts: status 5 in rack A; status counts: servers in rack A
+    assert found == {"type": {"1": 2, "3": 1}, "status": {"5": 2}}
+
+
+def test_restricted_to_items(db):
+    """Only the given items (e.g. the CIs of a subnet) are counted."""
+    found = facet_counts.counts(db, "ci", {"type": "", "status": ""}, itemids=["2", "3", "5"])
+    assert found == {"type": {"1": 1, "3": 1}, "status": {"4": 1, "5": 1}}
+
+
+def test_only_link_properties(db):
+    """Facets must be Link properties."""
+    with pytest.raises(ValueError, match="not a Link"):
+        facet_counts.counts(db, "ci", {"name": ""})
@@ -0,0 +1,253 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for the ranked FTS5 full-text indexer."""
+
+import sqlite3
+from unittest.mock import Mock
+
+import blob_store
+import fts_index
+import pytest
+from roundup import hyperdb
+from roundup.cgi.exceptions import IndexerQueryError
+
+
+class FakeConfig(dict):
+    """Tracker settings with detector options."""
+
+    detectors = {}
+
+
+class FakeDatabase:
+    """An sqlite connection with the parts of a Roundup database the indexer uses."""
+
+    arg = "?"
+
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.cursor = self.conn.cursor()
+        self.config = FakeConfig(
+            {("main", "indexer_stopwords"): [], ("main", "indexer_language"): "english"}
+        )
+        fts_index.create_index(self)
+        self.classes = {}
+        self.transactions = []
+        self.indexer = fts_index.Indexer(self)
+
+    def sql(self, sql, args=()):
+        self.cursor.execute(sql, args)
+
+    def getclass(self, classname):
+        return self.classes[classname]
+
+    def rows(self):
+        self.cursor.execute("select _class, _itemid, _prop, _textblob from __fts order by rowid")
+        return self.cursor.fetchall()
+
+
+@pytest.fixture
+def db():
+    return FakeDatabase()
+
+
+class TestAddText:
+    """Test incremental index updates."""
+
+    def test_insert_and_replace(self, db):
+        """Each property has one row, replaced when its text changes."""
+        db.indexer.add_text(("change", "1", "description"), "Renew the TLS certificate")
+        db.indexer.add_text(("change", "11", "description"), "Upgrade the kernel")
+        db.indexer.add_text(("change", "1", "description"), "Renew the web certificate")
+        db.indexer.add_text(("change", "1", "description"), "Renew the web certificate")
+
+        assert db.rows() == [
+            ("change", "1", "description", "Renew the web certificate"),
+            ("change", "11", "description", "Upgrade the kernel"),
+        ]
+
+    def test_columns_must_match_exactly(self, db):
+        """Rows whose columns only contain the same tokens are other rows."""
+        db.indexer.add_text(("ci", "1", "vendor_name"), "Dell")
+        db.indexer.add_text(("ci", "1", "vendor"), "HP")
+
+        assert [row[2:] for row in db.rows()] == [("vendor_name", "Dell"), ("vendor", "HP")]
+
+    def test_other_mime_types_are_skipped(self, db):
+        """Only plain text is indexed."""
+        db.indexer.add_text(("file", "1", "content"), "<p>certificate</p>", "text/html")
+        assert db.rows() == []
+
+
+class TestSearch:
+    """Test ranked searches."""
+
+    @pytest.fixture
+    def indexed(self, db):
+        db.indexer.add_text(("change", "1", "description"), "Kernel upgrade on db01")
+        db.indexer.add_text(
+            ("change", "2", "description"), "Certificate renewal, certificate check"
+        )
+        db.indexer.add_text(("msg", "5", "content"), "The certificate expires next week")
+        db.indexer.add_text(("change", "3", "title"), "Certificate")
+        return db
+
+    def test_hits_best_first(self, indexed):
+        """Hits are ordered by BM25 and support prefix queries."""
+        hits = indexed.indexer.find_ranked("certif*")
+        assert sorted(hit[:2] for hit in hits) == [("change", "2"), ("change", "3"), ("msg", "5")]
+        assert [hit[3] for hit in hits] == sorted(hit[3] for hit in hits)
+        assert hits[-1][:2] == ("msg", "5")
+        assert indexed.indexer.find(["kernel", "AND", "db01"]) == [("change", "1", "description")]
+
+    def test_invalid_query(self, indexed):
+        """Query syntax errors are reported as indexer query errors."""
+        with pytest.raises(IndexerQueryError, match="Query error"):
+            indexed.indexer.find_ranked("certificate NOT")
+
+    def test_unbuilt_index_is_not_searched(self, db):
+        """The table Roundup creates on existing trackers is refused until rebuilt."""
+        db.sql("drop table __fts")
+        db.sql("create virtual table __fts using fts5(_class, _itemid, _prop, _textblob)")
+        db.indexer = fts_index.Indexer(db)
+
+        with pytest.raises(IndexerQueryError, match="rebuild-fulltext"):
+            db.indexer.find(["kernel"])
+
+    def test_ranked_items_include_message_hits(self, indexed):
+        """Items are found through their messages and keep their best score."""
+        change = Mock()
+        change.getprops.return_value = {
+            "title": hyperdb.String(),
+            "messages": hyperdb.Multilink("msg"),
+        }
+        change.find.side_effect = lambda messages: {"5": ["2", "4"]}[messages]
+        change.is_retired.side_effect = lambda itemid: itemid == "3"
+        indexed.classes["change"] = change
+
+        results = fts_index.ranked(indexed, "certificate", "change")
+        assert [itemid for itemid, _score in results] == ["2", "4"]
+        assert fts_index.ranked(indexed, "certificate", "change", limit=1)[0][0] == "2"
+
+
+class FakeClass:
+    """Items with String properties, some of them indexed."""
+
+    default_mime_type = "text/plain"
+
+    def __init__(self, classname, props, nodes):
+        self.classname = classname
+        self.props = props
+        self.nodes = nodes
+
+    def getprops(self):
+        return self.props
+
+    def list(self):
+        return list(self.nodes)
+
+    def get(self, nodeid, prop):
+        return self.nodes[nodeid].get(prop)
+
+    def filter(self, search_matches, filterspec, retired):
+        return [nodeid for nodeid in filterspec["id"] if nodeid in self.nodes]
+
+
+@pytest.fixture
+def tracker(db, tmp_path):
+    """Changes with indexed descriptions and messages with content files."""
+    db.classes["change"] = FakeClass(
+        "change",
+        {"title": hyperdb.String(), "description": hyperdb.String(indexme="yes")},
+        {
+            str(i): {"title": f"Change {i}", "description": f"Renew certificate {i}"}
+            for i in range(1, 8)
+        },
+    )
+    db.classes["msg"] = FakeClass(
+        "msg",
+        {"content": hyperdb.String(indexme="yes"), "type": hyperdb.String()},
+        {"1": {}, "2": {"type": "text/html"}, "3": {}},
+    )
+    for nodeid in ("1", "2"):
+        (tmp_path / f"msg{nodeid}").write_bytes(blob_store.encode(b"Disk full on web01", "zlib"))
+    db.filename = lambda classname, nodeid: str(tmp_path / f"{classname}{nodeid}")
+    db.commit = db.conn.commit
+    db.clearCache = lambda: None
+    return db
+
+
+class TestRebuild:
+    """Test rebuilding the whole index."""
+
+    def test_rebuild_reindexes_every_item(self, tracker):
+        """Indexed properties and plain text content are indexed, with prefix indexes."""
+        tracker.indexer.add_text(("change", "9", "description"), "Stale text")
+
+        result = fts_index.rebuild(tracker, workers=1, chunk_size=3)
+
+        assert (result.items, result.texts) == (10, 8)
+        assert ("msg", "1", "content", "Disk full on web01") in tracker.rows()
+        assert ("change", "9", "description", "Stale text") not in tracker.rows()
+        tracker.cursor.execute("select sql from sqlite_master where name = '__fts'")
+        assert "prefix='2 3'" in tracker.cursor.fetchone()[0]
+        assert fts_index._checkpoints(tracker) is None
+
+    def test_resume_after_interruption(self, tracker, monkeypatch):
+        """A resumed rebuild skips committed chunks and rewrites the rest once."""
+        write_chunk = fts_index._write_chunk
+
+        def interrupt(db, classname, itemids, rows):
+            if itemids[0] == "4":
+                raise KeyboardInterrupt
+            write_chunk(db, classname, itemids, rows)
+
+        monkeypatch.setattr(fts_index, "_write_chunk", interrupt)
+        with pytest.raises(KeyboardInterrupt):
+            fts_index.rebuild(tracker, workers=1, chunk_size=3)
+        tracker.conn.rollback()
+        assert fts_index._checkpoints(tracker) == {"change": 3, "msg": 0}
+
+        # an item changed in between is indexed once
+        tracker.indexer.add_text(("change", "5", "description"), "Renew certificate 5")
+        monkeypatch.setattr(fts_index, "_write_chunk", write_chunk)
+        result = fts_index.rebuild(tracker, workers=1, chunk_size=3, resume=True)
+
+        assert (result.items, result.texts) == (7, 5)
+        descriptions = [row for row in tracker.rows() if row[0] == "change"]
+        assert len(descriptions) == 7
+
+
+class TestDeferredIndexing:
+    """Test the queue of items saved in deferred classes."""
+
+    @pytest.fixture
+    def deferred(self, tracker):
+        tracker.config.detectors = {"FULLTEXT_DEFERRED_CLASSES": "change, ci"}
+        # settings are parsed once per database open
+        tracker.__dict__.pop("_detector_settings")
+        tracker.indexer = fts_index.Indexer(tracker)
+        return tracker
+
+    def test_saves_are_queued_and_drained(self, deferred):
+        """Deferred saves only queue the item; draining indexes its current values."""
+        assert fts_index.drain(deferred) == 0
+        deferred.indexer.add_text(("change", "2", "description"), "Old text")
+        deferred.indexer.add_text(("change", "2", "description"), "Older text")
+        deferred.indexer.add_text(("change", "99", "description"), "Destroyed since")
+        deferred.indexer.add_text(("msg", "1", "content"), "Disk full on web01")
+        assert deferred.rows() == [("msg", "1", "content", "Disk full on web01")]
+
+        assert fts_index.drain(deferred) == 2
+        assert ("change", "2", "description", "Renew certificate 2") in deferred.rows()
+        assert len(deferred.rows()) == 2
+        assert fts_index.drain(deferred) == 0
+
+    def test_drain_in_batches(self, deferred):
+        """Queued items are indexed oldest first, ``limit`` at a time."""
+        for itemid in ("3", "1", "2"):
+            deferred.indexer.add_text(("change", itemid, "description"), "")
+
+        assert fts_index.drain(deferred, limit=2) == 2
+        assert [row[1] for row in deferred.rows()] == ["3", "1"]
+        assert fts_index.drain(deferred, limit=2) == 1
@@ -0,0 +1,93 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for the CI IP address index."""
+
+import sqlite3
+
+import ip_index
+import pytest
+
+
+class FakeCIClass:
+    """CIs with an ip_address value, some of them retired."""
+
+    def __init__(self, addresses):
+        self.addresses = addresses
+        self.retired = set()
+
+    def get(self, ciid, prop):
+        return self.addresses[ciid]
+
+    def is_retired(self, ciid):
+        return ciid in self.retired
+
+    def getnodeids(self, retired=None):
+        return [ciid for ciid in self.addresses if ciid not in self.retired]
+
+
+class FakeDatabase:
+    """An sqlite connection and a ci class."""
+
+    arg = "?"
+
+    def __init__(self, addresses):
+        self.conn = sqlite3.connect(":memory:")
+        self.cursor = self.conn.cursor()
+        self.ci = FakeCIClass(addresses)
+
+    def sql(self, sql, args=()):
+        self.cursor.execute(sql, args)
+
+
+@pytest.fixture
+def db():
+    db = FakeDatabase(
+        {
+            "1": "10.0.3.5",
+            "2": "10.0.3.77, 2001:db8::1",
+            "3": "10.0.4.1",
+            "4": "10.0.3.5/24",
+            "5": None,
+            "6": "10.0.3.10 10.0.3.10",
+            "7": "not an address",
+        }
+    )
+    ip_index.rebuild(db)
+    return db
+
+
+def test_parse():
+    """Addresses are separated by commas or spaces; interface notation is accepted."""
+    assert [str(a) for a in ip_index.parse("10.0.3.5/24, 2001:DB8::1  10.0.3.5")] == [
+        "10.0.3.5",
+        "2001:db8::1",
+    ]
+    assert ip_index.parse("") == []
+    with pytest.raises(ValueError):
+        ip_index.parse("10.0.3.300")
+
+
+def test_exact_and_network_searches(db):
+    """Exact lookups do not match longer addresses; networks are integer ranges."""
+    assert ip_index.lookup(db, "10.0.3.1") == []
+    assert ip_index.search(db, "10.0.3.5") == ["1", "4"]
+    assert ip_index.search(db, "10.0.3.0/24") == ["1", "2", "4", "6"]
+    assert ip_index.search(db, "10.0.3.64/26") == ["2"]
+    assert ip_index.search(db, "2001:db8::/32") == ["2"]
+    with pytest.raises(ValueError):
+        ip_index.search(db, "10.0.3")
+
+
+def test_changes_and_duplicates(db):
+    """Each CI's rows follow its current value; retired CIs are not indexed."""
+    assert ip_index.duplicates(db) == {"10.0.3.5": ["1", "4"]}
+    assert ip_index.duplicates(db, "3") == {}
+
+    db.ci.addresses["3"] = "10.0.3.5"
+    ip_index.sync_ci(db, "3")
+    db.ci.retired.add("1")
+    ip_index.sync_ci(db, "1")
+
+    assert ip_index.duplicates(db, "3") == {"10.0.3.5": ["3", "4"]}
+    assert ip_index.search(db, "10.0.4.0/24") == []
@@ -0,0 +1,155 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for REST link expansion."""
+
+from unittest.mock import Mock
+
+import link_expansion
+import pytest
+from roundup import hyperdb, password
+
+
+class FakeClass:
+    """Items in a dict, counting get() calls."""
+
+    def __init__(self, props, nodes, labelprop="name"):
+        self.props = props
+        self.nodes = nodes
+        self._labelprop = labelprop
+        self.gets = 0
+
+    def getprops(self):
+        return self.props
+
+    def labelprop(self):
+        return self._labelprop
+
+    def get(self, nodeid, prop):
+        self.gets += 1
+        return self.nodes[nodeid].get(prop)
+
+
+class FakeDatabase:
+    """Issues linking priorities, users and CIs (no SQL access)."""
+
+    def __init__(self):
+        self.classes = {
+            "issue": FakeClass(
+                {
+                    "title": hyperdb.String(),
+                    "priority": hyperdb.Link("priority"),
+                    "assignedto": hyperdb.Link("user"),
+                    "nosy": hyperdb.Multilink("user"),
+                    "affected_cis": hyperdb.Multilink("ci"),
+                },
+                {
+                    "1": {
+                        "priority": "2",
+                        "assignedto": "5",
+                        "nosy": ["5", "6"],
+                        "affected_cis": [],
+                    },
+                    "2": {"priority": None, "assignedto": None, "nosy": [], "affected_cis": ["12"]},
+                },
+            ),
+            "priority": FakeClass({"name": hyperdb.String()}, {"2": {"name": "urgent"}}),
+            "user": FakeClass(
+                {
+                    "username": hyperdb.String(),
+                    "realname": hyperdb.String(),
+                    "password": hyperdb.Password(),
+                    "supervisor": hyperdb.Link("user"),
+                },
+                {
+                    "5": {
+                        "username": "alice",
+                        "realname": "Alice",
+                        "password": password.Password("secret", scheme="SHA"),
+                        "supervisor": "6",
+                    },
+                    "6": {"username": "bob", "realname": "Bob", "password": None},
+                },
+                labelprop="username",
+            ),
+            "ci": FakeClass({"name": hyperdb.String()}, {"12": {"name": "web-01"}}),
+        }
+        self.security = Mock()
+        self.security.hasPermission.return_value = True
+
+    def getclass(self, classname):
+        return self.classes[classname]
+
+
+@pytest.fixture
+def db():
+    return FakeDatabase()
+
+
+def test_parse_expand(db):
+    """Entries default to the label property and are grouped per property."""
+    assert link_expansion.parse_expand(
+        db, "issue", "priority, assignedto.realname,assignedto,,affected_cis.name"
+    ) == {"priority": ["name"], "assignedto": ["realname", "username"], "affected_cis": ["name"]}
+
+
+@pytest.mark.parametrize(
+    ("value", "message"),
+    [
+        ("title", "not a Link"),
+        ("colour", "not a Link"),
+        ("assignedto.email", "not a property of user"),
+        ("affected_cis.type.name", "one level"),
+    ],
+)
+def test_parse_expand_errors(db, value, message):
+    """Only existing fields of Link and Multilink properties can be expanded."""
+    with pytest.raises(ValueError, match=message):
+        link_expansion.parse_expand(db, "issue", value)
+
+
+def test_expand_links_and_multilinks(db):
+    """Links become one item or None, Multilinks lists; each field is read once per item."""
+    spec = link_expansion.parse_expand(
+        db, "issue", "priority,assignedto.realname,nosy.username,affected_cis"
+    )
+    expanded = link_expansion.expand(db, "1", "issue", ["1", "2"], spec)
+
+    assert expanded["1"] == {
+        "priority": {"id": "2", "name": "urgent"},
+        "assignedto": {"id": "5", "realname": "Alice"},
+        "nosy": [{"id": "5", "username": "alice"}, {"id": "6", "username": "bob"}],
+        "affected_cis": [],
+    }
+    assert expanded["2"] == {
+        "priority": None,
+        "assignedto": None,
+        "nosy": [],
+        "affected_cis": [{"id": "12", "name": "web-01"}],
+    }
+    # user 5 is both assignee and nosy: realname and username are each read once
+    assert db.getclass("user").gets == 3
+
+
+def test_expand_respects_permissions(db):
+    """Hidden item properties are omitted, hidden linked fields left out."""
+    db.security.hasPermission.side_effect = lambda perm, uid, cls, prop, itemid: not (
+        (cls, itemid) == ("issue", "2") or (cls, prop) == ("user", "realname")
+    )
+    spec = link_expansion.parse_expand(db, "issue", "assignedto.realname,assignedto.username")
+    expanded = link_expansion.expand(db, "7", "issue", ["1", "2"], spec)
+    assert expanded == {"1": {"assignedto": {"id": "5", "username": "alice"}}, "2": {}}
+
+
+def test_expand_formats_fields(db):
+    """Passwords are hidden and links are references, as in Roundup's REST items."""
+    spec = link_expansion.parse_expand(db, "issue", "nosy.password,nosy.supervisor")
+    expanded = link_expansion.expand(db, "1", "issue", ["1"], spec, "/rest/data")
+    assert expanded["1"]["nosy"] == [
+        {
+            "id": "5",
+            "password": "[password hidden scheme SHA]",
+            "supervisor": {"id": "6", "link": "/rest/data/user/6"},
+        },
+        {"id": "6", "password": "[password hidden scheme PBKDF2]", "supervisor": None},
+    ]
@@ -0,0 +1,83 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for the in-process SMTP sink."""
+
+import smtplib
+import threading
+
+import pytest
+
+from tests.utils.local_mail import LocalMailServer
+
+
+@pytest.fixture
+def server():
+    with LocalMailServer() as server:
+        yield server
+
+
+class TestDelivery:
+    """Test SMTP delivery into mailboxes."""
+
+    def test_message_is_delivered_to_every_recipient(self, server):
+        """Each recipient's mailbox gets the message, addresses in any case."""
+        with smtplib.SMTP(server.host, server.port) as smtp:
+            smtp.sendmail(
+                "alice@localhost",
+                ["Bob@localhost", "carol@localhost"],
+                "Subject: Disk full\r\n\r\n.hidden line\r\nbody\r\n",
+            )
+
+        assert server.get_message_count(user="bob@localhost") == 1
+        message = server.get_received_messages(user="carol@localhost")[0]
+        assert message["Subject"] == "Disk full"
+        assert message.get_payload().splitlines() == [".hidden line", "body"]
+
+    def test_clear_mailbox(self, server):
+        """Clearing a mailbox returns the number of deleted messages."""
+        server.send_email("alice@localhost", "bob@localhost", "One", "1")
+        server.send_email("alice@localhost", "bob@localhost", "Two", "2")
+
+        assert server.clear_mailbox(user="bob@localhost") == 2
+        assert server.get_message_count(user="bob@localhost") == 0
+
+
+class TestNotifications:
+    """Test event-driven waiting and listeners."""
+
+    def test_wait_wakes_up_on_delivery(self, server):
+        """A waiting thread gets the matching message when it is delivered."""
+        sender = threading.Timer(
+            0.1,
+            lambda: [
+                server.send_email("alice@localhost", "bob@localhost", subject, "body")
+                for subject in ("Other", "Wanted")
+            ],
+        )
+        sender.start()
+
+        message = server.wait_for_message(
+            timeout=5, user="bob@localhost", match=lambda m: m["Subject"] == "Wanted"
+        )
+        sender.join()
+        assert message["Subject"] == "Wanted"
+        assert server.wait_for_message(timeout=0.1, user="nobody@localhost") is None
+
+    def test_listener_may_send_mail(self, server):
+        """Listeners see every message and can reply through the same server."""
+        seen = []
+
+        def auto_reply(mail_from, recipients, message):
+            seen.append((mail_from, recipients, message["Subject"]))
+            if recipients == ["tracker@localhost"]:
+                server.send_email("tracker@localhost", mail_from, "Re: " + message["Subject"], "ok")
+
+        server.add_listener(auto_reply)
+        server.send_email("alice@localhost", "tracker@localhost", "Alert", "body")
+
+        assert seen == [
+            ("alice@localhost", ["tracker@localhost"], "Alert"),
+            ("tracker@localhost", ["alice@localhost"], "Re: Alert"),
+        ]
+        assert server.get_message_count(user="alice@localhost") == 1
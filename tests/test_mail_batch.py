@@ -0,0 +1,108 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for batch mail ingestion."""
+
+import mailbox
+from unittest.mock import Mock
+
+import mail_batch
+from roundup import mailgw
+from roundup.mailer import Mailer
+
+
+def make_gateway(handle):
+    gateway = Mock()
+    gateway.handle_Message.side_effect = handle
+    return gateway
+
+
+class TestGroups:
+    """Test splitting the mailbox into transactions."""
+
+    def test_groups(self):
+        """Groups have at most the batch size and the last one is partial."""
+        assert list(mail_batch._groups(list("abcde"), 2)) == [["a", "b"], ["c", "d"], ["e"]]
+
+    def test_one_group_is_parsed_ahead(self):
+        """The next group is read when the previous one is handed out, not before."""
+        box = Mock()
+        box.get_bytes.side_effect = lambda key: f"Subject: {key}\n\n".encode()
+        groups = mail_batch._parsed_groups(box, list("abcde"), 2, None)
+
+        keys, messages = next(groups)
+        assert keys == ["a", "b"] and [m["Subject"] for m in messages] == ["a", "b"]
+        assert box.get_bytes.call_count == 4
+        assert [keys for keys, messages in groups] == [["c", "d"], ["e"]]
+
+    def test_rate(self):
+        """The rate is messages per second."""
+        assert mail_batch.IngestResult(300, 0, 0, 2.0).rate == 150.0
+        assert mail_batch.IngestResult(0, 0, 0, 0.0).rate == 0.0
+
+
+class TestHandleGroup:
+    """Test grouped transactions and their fallback."""
+
+    def test_group_is_committed_once(self):
+        """Messages share one commit; ignored messages are counted."""
+
+        def handle(message):
+            if message == "bulk":
+                raise mailgw.IgnoreBulk
+            assert gateway.batch_db is db
+
+        gateway = make_gateway(handle)
+        db = Mock(held_nosymessages=[])
+
+        assert mail_batch._handle_group(gateway, db, ["a", "bulk", "b"]) == (1, 0)
+        db.commit.assert_called_once()
+        db.rollback.assert_not_called()
+        assert gateway.batch_db is None
+
+    def test_failed_group_is_handled_one_at_a_time(self):
+        """A failure rolls the group back and hands each message to the gateway."""
+        calls = []
+
+        def handle(message):
+            calls.append((message, gateway.batch_db is not None))
+            if message == "bad" and gateway.batch_db is not None:
+                raise mailgw.MailUsageError("no such issue")
+
+        gateway = make_gateway(handle)
+        db = Mock(held_nosymessages=[(Mock(), ("1", "1", None), {})])
+
+        assert mail_batch._handle_group(gateway, db, ["a", "bad", "b"]) == (0, 3)
+        db.rollback.assert_called_once()
+        assert db.held_nosymessages == []
+        db.commit.assert_not_called()
+        assert calls == [("a", True), ("bad", True), ("a", False), ("bad", False), ("b", False)]
+        assert gateway.trapExceptions == 1
+
+
+def test_ingest(tracker, tmp_path, monkeypatch):
+    """Messages become issues, their nosy mail is sent as usual and the mbox is emptied."""
+    db = tracker.open("admin")
+    db.user.create(username="alice", address="alice@example.com", roles="User")
+    db.commit()
+    db.close()
+    sent = []
+    monkeypatch.setattr(Mailer, "smtp_send", lambda mailer, to, message: sent.append(message))
+    box = mailbox.mbox(tmp_path / "mbox")
+    for n in range(3):
+        box.add(f"From: alice@example.com\nSubject: Disk full on web0{n}\n\nDisk full\n")
+    box.close()
+
+    result = mail_batch.ingest(tracker, str(tmp_path / "mbox"), workers=1, batch_size=2)
+
+    assert (result.messages, result.ignored, result.retried) == (3, 0, 0)
+    assert len(mailbox.mbox(tmp_path / "mbox")) == 0
+    db = tracker.open("admin")
+    try:
+        assert sorted(db.issue.get(i, "title") for i in db.issue.list()) == [
+            f"Disk full on web0{n}" for n in range(3)
+        ]
+        assert db.msg.get("1", "recipients") == [db.user.lookup("alice")]
+    finally:
+        db.close()
+    assert len(sent) == 3 and all("X-Roundup-issue-Id" in message for message in sent)
@@ -0,0 +1,88 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for bounded-cost message summaries."""
+
+from unittest.mock import MagicMock, Mock
+
+import message_summary
+import pytest
+from roundup.configuration import InvalidOptionError
+from roundup.mailgw import parseContent
+
+
+class TestSummaryHead:
+    """Test selection of the part of a body that holds the summary."""
+
+    def test_stops_after_first_paragraph(self):
+        """Later paragraphs are not scanned."""
+        body = "First line\nstill first\n\nSecond paragraph\n"
+        assert message_summary.summary_head(body) == "First line\nstill first"
+
+    def test_skips_quoted_paragraphs(self):
+        """Quoted text before the reply is included up to the reply paragraph."""
+        body = "> quoted\n> text\n\nMy reply\n\nSignature\n"
+        assert message_summary.summary_head(body) == "> quoted\n> text\n\nMy reply"
+
+    def test_limit(self):
+        """A body without blank lines is cut at the limit."""
+        assert message_summary.summary_head("x" * 100, limit=10) == "x" * 10
+
+
+class TestExtractSummary:
+    """Test that bounded extraction matches parseContent on normal bodies."""
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            "Disk is full on web-01.\n\nDetails follow.\n",
+            "> Is it fixed?\n> Please check.\n\nYes, fixed. Closing.\n\n-- \nAlice\n",
+            "Short",
+            "",
+        ],
+    )
+    def test_same_summary_as_parse_content(self, body):
+        """The summary is the one parseContent computes for the full body."""
+        expected, _content = parseContent(body, keep_body=True)
+        assert message_summary.extract_summary(body, None) == expected
+
+    def test_huge_body(self):
+        """Only the head of a huge body is parsed."""
+        body = "Log attached below.\n\n" + "line\n\n" * 500000
+        assert message_summary.extract_summary(body, None) == "Log attached below."
+
+
+class TestOversizedBodies:
+    """Test the max_body_size policy."""
+
+    def _db(self, value):
+        db = Mock()
+        db.config.detectors = MagicMock()
+        if value is None:
+            db.config.detectors.__getitem__.side_effect = InvalidOptionError("missing")
+        else:
+            db.config.detectors.__getitem__.return_value = value
+        return db
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [("100", 100), ("0", 0), (None, 262144), ("-1", 262144)],
+    )
+    def test_max_body_size(self, value, expected):
+        """Missing or invalid settings fall back to the default."""
+        assert message_summary.max_body_size(self._db(value)) == expected
+
+    def test_is_oversized(self):
+        """Only bodies above a non-zero limit are oversized."""
+        assert message_summary.is_oversized(self._db("10"), "x" * 11)
+        assert not message_summary.is_oversized(self._db("10"), "x" * 10)
+        assert not message_summary.is_oversized(self._db("0"), "x" * 11)
+        assert not message_summary.is_oversized(self._db("10"), None)
+
+    def test_preview(self):
+        """The preview keeps whole lines and names the attachment."""
+        body = "line one\nline two\n" + "y" * 100
+        preview = message_summary.preview(body, size=15)
+        assert preview.startswith("line one\n\n")
+        assert f"{len(body)} characters" in preview
+        assert message_summary.OVERSIZED_BODY_NAME in preview
@@ -0,0 +1,94 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for the CI name trigram index."""
+
+import sqlite3
+
+import name_index
+import pytest
+
+
+class FakeCIClass:
+    """CIs with a name, some of them retired."""
+
+    def __init__(self, names):
+        self.names = names
+        self.retired = set()
+
+    def get(self, ciid, prop):
+        return self.names[ciid]
+
+    def is_retired(self, ciid):
+        return ciid in self.retired
+
+    def getnodeids(self, retired=None):
+        return [ciid for ciid in self.names if ciid not in self.retired]
+
+
+class FakeDatabase:
+    """An sqlite connection and a ci class."""
+
+    arg = "?"
+
+    def __init__(self, names):
+        self.conn = sqlite3.connect(":memory:")
+        self.cursor = self.conn.cursor()
+        self.ci = FakeCIClass(names)
+
+    def sql(self, sql, args=()):
+        self.cursor.execute(sql, args)
+
+
+@pytest.fixture
+def db():
+    db = FakeDatabase(
+        {
+            "1": "db-srv-01",
+            "2": "db-srv-02",
+            "3": "web-01",
+            "4": "web-02",
+            "5": "nas-backup",
+            "6": "",
+        }
+    )
+    assert name_index.rebuild(db) == 5
+    return db
+
+
+def test_trigrams():
+    """Names are lower-cased, separators dropped and the ends padded."""
+    assert name_index.trigrams("DB-01") == {"  d", " db", "db0", "b01", "01 "}
+    assert name_index.trigrams("--") == set()
+    assert name_index.trigrams(None) == set()
+
+
+def test_similar_ranks_by_similarity(db):
+    """Misspelled names find the closest CIs first; unrelated ones are left out."""
+    ranked = name_index.similar(db, "dbserver01")
+    assert [ciid for ciid, _score in ranked] == ["1", "2"]
+    assert ranked[0][1] > ranked[1][1] >= name_index.THRESHOLD
+    assert name_index.similar(db, "DB_SRV_01")[0] == ("1", 1.0)
+    assert name_index.similar(db, "web", limit=1) == [("3", pytest.approx(0.6))]
+    assert name_index.similar(db, "printer") == []
+    assert name_index.similar(db, "") == []
+
+
+def test_best_match(db):
+    """Only a clear winner with the same digits is picked."""
+    assert name_index.best_match(db, "dbserver01") == "1"
+    assert name_index.best_match(db, "nas backup") == "5"
+    assert name_index.best_match(db, "web-03") is None
+    assert name_index.best_match(db, "web") is None
+
+
+def test_sync_follows_renames_and_retirement(db):
+    """Renamed CIs are found by their new name, retired ones not at all."""
+    db.ci.names["5"] = "nas-archive"
+    name_index.sync_ci(db, "5")
+    assert name_index.best_match(db, "nasarchive") == "5"
+    assert name_index.similar(db, "nas-backup") == []
+
+    db.ci.retired.add("1")
+    name_index.sync_ci(db, "1")
+    assert [ciid for ciid, _score in name_index.similar(db, "db-srv-01")] == ["2"]
@@ -0,0 +1,308 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for the nosy notification queue helpers."""
+
+import datetime
+import email
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import detector_settings
+import nosy_queue
+import pytest
+from nosy_queue import get_settings, next_digest_time
+from roundup import date, hyperdb
+from roundup.mailer import Mailer, MessageSendError
+
+
+NOW = datetime.datetime(2025, 3, 10, 5, 30)
+
+
+class FakeClass:
+    """Items in a dict; filter() matches exact values."""
+
+    def __init__(self, props, nodes=None):
+        self.props = props
+        self.nodes = nodes or {}
+
+    def getprops(self):
+        return self.props
+
+    def get(self, nodeid, prop, default=None):
+        return self.nodes[nodeid].get(prop, default)
+
+    def set(self, nodeid, **values):
+        self.nodes[nodeid].update(values)
+
+    def create(self, **values):
+        nodeid = str(len(self.nodes) + 1)
+        while nodeid in self.nodes:
+            nodeid = str(int(nodeid) + 1)
+        self.nodes[nodeid] = values
+        return nodeid
+
+    def filter(self, search_matches, filterspec):
+        return [
+            nodeid
+            for nodeid, node in self.nodes.items()
+            if all(node.get(name) == value for name, value in filterspec.items())
+        ]
+
+    def list(self):
+        return sorted(self.nodes, key=int)
+
+    def getnode(self, nodeid):
+        return SimpleNamespace(id=nodeid, **self.nodes[nodeid])
+
+    def destroy(self, nodeid):
+        del self.nodes[nodeid]
+
+
+class FakeDatabase:
+    """Users, one issue with its nosy list, messages and the queue."""
+
+    def __init__(self, window="300"):
+        self.config = Mock(
+            MESSAGES_TO_AUTHOR="no",
+            TRACKER_NAME="PMS",
+            detectors={
+                "NOSYREACTION_COALESCE_WINDOW": window,
+                "NOSYREACTION_DIGEST_HOUR": "7",
+            },
+        )
+        self.user = FakeClass(
+            {"nosy_digest": hyperdb.Boolean()},
+            {
+                "1": {"username": "admin", "address": "admin@example.com"},
+                "2": {"username": "anonymous", "address": "anon@example.com"},
+                "3": {"username": "alice", "realname": "Alice", "address": "alice@example.com"},
+                "4": {"username": "bob", "address": "bob@example.com"},
+                "5": {"username": "carol", "address": "carol@example.com", "nosy_digest": True},
+            },
+        )
+        self.issue = FakeClass(
+            {},
+            {"1": {"title": "Disk full", "nosy": ["2", "3", "4", "5"]}},
+        )
+        self.issue.email_signature = Mock(return_value="-- \nPMS")
+        self.msg = FakeClass(
+            {},
+            {
+                "1": {"author": "3", "recipients": [], "content": "First"},
+                "2": {"author": "3", "recipients": [], "content": "Second"},
+            },
+        )
+        self.nosyqueue = FakeClass({})
+        self.security = Mock()
+        self.security.hasPermission.return_value = True
+        self.clearCache = Mock()
+
+    def getclass(self, classname):
+        return getattr(self, classname)
+
+
+@pytest.fixture
+def db():
+    return FakeDatabase()
+
+
+class TestNextDigestTime:
+    """Test the daily digest scheduling."""
+
+    def test_digest_later_today(self):
+        """Before the digest hour, the digest is due today."""
+        now = datetime.datetime(2025, 3, 10, 5, 30)
+        assert next_digest_time(now, 7) == datetime.datetime(2025, 3, 10, 7, 0)
+
+    def test_digest_tomorrow(self):
+        """After the digest hour, the digest is due tomorrow."""
+        now = datetime.datetime(2025, 3, 10, 7, 0, 1)
+        assert next_digest_time(now, 7) == datetime.datetime(2025, 3, 11, 7, 0)
+
+    def test_digest_at_exact_hour_rolls_over(self):
+        """At exactly the digest hour, the next digest is tomorrow."""
+        now = datetime.datetime(2025, 12, 31, 7, 0)
+        assert next_digest_time(now, 7) == datetime.datetime(2026, 1, 1, 7, 0)
+
+
+class TestGetSettings:
+    """Test reading [nosyreaction] options from detectors/config.ini."""
+
+    def _mock_db(self, values):
+        db = Mock()
+        db.config.detectors = values
+        return db
+
+    def test_configured_values(self):
+        """Configured values are parsed as integers."""
+        db = self._mock_db(
+            {"NOSYREACTION_COALESCE_WINDOW": "120", "NOSYREACTION_DIGEST_HOUR": "18"}
+        )
+        assert get_settings(db) == (120, 18)
+
+    @pytest.mark.parametrize("window", ["-5", "soon"])
+    def test_invalid_window_falls_back_to_default(self, window):
+        """Invalid values disable coalescing instead of breaking nosyreaction."""
+        db = self._mock_db(
+            {"NOSYREACTION_COALESCE_WINDOW": window, "NOSYREACTION_DIGEST_HOUR": "7"}
+        )
+        assert get_settings(db) == (0, 7)
+
+
+class TestPendingRecipients:
+    """Test choosing who is notified of a new message."""
+
+    def test_nosy_users_except_author_anonymous_and_seen(self, db):
+        """Like nosymessage: no anonymous, no author by default, no repeat."""
+        db.msg.nodes["1"]["recipients"] = ["4"]
+        assert nosy_queue.pending_recipients(db, db.issue, "1", "1", {}) == ["5"]
+
+    def test_author_and_permissions(self, db):
+        """The author is first with messages_to_author; users who may not view are skipped."""
+        db.config.MESSAGES_TO_AUTHOR = "yes"
+        db.security.hasPermission.side_effect = lambda perm, userid, *args: userid != "4"
+        assert nosy_queue.pending_recipients(db, db.issue, "1", "1", {}) == ["3", "5"]
+
+
+class TestEnqueue:
+    """Test queueing notifications instead of sending them."""
+
+    def test_messages_are_coalesced_per_user_and_issue(self, db):
+        """Two messages become one entry per user; queued users become recipients."""
+        assert nosy_queue.enqueue(db, db.issue, "1", "1", {}, now=NOW)
+        assert nosy_queue.enqueue(db, db.issue, "1", "2", {}, now=NOW)
+
+        entries = {entry["user"]: entry for entry in db.nosyqueue.nodes.values()}
+        assert sorted(entries) == ["4", "5"]
+        assert entries["4"]["messages"] == ["1", "2"]
+        assert not entries["4"]["digest"]
+        assert entries["4"]["due"] == date.Date("2025-03-10.05:35:00")
+        assert entries["5"]["digest"]
+        assert entries["5"]["due"] == date.Date("2025-03-10.07:00:00")
+        assert db.msg.get("2", "recipients") == ["4", "5"]
+
+    def test_nothing_queued_without_window_or_digest(self, db):
+        """Without a window and digest users nosymessage sends as usual."""
+        db.config.detectors["NOSYREACTION_COALESCE_WINDOW"] = "0"
+        db.user.nodes["5"]["nosy_digest"] = False
+        assert not nosy_queue.enqueue(db, db.issue, "1", "1", {}, now=NOW)
+        assert db.nosyqueue.nodes == {}
+
+    def test_only_digest_users_are_queued_without_window(self, db):
+        """Other users are left to nosymessage."""
+        db.config.detectors["NOSYREACTION_COALESCE_WINDOW"] = "0"
+        assert not nosy_queue.enqueue(db, db.issue, "1", "1", {}, now=NOW)
+        assert [entry["user"] for entry in db.nosyqueue.nodes.values()] == ["5"]
+        assert db.msg.get("1", "recipients") == ["5"]
+
+
+@pytest.fixture
+def tracker_db(tracker_db):
+    """The scratch tracker with a 5 minute window and users alice, bob and carol.
+
+    Carol reads digests; authors are not sent their own messages.
+    """
+    detector_settings.get(tracker_db).coalesce_window = 300
+    tracker_db.config.MESSAGES_TO_AUTHOR = "no"
+    tracker_db.user.create(
+        username="alice", realname="Alice", address="alice@example.com", roles="User"
+    )
+    tracker_db.user.create(username="bob", address="bob@example.com", roles="User")
+    tracker_db.user.create(
+        username="carol", address="carol@example.com", nosy_digest=True, roles="User"
+    )
+    tracker_db.commit()
+    return tracker_db
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """The emails of nosy_queue, parsed; sends to bob@example.com fail."""
+    sent = []
+
+    def smtp_send(mailer, to, message, sender=None):
+        if to == ["bob@example.com"]:
+            raise MessageSendError("mailbox full")
+        sent.append(email.message_from_string(message))
+
+    monkeypatch.setattr(Mailer, "smtp_send", smtp_send)
+    return sent
+
+
+def later(**delta):
+    return nosy_queue._utcnow() + datetime.timedelta(**delta)
+
+
+class TestFlush:
+    """Test sending the due queued notifications."""
+
+    def comment(self, db, issueid, content, author="alice", **values):
+        msgid = db.msg.create(content=content, author=db.user.lookup(author), **values)
+        db.issue.set(issueid, messages=db.issue.get(issueid, "messages") + [msgid])
+        db.commit()
+        return msgid
+
+    def test_one_email_per_user_and_issue(self, tracker_db, sent):
+        """Due entries are sent once with all their messages and destroyed."""
+        db = tracker_db
+        db.user.set(db.user.lookup("bob"), address="bill@example.com")
+        issueid = db.issue.create(title="Disk full", nosy=["3", "4", "5"])
+        self.comment(db, issueid, "First")
+        self.comment(db, issueid, "Second")
+
+        assert nosy_queue.flush(db, now=later(minutes=4)) == 0
+        assert nosy_queue.flush(db, now=later(minutes=5)) == 1
+        [mail] = sent
+        assert (mail["To"], mail["Subject"]) == ("bill@example.com", "[issue1] Disk full")
+        assert "First" in mail.get_payload() and "Second" in mail.get_payload()
+        assert [db.nosyqueue.get(i, "user") for i in db.nosyqueue.list()] == ["5"]
+
+        assert nosy_queue.flush(db, now=later(days=1)) == 1
+        assert "Daily digest: 2 new message(s) on 1 issue(s)" in sent[1]["Subject"]
+        assert db.nosyqueue.list() == []
+
+    def test_emails_are_built_like_nosy_messages(self, tracker_db, sent):
+        """The tracker sends and gets the replies, which answer the last message."""
+        db = tracker_db
+        issueid = db.issue.create(title="Disk full", nosy=["4", "5"], priority="1")
+        self.comment(db, issueid, "First", messageid="<first@example.com>")
+        fileid = db.file.create(name="df.txt", type="text/plain", content="/ 100%")
+        lastid = self.comment(db, issueid, "Second", files=[fileid])
+        db.issue.create(
+            title="Printer jam",
+            nosy=["5"],
+            messages=[db.msg.create(content="Out of paper", author="4")],
+        )
+        db.user.set("4", address="bill@example.com")
+        db.commit()
+
+        nosy_queue.flush(db, now=later(days=1))
+        db.commit()
+        single, digest = sorted(sent, key=lambda mail: mail["To"])
+
+        tracker = "Roundup issue tracker <issue_tracker@localhost>"
+        assert single["From"] == "Alice <issue_tracker@localhost>"
+        assert single["Reply-To"] == tracker
+        assert single["In-Reply-To"] is not None
+        assert single["In-Reply-To"] == db.msg.get(lastid, "messageid")
+        assert single["Message-Id"] not in (None, single["In-Reply-To"])
+        assert single["X-Roundup-issue-Id"] == issueid
+        assert single["X-Roundup-issue-priority"] == db.priority.get("1", "name")
+        body, attachment = single.get_payload()
+        assert "Second" in body.get_payload() and "issue_tracker@localhost" in body.get_payload()
+        assert attachment.get_filename() == "df.txt"
+        assert attachment.get_payload() == "/ 100%"
+
+        assert (digest["From"], digest["Reply-To"]) == (tracker, tracker)
+        assert digest["In-Reply-To"] is None
+        assert "Out of paper" in digest.get_payload()[0].get_payload()
+
+    def test_failed_sends_are_kept(self, tracker_db, sent):
+        """An entry whose email fails stays queued for the next run."""
+        db = tracker_db
+        issueid = db.issue.create(title="Disk full", nosy=["3", "4"])
+        self.comment(db, issueid, "First", author="admin")
+
+        assert nosy_queue.flush(db, now=later(hours=1)) == 1
+        assert [db.nosyqueue.get(i, "user") for i in db.nosyqueue.list()] == ["4"]
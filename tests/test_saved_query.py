@@ -0,0 +1,116 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Tests for materialized saved queries, on a scratch tracker."""
+
+import pytest
+import saved_query
+from roundup.exceptions import Reject
+
+
+@pytest.fixture
+def db(tracker_db):
+    for title in ("Disk full", "Disk slow", "Printer jam"):
+        tracker_db.issue.create(title=title)
+    tracker_db.issue.set("2", status="2")
+    tracker_db.commit()
+    return tracker_db
+
+
+def save_query(db, url, materialized=True):
+    queryid = db.query.create(name=url, klass="issue", url=url, materialized=materialized)
+    db.commit()
+    return queryid
+
+
+class TestParse:
+    """Test turning query URLs into filterspecs."""
+
+    def test_filterspec_as_built_by_the_web_interface(self, db):
+        """Only @filter properties are used; link names are looked up."""
+        url = "@columns=title&:filter=status,title,id&status=new,2&title=disk&id=1,3&@sort=-id"
+        assert saved_query.parse(db, "issue", url) == {
+            "status": ["1", "2"],
+            "title": "disk",
+            "id": ["1", "3"],
+        }
+        assert saved_query.parse(db, "issue", "@filter=activity&activity=2025-01-01;") == {
+            "activity": "2025-01-01;"
+        }
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "@search_text=disk",
+            "@filter=status.name&status.name=new",
+            "@filter=assignedto&assignedto=@current_user",
+            "@filter=activity&activity=-1w;",
+            "@filter=activity&activity=2025-01-01;.",
+            "@filter=color&color=red",
+        ],
+    )
+    def test_queries_that_cannot_be_materialized(self, db, url):
+        """Filters that do not only depend on the item itself are refused."""
+        with pytest.raises(ValueError, match="materialized|unknown"):
+            saved_query.parse(db, "issue", url)
+
+    def test_only_item_classes_are_materialized(self, db):
+        """Queries of other classes are refused, and their searches are not wrapped."""
+        with pytest.raises(ValueError, match="queries of status cannot be materialized"):
+            saved_query.parse(db, "status", "@filter=name&name=new")
+        with pytest.raises(Reject):
+            db.query.create(
+                name="s", klass="status", url="@filter=name&name=new", materialized=True
+            )
+        assert db.status.filter.__self__ is db.status
+
+
+class TestMatches:
+    """Test keeping the matching IDs up to date through the detectors."""
+
+    def test_saves_update_the_matches(self, db):
+        """Creating, changing and retiring items adds and removes them."""
+        queryid = save_query(db, "@filter=status&status=new")
+        other = save_query(db, "@filter=title&title=disk", materialized=False)
+        assert sorted(saved_query.matches(db, queryid)) == ["1", "3"]
+        assert saved_query.matches(db, other) is None
+
+        db.issue.set("1", status="2")
+        db.issue.create(title="Disk new")
+        db.commit()
+        assert sorted(saved_query.matches(db, queryid)) == ["3", "4"]
+
+        db.issue.retire("3")
+        db.commit()
+        assert saved_query.count(db, queryid) == 1
+        assert saved_query.count(db, other) is None
+
+    def test_index_pages_list_the_stored_ids(self, db):
+        """A search with the filterspec of a materialized query only sorts its matches."""
+        queryid = save_query(db, "@filter=status&status=new")
+        db.sql(f"delete from {saved_query.MATCHES_TABLE} where _itemid = '3'")
+
+        assert db.issue.filter(None, {"status": ["1"]}, [("-", "activity")]) == ["1"]
+        assert sorted(db.issue.filter(None, {"status": ["2"]})) == ["2"]
+        assert saved_query.count(db, queryid) == 1
+
+    def test_queries_are_read_once_per_transaction(self, db, monkeypatch):
+        """Searches and saves reuse the parsed queries until a query changes or commits."""
+        save_query(db, "@filter=status&status=new")
+        reads = []
+        inner = db.query.filter
+        monkeypatch.setattr(db.query, "filter", lambda *args: reads.append(args) or inner(*args))
+
+        db.issue.filter(None, {"status": ["1"]})
+        db.issue.create(title="Fan noise")
+        assert len(reads) == 1
+
+        other = db.query.create(name="jam", klass="issue", url="@filter=title&title=jam")
+        db.query.set(other, materialized=True)
+        db.issue.create(title="Paper jam")
+        assert len(reads) == 2
+        assert sorted(saved_query.matches(db, other)) == ["3", "5"]
+
+        db.commit()
+        db.issue.filter(None, {"status": ["1"]})
+        assert len(reads) == 3
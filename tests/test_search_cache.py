@@ -0,0 +1,112 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Tests for the search result cache, on a scratch tracker."""
+
+import detector_settings
+import pytest
+import search_cache
+
+
+@pytest.fixture
+def db(tracker_db):
+    search_cache.clear()
+    for title in ("Disk full", "Disk slow", "Printer jam"):
+        tracker_db.issue.create(title=title)
+    tracker_db.commit()
+    return tracker_db
+
+
+def lookups():
+    return search_cache.counters["hits"], search_cache.counters["misses"]
+
+
+class TestFilter:
+    """Test caching Class.filter() results."""
+
+    def test_repeated_search_is_served_from_memory(self, db):
+        """Identical searches, whatever their argument order, hit the cache."""
+        first = db.issue.filter(None, {"title": "disk", "id": ["1", "2"]}, [("-", "activity")])
+        first.append("mutated by the caller")
+        again = db.issue.filter(None, {"id": ["1", "2"], "title": "disk"}, [("-", "activity")])
+
+        assert sorted(again) == ["1", "2"]
+        assert lookups() == (1, 1)
+        db.issue.filter(None, {"title": "disk"}, [("+", "activity")])
+        assert lookups() == (1, 2)
+
+    def test_changes_of_read_classes_invalidate(self, db):
+        """A committed change of the class or of a filtered link class is a new generation."""
+        db.issue.filter(None, {"status": "1"})
+
+        db.user.create(username="carol")
+        db.commit()
+        db.issue.filter(None, {"status": "1"})
+        assert lookups() == (1, 1)
+
+        db.status.set("1", order="9")
+        db.commit()
+        db.issue.filter(None, {"status": "1"})
+        db.issue.create(title="New", status="1")
+        db.commit()
+        assert len(db.issue.filter(None, {"status": "1"})) == 4
+        assert lookups() == (1, 3)
+
+    def test_uncommitted_changes_are_not_cached(self, db):
+        """Results computed inside a transaction that changed data bypass the cache."""
+        db.issue.create(title="Disk gone")
+        assert len(db.issue.filter(None, {"title": "disk"})) == 3
+        assert len(db.issue.filter(None, {"title": "disk"})) == 3
+        assert lookups() == (0, 0)
+
+    @pytest.mark.parametrize("end", ["commit", "rollback"])
+    def test_cache_is_used_again_after_the_transaction(self, db, end):
+        """The next transaction of the same database uses the cache again."""
+        db.issue.create(title="Disk gone")
+        getattr(db, end)()
+        db.issue.filter(None, {})
+        db.issue.filter(None, {})
+        assert lookups() == (1, 1)
+
+    @pytest.mark.parametrize("filterspec", [{"activity": "-1d;"}, {"messages.date": "-2h;"}])
+    def test_relative_dates_are_not_cached(self, db, filterspec):
+        """Searches relative to now find other items as time passes."""
+        db.issue.filter(None, filterspec)
+        db.issue.filter(None, filterspec)
+        assert lookups() == (0, 0)
+
+    def test_absolute_dates_are_cached(self, db):
+        """Fixed date ranges are cached like other searches."""
+        db.issue.filter(None, {"activity": "2025-06-01;2025-06-30.23:59"})
+        db.issue.filter(None, {"activity": "2025-06-01;2025-06-30.23:59"})
+        assert lookups() == (1, 1)
+
+    def test_least_recently_used_are_evicted(self, db):
+        """The cache keeps search_cache_size entries, dropping the least recently used."""
+        detector_settings.get(db).search_cache_size = 2
+        for title in ("a", "b", "a", "c", "a", "b"):
+            db.issue.filter(None, {"title": title})
+        assert lookups() == (2, 4)
+
+    def test_disabled(self, db):
+        """A size of 0 disables the cache."""
+        detector_settings.get(db).search_cache_size = 0
+        db.issue.filter(None, {})
+        db.issue.filter(None, {})
+        assert lookups() == (0, 0)
+
+
+def test_text_search_depends_on_linked_classes(db):
+    """Text search results are cached until the class or a linked class changes."""
+    msgid = db.msg.create(content="Disk full on web01", author="1")
+    db.issue.set("1", messages=[msgid])
+    db.commit()
+
+    assert set(db.indexer.search(["disk"], db.issue)) == {"1", "2"}
+    db.indexer.search(["disk"], db.issue)
+    assert lookups() == (1, 1)
+
+    db.msg.create(content="Disk replaced", author="1")
+    db.commit()
+    db.indexer.search(["disk"], db.issue)
+    assert lookups() == (1, 2)
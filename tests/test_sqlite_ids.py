@@ -0,0 +1,69 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for sqlite ID allocation without commits."""
+
+import sqlite3
+from unittest.mock import Mock
+
+import sqlite_ids
+
+
+class FakeSqliteDatabase:
+    """Just enough of Roundup's sqlite backend for ID allocation."""
+
+    arg = "?"
+    dbtype = "sqlite"
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.cursor = self.conn.cursor()
+        self.cursor.execute("create table ids (name varchar, num integer)")
+        self.cursor.execute("insert into ids values ('issue', 1)")
+        self.conn.commit()
+
+    def sql(self, sql, args=()):
+        self.cursor.execute(sql, args)
+
+    def newid(self, classname):
+        raise AssertionError("the backend would commit here")
+
+
+class TestNewid:
+    """Test ID allocation inside a transaction."""
+
+    def test_ids_are_allocated_without_commit(self, tmp_path):
+        """IDs stay uncommitted until the transaction commits or rolls back."""
+        db = FakeSqliteDatabase(str(tmp_path / "db"))
+
+        assert sqlite_ids.newid(db, "issue") == "1"
+        assert sqlite_ids.newid(db, "issue") == "2"
+        assert db.conn.in_transaction
+
+        other = sqlite3.connect(str(tmp_path / "db"))
+        assert other.execute("select num from ids").fetchone() == (1,)
+
+        db.conn.rollback()
+        assert sqlite_ids.newid(db, "issue") == "1"
+
+
+class TestInstall:
+    """Test replacing the backend's ID allocation."""
+
+    def test_install_and_uninstall(self, tmp_path):
+        """The backend's newid() is back after uninstall()."""
+        db = FakeSqliteDatabase(str(tmp_path / "db"))
+
+        sqlite_ids.install(db)
+        assert db.newid("issue") == "1"
+
+        sqlite_ids.uninstall(db)
+        assert db.newid.__func__ is FakeSqliteDatabase.newid
+
+    def test_other_backends_are_left_alone(self):
+        """Only sqlite commits on ID allocation."""
+        db = Mock(dbtype="postgresql")
+        newid = db.newid
+
+        sqlite_ids.install(db)
+        assert db.newid is newid
@@ -0,0 +1,135 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""Unit tests for the Message-ID thread index."""
+
+from unittest.mock import Mock
+
+import pytest
+import thread_index
+
+
+class FakeClass:
+    """In-memory stand-in for a Roundup class."""
+
+    def __init__(self, nodes, key=None):
+        self.nodes = {nodeid: dict(node) for nodeid, node in nodes.items()}
+        self.key = key
+
+    def lookup(self, value):
+        for nodeid, node in self.nodes.items():
+            if node[self.key] == value:
+                return nodeid
+        raise KeyError(value)
+
+    def get(self, nodeid, prop):
+        return self.nodes[nodeid].get(prop)
+
+    def set(self, nodeid, **values):
+        self.nodes[nodeid].update(values)
+
+    def find(self, messages):
+        return [nodeid for nodeid, node in self.nodes.items() if messages in node["messages"]]
+
+    def create(self, **values):
+        nodeid = str(max(map(int, self.nodes), default=0) + 1)
+        self.nodes[nodeid] = values
+        return nodeid
+
+    def destroy(self, nodeid):
+        del self.nodes[nodeid]
+
+    def indexed(self):
+        return sorted(
+            (node["messageid"], node["msg"], node.get("item")) for node in self.nodes.values()
+        )
+
+
+@pytest.fixture
+def db():
+    db = Mock()
+    db.msg = FakeClass(
+        {
+            "1": {"messageid": "<Alert-1@Monitor>"},
+            "2": {"messageid": "<reply-2@example.com>"},
+            "3": {"messageid": None},
+        }
+    )
+    db.msgref = FakeClass({}, key="messageid")
+    classes = {
+        "issue": FakeClass({"7": {"messages": ["1"]}}),
+        "change": FakeClass({}),
+    }
+    db.getclass.side_effect = classes.__getitem__
+    return db
+
+
+class TestIndex:
+    """Test lookups and index maintenance."""
+
+    def test_lookup_is_case_insensitive(self, db):
+        """Message-IDs are found whatever their case and surrounding space."""
+        thread_index.add_message(db, "1", "issue7")
+
+        assert thread_index.lookup(db, " <alert-1@monitor>") == ("1", "issue7")
+        assert thread_index.lookup(db, "<unknown@example.com>") is None
+
+    def test_messages_without_or_with_known_ids(self, db):
+        """Messages without a Message-ID or with an indexed one are skipped."""
+        db.msg.nodes["4"] = {"messageid": "<ALERT-1@monitor>"}
+        for msgid in ("1", "3", "4"):
+            thread_index.add_message(db, msgid)
+
+        assert db.msgref.indexed() == [("<alert-1@monitor>", "1", None)]
+
+    def test_threads_follow_items(self, db):
+        """A message held by one item is routed to it, by none or several to neither."""
+        thread_index.add_message(db, "1")
+        thread_index.update_threads(db, ["1"])
+        assert thread_index.lookup(db, "<alert-1@monitor>") == ("1", "issue7")
+
+        db.getclass("change").nodes["2"] = {"messages": ["1"]}
+        thread_index.update_threads(db, ["1"])
+        assert thread_index.lookup(db, "<alert-1@monitor>") == ("1", None)
+
+    def test_remove_only_the_indexed_message(self, db):
+        """Removing a duplicate Message-ID keeps the entry of the indexed message."""
+        thread_index.add_message(db, "1")
+        thread_index.remove_message(db, "4", "<alert-1@monitor>")
+        assert thread_index.lookup(db, "<alert-1@monitor>") == ("1", None)
+
+        thread_index.remove_message(db, "1", "<Alert-1@Monitor>")
+        assert db.msgref.indexed() == []
+
+    def test_string_find(self, db):
+        """Message-ID searches are answered from the index, others by the class."""
+        db.msg.__class__ = type("FakeMsgClass", (FakeClass,), {"stringFind": Mock()})
+        thread_index.add_message(db, "2")
+
+        assert thread_index.string_find(db, messageid="<REPLY-2@example.com>") == ["2"]
+        thread_index.string_find(db, summary="disk full")
+        db.msg.__class__.stringFind.assert_called_once_with(db.msg, summary="disk full")
+
+    def test_string_find_indexes_what_the_class_finds(self, db):
+        """Messages missing from the index are searched by the class and indexed."""
+        db.msg.__class__ = type("FakeMsgClass", (FakeClass,), {"stringFind": Mock()})
+        db.msg.__class__.stringFind.side_effect = [["1"], []]
+
+        assert thread_index.string_find(db, messageid="<Alert-1@Monitor>") == ["1"]
+        assert thread_index.string_find(db, messageid="<other@example.com>") == []
+        assert thread_index.string_find(db, messageid="<alert-1@monitor>") == ["1"]
+        assert db.msgref.indexed() == [("<alert-1@monitor>", "1", "issue7")]
+        assert db.msg.__class__.stringFind.call_count == 2
+
+
+def test_messages_stored_before_the_index(tracker_db):
+    """Roundup's own parent lookup finds and indexes messages missing from the index."""
+    db = tracker_db
+    msgid = db.msg.create(content="Disk full", author="1", messageid="<old@example.com>")
+    issueid = db.issue.create(title="Disk full", messages=[msgid])
+    for entryid in db.msgref.list():
+        db.msgref.destroy(entryid)
+    db.commit()
+
+    assert db.msg.stringFind(messageid="<old@example.com>") == [msgid]
+    assert thread_index.lookup(db, "<old@example.com>") == (msgid, f"issue{issueid}")
@@ -0,0 +1,372 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+In-process SMTP sink and mailboxes for email testing without a container.
+
+LocalMailServer accepts mail over SMTP on localhost (stdlib asyncio, no extra
+dependency) and stores every message in the mailbox of each recipient. Its
+mailbox methods mirror GreenMailClient, so BDD steps written for GreenMail
+work unchanged, but delivery is event-driven: ``wait_for_message`` wakes up
+when a message is delivered instead of polling IMAP, and listeners are
+called for every delivered message.
+
+Example:
+    with LocalMailServer() as server:
+        server.send_email("alice@localhost", "bob@localhost", "Hello", "Hi Bob")
+        message = server.wait_for_message(user="bob@localhost")
+"""
+
+import asyncio
+import email
+import smtplib
+import threading
+import time
+from email.message import EmailMessage, Message
+from typing import Callable, Optional, Union
+
+
+# Listener signature: (mail_from, recipients, message)
+Listener = Callable[[str, list, Message], None]
+
+
+def _address(argument: str) -> str:
+    """Extract the address from a MAIL FROM:<...> or RCPT TO:<...> argument."""
+    _, _, value = argument.partition(":")
+    value = value.strip()
+    if value.startswith("<"):
+        value = value[1 : value.find(">")]
+    return value.split(" ", 1)[0]
+
+
+class LocalMailServer:
+    """
+    SMTP sink with in-memory mailboxes, running in a background thread.
+
+    Mailboxes are keyed by lower-cased recipient address. Passwords and
+    mailbox names are accepted for compatibility with GreenMailClient and
+    ignored. Authentication, if attempted, always succeeds.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 0):
+        """
+        Initialize the server (call ``start()`` or use it as a context manager).
+
+        Args:
+            host: Interface to listen on (default: localhost)
+            port: SMTP port (default: 0, any free port; see ``port`` after start)
+        """
+        self.host = host
+        self.port = port
+        self.delivered = 0
+        self._mailboxes: dict[str, list[Message]] = {}
+        self._listeners: list[Listener] = []
+        self._condition = threading.Condition()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> bool:
+        """
+        Start listening for SMTP connections.
+
+        Returns:
+            True once the server accepts connections
+        """
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port)
+            )
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+            try:
+                self._loop.run_forever()
+            finally:
+                server.close()
+                tasks = asyncio.all_tasks(self._loop)
+                for task in tasks:
+                    task.cancel()
+                self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="local-smtp", daemon=True)
+        self._thread.start()
+        return ready.wait(timeout=10)
+
+    def stop(self) -> bool:
+        """
+        Stop the server.
+
+        Returns:
+            True if stopped successfully
+        """
+        if self._thread is None:
+            return True
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        self._thread = None
+        return True
+
+    def is_running(self) -> bool:
+        """Check if the server thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def __enter__(self) -> "LocalMailServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def add_listener(self, listener: Listener) -> None:
+        """
+        Call ``listener(mail_from, recipients, message)`` for every delivered message.
+
+        Listeners run in a worker thread before the SMTP client gets its
+        reply, so a listener that hands the message to the mail gateway
+        behaves like an MTA delivering to a pipe. They may send mail through
+        this server.
+        """
+        self._listeners.append(listener)
+
+    # ------------------------------------------------------------------
+    # SMTP protocol
+    # ------------------------------------------------------------------
+
+    async def _handle_client(self, reader, writer):
+        """Serve one SMTP connection."""
+
+        async def reply(*lines):
+            writer.write("".join(f"{line}\r\n" for line in lines).encode("ascii"))
+            await writer.drain()
+
+        mail_from, recipients = "", []
+        await reply(f"220 {self.host} PMS local SMTP sink")
+        try:
+            while line := await reader.readline():
+                command, _, argument = line.decode("utf-8", "replace").strip().partition(" ")
+                command = command.upper()
+                if command == "EHLO":
+                    await reply(f"250-{self.host}", "250-8BITMIME", "250-AUTH PLAIN", "250 HELP")
+                elif command == "HELO":
+                    await reply(f"250 {self.host}")
+                elif command == "AUTH":
+                    if len(argument.split()) == 1:
+                        await reply("334 ")
+                        await reader.readline()
+                    await reply("235 Authentication successful")
+                elif command == "MAIL":
+                    mail_from, recipients = _address(argument), []
+                    await reply("250 OK")
+                elif command == "RCPT":
+                    recipients.append(_address(argument))
+                    await reply("250 OK")
+                elif command == "DATA":
+                    if not recipients:
+                        await reply("503 Need RCPT first")
+                        continue
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = await self._read_data(reader)
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, self._deliver, mail_from, recipients, data
+                    )
+                    mail_from, recipients = "", []
+                    await reply("250 OK")
+                elif command == "RSET":
+                    mail_from, recipients = "", []
+                    await reply("250 OK")
+                elif command == "NOOP":
+                    await reply("250 OK")
+                elif command == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_data(reader) -> bytes:
+        """Read a DATA section, undoing dot-stuffing."""
+        lines = []
+        while line := await reader.readline():
+            if line in (b".\r\n", b".\n"):
+                break
+            if line.startswith(b"."):
+                line = line[1:]
+            lines.append(line)
+        return b"".join(lines)
+
+    def _deliver(self, mail_from: str, recipients: list, data: bytes) -> None:
+        """Store a message in the recipients' mailboxes and notify waiters."""
+        message = email.message_from_bytes(data)
+        with self._condition:
+            for recipient in recipients:
+                self._mailboxes.setdefault(recipient.lower(), []).append(message)
+            self.delivered += 1
+            self._condition.notify_all()
+        for listener in self._listeners:
+            listener(mail_from, recipients, message)
+
+    # ------------------------------------------------------------------
+    # GreenMailClient-compatible API
+    # ------------------------------------------------------------------
+
+    def send_email(
+        self,
+        from_addr: str,
+        to_addr: str,
+        subject: str,
+        body: str,
+        html: Optional[str] = None,
+    ) -> None:
+        """
+        Send an email via SMTP.
+
+        Args:
+            from_addr: Sender email address
+            to_addr: Recipient email address
+            subject: Email subject
+            body: Email body (plain text)
+            html: Optional HTML body
+
+        Raises:
+            smtplib.SMTPException: If sending fails
+        """
+        msg = EmailMessage()
+        msg["From"] = from_addr
+        msg["To"] = to_addr
+        msg["Subject"] = subject
+        msg.set_content(body)
+
+        if html:
+            msg.add_alternative(html, subtype="html")
+
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            smtp.send_message(msg)
+
+    def send_raw_email(self, raw_message: Union[str, bytes]) -> None:
+        """
+        Send a raw email message via SMTP.
+
+        Args:
+            raw_message: Raw email message (RFC 2822 format)
+
+        Raises:
+            smtplib.SMTPException: If sending fails
+        """
+        if isinstance(raw_message, bytes):
+            msg = email.message_from_bytes(raw_message)
+        else:
+            msg = email.message_from_string(raw_message)
+        from_addr = msg.get("From", "")
+        to_addr = msg.get("To", "")
+
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            smtp.sendmail(from_addr, [to_addr], raw_message)
+
+    def get_received_messages(
+        self, mailbox: str = "INBOX", user: str = "test@localhost", password: str = "test"
+    ) -> list[Message]:
+        """
+        Return all messages delivered to a user.
+
+        Args:
+            mailbox: Ignored (there is one mailbox per user)
+            user: Recipient email address
+            password: Ignored
+
+        Returns:
+            List of messages, oldest first
+        """
+        with self._condition:
+            return list(self._mailboxes.get(user.lower(), []))
+
+    def get_message_count(
+        self, mailbox: str = "INBOX", user: str = "test@localhost", password: str = "test"
+    ) -> int:
+        """
+        Get the number of messages delivered to a user.
+
+        Args:
+            mailbox: Ignored (there is one mailbox per user)
+            user: Recipient email address
+            password: Ignored
+
+        Returns:
+            Number of messages in the mailbox
+        """
+        with self._condition:
+            return len(self._mailboxes.get(user.lower(), []))
+
+    def clear_mailbox(
+        self, mailbox: str = "INBOX", user: str = "test@localhost", password: str = "test"
+    ) -> int:
+        """
+        Delete all messages delivered to a user.
+
+        Args:
+            mailbox: Ignored (there is one mailbox per user)
+            user: Recipient email address
+            password: Ignored
+
+        Returns:
+            Number of messages deleted
+        """
+        with self._condition:
+            return len(self._mailboxes.pop(user.lower(), []))
+
+    def clear_all(self) -> int:
+        """
+        Delete the messages of every mailbox.
+
+        Returns:
+            Number of messages deleted
+        """
+        with self._condition:
+            deleted = sum(len(messages) for messages in self._mailboxes.values())
+            self._mailboxes.clear()
+            return deleted
+
+    def wait_for_message(
+        self,
+        timeout: int = 10,
+        mailbox: str = "INBOX",
+        user: str = "test@localhost",
+        password: str = "test",
+        match: Optional[Callable[[Message], bool]] = None,
+    ) -> Optional[Message]:
+        """
+        Wait for a message to arrive in a user's mailbox.
+
+        Returns as soon as a matching message is delivered (no polling).
+
+        Args:
+            timeout: Maximum time to wait in seconds (default: 10)
+            mailbox: Ignored (there is one mailbox per user)
+            user: Recipient email address
+            password: Ignored
+            match: Optional predicate the message must satisfy
+
+        Returns:
+            First matching message if received, None if timeout
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                for message in self._mailboxes.get(user.lower(), []):
+                    if match is None or match(message):
+                        return message
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
@@ -0,0 +1,16 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Blob store detector for deduplicating msg and file content.
+
+Identical message bodies and attachments are stored once on disk and shared
+through hard links; see lib/blob_store.py.
+"""
+
+import blob_store
+
+
+def init(db):
+    """Route msg and file content through the blob store."""
+    blob_store.install(db)
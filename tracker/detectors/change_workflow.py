@@ -13,11 +13,13 @@ This detector implements ITIL-inspired change management workflow rules:
 Invalid transitions (e.g., planning → completed) are rejected.
 """
 
-import logging
+import functools
 
+import detector_log
+import workflow
 from roundup.exceptions import Reject
 
-logger = logging.getLogger(__name__)
+logger = detector_log.get_logger("detectors.change_workflow")
 
 
 def check_change_status_transition(db, cl, nodeid, newvalues):
@@ -49,57 +51,37 @@ def check_change_status_transition(db, cl, nodeid, newvalues):
     if current_status_id == new_status_id:
         return
 
-    # Look up status IDs by name (robust approach - survives database reinitializations)
+    # The rules live in lib/workflow.py and use status names (robust
+    # approach - survives database reinitializations)
     status_class = db.getclass("changestatus")
-    planning_id = status_class.lookup("planning")
-    approved_id = status_class.lookup("approved")
-    implementing_id = status_class.lookup("implementing")
-    completed_id = status_class.lookup("completed")
-    cancelled_id = status_class.lookup("cancelled")
-
-    # Define valid transitions using looked-up IDs
-    VALID_TRANSITIONS = {
-        planning_id: [approved_id, cancelled_id],  # planning → approved or cancelled
-        approved_id: [implementing_id, cancelled_id],  # approved → implementing or cancelled
-        implementing_id: [completed_id, cancelled_id],  # implementing → completed or cancelled
-        completed_id: [],  # completed is terminal (no transitions allowed)
-        cancelled_id: [],  # cancelled is terminal (no transitions allowed)
-    }
-
-    # Check if transition is valid
-    allowed_statuses = VALID_TRANSITIONS.get(current_status_id, [])
-
-    # Get status names for logging
-    current_status_name = status_class.get(current_status_id, "name")
-    new_status_name = status_class.get(new_status_id, "name")
+    allowed = workflow.is_allowed(db, "change", current_status_id, new_status_id)
+
+    # Status names are only looked up when a log record is emitted or the
+    # transition is rejected
+    current_status_name = functools.partial(status_class.get, current_status_id, "name")
+    new_status_name = functools.partial(status_class.get, new_status_id, "name")
 
     logger.debug(
         "Checking change status transition",
-        extra={
-            "nodeid": nodeid,
-            "current_status": current_status_name,
-            "new_status": new_status_name,
-        },
+        nodeid=nodeid,
+        current_status=current_status_name,
+        new_status=new_status_name,
     )
 
-    if new_status_id not in allowed_statuses:
+    if not allowed:
         logger.warning(
             "Invalid change status transition rejected",
-            extra={
-                "nodeid": nodeid,
-                "current_status": current_status_name,
-                "new_status": new_status_name,
-            },
+            nodeid=nodeid,
+            current_status=current_status_name,
+            new_status=new_status_name,
         )
-        raise Reject(f"Invalid status transition: {current_status_name} -> {new_status_name}")
+        raise Reject(f"Invalid status transition: {current_status_name()} -> {new_status_name()}")
 
     logger.debug(
         "Change status transition validated",
-        extra={
-            "nodeid": nodeid,
-            "current_status": current_status_name,
-            "new_status": new_status_name,
-        },
+        nodeid=nodeid,
+        current_status=current_status_name,
+        new_status=new_status_name,
     )
 
 
@@ -3,11 +3,10 @@
 
 """Configuration Item auditor for validation."""
 
-import logging
-
+import detector_log
 from roundup.exceptions import Reject
 
-logger = logging.getLogger(__name__)
+logger = detector_log.get_logger("detectors.ci_auditor")
 
 
 def audit_ci_required_fields(db, cl, nodeid, newvalues):
@@ -21,7 +20,9 @@ def audit_ci_required_fields(db, cl, nodeid, newvalues):
     action = "create" if nodeid is None else "update"
     logger.debug(
         "Auditing CI required fields",
-        extra={"nodeid": nodeid, "action": action, "fields": list(newvalues.keys())},
+        nodeid=nodeid,
+        action=action,
+        fields=lambda: sorted(newvalues),
     )
 
     # For new CIs (nodeid is None), ensure required fields are present
@@ -43,17 +44,17 @@ def audit_ci_required_fields(db, cl, nodeid, newvalues):
             logger.warning("CI creation rejected: status is required")
             raise Reject("Status is required")
 
-        logger.debug("CI creation validation passed", extra={"name": name})
+        logger.debug("CI creation validation passed", name=name)
     else:
         # For updates, only check name if it's being modified
         if "name" in newvalues:
             name = newvalues.get("name", "") or ""
             name = name.strip() if name else ""
             if not name:
-                logger.warning("CI update rejected: name is required", extra={"nodeid": nodeid})
+                logger.warning("CI update rejected: name is required", nodeid=nodeid)
                 raise Reject("Name is required")
 
-        logger.debug("CI update validation passed", extra={"nodeid": nodeid})
+        logger.debug("CI update validation passed", nodeid=nodeid)
 
 
 def init(db):
@@ -8,10 +8,10 @@ Validates CI relationships to prevent circular dependencies and ensure
 data integrity in the CMDB.
 """
 
-import logging
+import detector_log
 from roundup.exceptions import Reject
 
-logger = logging.getLogger(__name__)
+logger = detector_log.get_logger("detectors.ci_relationship_validator")
 
 
 def has_circular_dependency(db, source_ci, target_ci, visited=None):
@@ -71,22 +71,18 @@ def validate_ci_relationship(db, cl, nodeid, newvalues):
         nodeid: Node ID (None for new items)
         newvalues: Dictionary of new/changed values
     """
-    logger.info(
+    logger.debug(
         "CI relationship validator called",
-        extra={
-            "nodeid": nodeid,
-            "newvalues": newvalues,
-            "action": "create" if nodeid is None else "update",
-        },
+        nodeid=nodeid,
+        fields=lambda: sorted(newvalues),
+        action="create" if nodeid is None else "update",
     )
 
     # Only validate on create or when relationship changes
     if nodeid and not (
         "source_ci" in newvalues or "target_ci" in newvalues or "relationship_type" in newvalues
     ):
-        logger.debug(
-            "Skipping validation - no relationship field changes", extra={"nodeid": nodeid}
-        )
+        logger.debug("Skipping validation - no relationship field changes", nodeid=nodeid)
         return
 
     # Get the relationship values
@@ -106,26 +102,24 @@ def validate_ci_relationship(db, cl, nodeid, newvalues):
         raise Reject("source_ci, target_ci, and relationship_type are required fields")
 
     # Check for self-referencing relationship
-    logger.debug("Checking self-reference", extra={"source_ci": source_ci, "target_ci": target_ci})
+    logger.debug("Checking self-reference", source_ci=source_ci, target_ci=target_ci)
     if source_ci == target_ci:
         logger.warning(
             "Validation failed: self-referencing relationship",
-            extra={"source_ci": source_ci, "target_ci": target_ci, "validation": "self_reference"},
+            source_ci=source_ci,
+            target_ci=target_ci,
+            validation="self_reference",
         )
         raise Reject("A CI cannot have a relationship with itself")
 
     # Check for circular dependencies
-    logger.debug(
-        "Checking circular dependency", extra={"source_ci": source_ci, "target_ci": target_ci}
-    )
+    logger.debug("Checking circular dependency", source_ci=source_ci, target_ci=target_ci)
     if has_circular_dependency(db, source_ci, target_ci):
         logger.warning(
             "Validation failed: circular dependency detected",
-            extra={
-                "source_ci": source_ci,
-                "target_ci": target_ci,
-                "validation": "circular_dependency",
-            },
+            source_ci=source_ci,
+            target_ci=target_ci,
+            validation="circular_dependency",
         )
         raise Reject(
             "Circular dependency detected. This relationship would create a cycle "
@@ -136,11 +130,9 @@ def validate_ci_relationship(db, cl, nodeid, newvalues):
     # Check for duplicate relationships (same source, target, and type)
     logger.debug(
         "Checking for duplicate relationships",
-        extra={
-            "source_ci": source_ci,
-            "target_ci": target_ci,
-            "relationship_type": relationship_type,
-        },
+        source_ci=source_ci,
+        target_ci=target_ci,
+        relationship_type=relationship_type,
     )
     existing_rels = db.cirelationship.filter(
         None,
@@ -154,23 +146,19 @@ def validate_ci_relationship(db, cl, nodeid, newvalues):
     if existing_rels:
         logger.warning(
             "Validation failed: duplicate relationship",
-            extra={
-                "source_ci": source_ci,
-                "target_ci": target_ci,
-                "relationship_type": relationship_type,
-                "existing_rels": existing_rels,
-                "validation": "duplicate",
-            },
+            source_ci=source_ci,
+            target_ci=target_ci,
+            relationship_type=relationship_type,
+            existing_rels=existing_rels,
+            validation="duplicate",
         )
         raise Reject("A relationship with the same source, target, and type already exists")
 
     logger.info(
         "Validation passed - relationship is valid",
-        extra={
-            "source_ci": source_ci,
-            "target_ci": target_ci,
-            "relationship_type": relationship_type,
-        },
+        source_ci=source_ci,
+        target_ci=target_ci,
+        relationship_type=relationship_type,
     )
 
 
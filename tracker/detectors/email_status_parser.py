@@ -2,120 +2,92 @@
 # SPDX-License-Identifier: MIT
 
 """
-Email status parser detector for updating issue status from email subject.
+Email directive parser detector for updating issues from email messages.
 
-This detector parses status directives from email subjects in the format:
+This detector parses property directives from the summary (first line) of
+messages added to an issue through the mail gateway, in the format:
 [status=in-progress] or [status:in-progress]
 
-When an email with such a directive creates or updates an issue, the issue
-status is automatically updated to match the directive.
+Besides status, the priority, assignedto, keyword and affected_cis
+properties are understood, several at once:
+[status=in-progress] [assignedto=alice;keyword=+network]
+
+All directives of the new messages are merged into the issue update that
+adds the messages, so they produce one journal entry and one detector pass
+instead of a separate set() per property. See lib/email_directives.py for
+the full syntax.
 """
 
-import logging
-import re
+import batch_lookup
+import detector_log
+import email_directives
 
-logger = logging.getLogger(__name__)
+logger = detector_log.get_logger("detectors.email_status_parser")
 
 
-def parse_status_from_subject(db, cl, nodeid, oldvalues):
+def apply_email_directives(db, cl, nodeid, newvalues):
     """
-    Parse status directive from message summary and update linked issue.
+    Apply directives found in new messages to the issue being saved.
 
-    Looks for patterns like [status=in-progress] or [status:in-progress]
-    in the message summary (subject line) and updates the linked issue
-    status accordingly.
+    Only messages arriving by email are parsed: a web or REST user quoting
+    a directive in a comment changes nothing. Properties explicitly set in the same update (for example by the mail
+    gateway's own [prop=value] subject suffix) take precedence over the
+    directives.
 
     Args:
         db: Database instance
-        cl: Message class
-        nodeid: Message node ID
-        oldvalues: Dictionary of old values (for update detection)
+        cl: Issue class
+        nodeid: Issue node ID (None for create)
+        newvalues: Dictionary of new values being set
     """
-    # Only process new messages
-    if oldvalues:
-        return
-
-    # Get message summary (subject)
-    try:
-        summary = cl.get(nodeid, "summary")
-    except (KeyError, IndexError):
+    # "email", or "email-sig-openpgp" for signed mail
+    if not (db.tx_Source or "").startswith("email") or "messages" not in newvalues:
         return
 
-    if not summary:
+    # Figure out which messages are new in this transaction
+    if nodeid is None:
+        new_messages = newvalues["messages"]
+    else:
+        old_messages = set(cl.get(nodeid, "messages"))
+        new_messages = [m for m in newvalues["messages"] if m not in old_messages]
+    if not new_messages:
         return
 
-    # Parse status directive: [status=value] or [status:value]
-    # Case-insensitive, allows hyphens in status names
-    status_pattern = r"\[status[=:]([a-z][a-z\-]*)\]"
-    match = re.search(status_pattern, summary, re.IGNORECASE)
-
-    if not match:
+    # Later messages override earlier ones for the same property
+    directives = {}
+    summaries = batch_lookup.get_values(db, "msg", new_messages, "summary")
+    for summary in summaries.values():
+        directives.update(email_directives.parse_directives(summary))
+    for propname in list(directives):
+        if propname in newvalues:
+            del directives[propname]
+    if not directives:
         return
 
-    status_name = match.group(1).lower()
-
     logger.debug(
-        f"Found status directive in email subject",
-        extra={
-            "message_id": nodeid,
-            "status_name": status_name,
-        },
+        "Found directives in email message",
+        issue_id=nodeid,
+        directives=directives,
     )
 
-    # Get linked issue IDs
-    try:
-        issue_ids = cl.get(nodeid, "issues")
-    except (KeyError, IndexError):
-        logger.debug("Message has no linked issues")
-        return
-
-    if not issue_ids:
-        logger.debug("Message has no linked issues")
-        return
-
-    # Get status class and lookup status ID
-    status_class = db.getclass("status")
-    try:
-        status_id = status_class.lookup(status_name)
-    except KeyError:
-        logger.warning(
-            f"Invalid status name in email subject: {status_name}",
-            extra={"message_id": nodeid, "status_name": status_name},
+    changes = email_directives.resolve_changes(db, cl, nodeid, directives)
+    if changes:
+        newvalues.update(changes)
+        logger.info(
+            "Updated issue from email directives",
+            issue_id=nodeid,
+            properties=lambda: sorted(changes),
         )
-        return
-
-    # Update all linked issues
-    issue_class = db.getclass("issue")
-    for issue_id in issue_ids:
-        try:
-            current_status = issue_class.get(issue_id, "status")
-            if current_status != status_id:
-                issue_class.set(issue_id, status=status_id)
-                logger.info(
-                    f"Updated issue status from email directive",
-                    extra={
-                        "issue_id": issue_id,
-                        "message_id": nodeid,
-                        "status_name": status_name,
-                    },
-                )
-        except Exception as e:
-            logger.error(
-                f"Failed to update issue status: {e}",
-                extra={
-                    "issue_id": issue_id,
-                    "message_id": nodeid,
-                    "status_name": status_name,
-                },
-            )
 
 
 def init(db):
     """
-    Initialize the email status parser detector.
+    Initialize the email directive parser detector.
 
     Args:
         db: Database instance
     """
-    # Register the detector for the message class (react after creation)
-    db.msg.react("create", parse_status_from_subject)
+    # Run before the other issue auditors so that status_workflow validates
+    # and updatenosy sees the properties set by directives
+    db.issue.audit("create", apply_email_directives, priority=90)
+    db.issue.audit("set", apply_email_directives, priority=90)
@@ -0,0 +1,16 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Full-text indexer detector.
+
+Replaces Roundup's FTS5 indexer with the ranked one of lib/fts_index.py when
+the tracker uses ``indexer = native-fts``.
+"""
+
+import fts_index
+
+
+def init(db):
+    """Install the ranked FTS5 indexer."""
+    fts_index.install(db)
@@ -0,0 +1,39 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+IP address index detector for configuration items.
+
+Rejects CI IP addresses that cannot be parsed and keeps the address index
+(``__ci_ip``) in line with CIs; see lib/ip_index.py.
+"""
+
+import ip_index
+from roundup.exceptions import Reject
+
+
+def check_ip_address(db, cl, nodeid, newvalues):
+    """Only accept IPv4/IPv6 addresses, separated by commas or spaces."""
+    if not newvalues.get("ip_address"):
+        return
+    try:
+        ip_index.parse(newvalues["ip_address"])
+    except ValueError as message:
+        raise Reject(f"Invalid IP address: {message}") from None
+
+
+def index_ci(db, cl, nodeid, oldvalues):
+    """Index the addresses of a new, changed, retired or restored CI."""
+    if oldvalues and oldvalues.get("ip_address") == cl.get(nodeid, "ip_address"):
+        return
+    ip_index.sync_ci(db, nodeid)
+
+
+def init(db):
+    # fire before changes are made
+    db.ci.audit("create", check_ip_address)
+    db.ci.audit("set", check_ip_address)
+
+    # fire after changes are made
+    for event in ("create", "set", "retire", "restore"):
+        db.ci.react(event, index_ci)
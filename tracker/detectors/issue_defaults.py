@@ -9,9 +9,10 @@ This detector ensures that all issues have sensible default values:
 - priority: Can be left as None for "no priority"
 """
 
-import logging
+import detector_log
+import detector_settings
 
-logger = logging.getLogger(__name__)
+logger = detector_log.get_logger("detectors.issue_defaults")
 
 
 def set_issue_defaults(db, cl, nodeid, newvalues):
@@ -30,16 +31,15 @@ def set_issue_defaults(db, cl, nodeid, newvalues):
 
     # Set default status to "new" if not already set
     if "status" not in newvalues or newvalues["status"] is None:
-        try:
-            status_class = db.getclass("status")
-            new_status_id = status_class.lookup("new")
-            newvalues["status"] = new_status_id
-            logger.debug(
-                "Set default status 'new' for new issue",
-                extra={"nodeid": nodeid},
-            )
-        except KeyError:
+        new_status_id = detector_settings.get(db).item_id("status", "new")
+        if new_status_id is None:
             logger.warning("Could not find 'new' status in database")
+            return
+        newvalues["status"] = new_status_id
+        logger.debug(
+            "Set default status 'new' for new issue",
+            nodeid=nodeid,
+        )
 
 
 def init(db):
@@ -1,17 +1,40 @@
-from roundup.mailgw import parseContent
+import message_summary
 
 
 def summarygenerator(db, cl, nodeid, newvalues):
-    """If the message doesn't have a summary, make one for it."""
+    """If the message doesn't have a summary, make one for it.
+
+    Only the first paragraph (at most SUMMARY_SCAN_LIMIT characters) of the
+    content is parsed, so huge bodies don't make this expensive.
+    """
     if "summary" in newvalues or "content" not in newvalues:
         return
 
-    summary, content = parseContent(newvalues["content"], config=db.config)
-    newvalues["summary"] = summary
+    newvalues["summary"] = message_summary.extract_summary(
+        newvalues["content"], db.config
+    )
+
+
+def storeoversized(db, cl, nodeid, newvalues):
+    """Store bodies above [messagesummary] max_body_size as an attachment.
+
+    The message content is replaced by a short preview and the full text is
+    linked to the message as a "message-body.txt" file.
+    """
+    content = newvalues.get("content")
+    if not message_summary.is_oversized(db, content):
+        return
+
+    fileid = db.file.create(
+        name=message_summary.OVERSIZED_BODY_NAME, type="text/plain", content=content
+    )
+    newvalues["files"] = list(newvalues.get("files") or []) + [fileid]
+    newvalues["content"] = message_summary.preview(content)
 
 
 def init(db):
     # fire before changes are made
+    db.msg.audit("create", storeoversized, priority=90)
     db.msg.audit("create", summarygenerator)
 
 
@@ -0,0 +1,24 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+CI name index detector.
+
+Keeps the trigram index of CI names (``__ci_trigram``) in line with CIs;
+see lib/name_index.py.
+"""
+
+import name_index
+
+
+def index_ci(db, cl, nodeid, oldvalues):
+    """Index the name of a new, renamed, retired or restored CI."""
+    if oldvalues and oldvalues.get("name") == cl.get(nodeid, "name"):
+        return
+    name_index.sync_ci(db, nodeid)
+
+
+def init(db):
+    # fire after changes are made
+    for event in ("create", "set", "retire", "restore"):
+        db.ci.react(event, index_ci)
@@ -18,6 +18,9 @@
 
 from roundup import roundupdb, hyperdb
 
+import batch_lookup
+import nosy_queue
+
 
 def nosyreaction(db, cl, nodeid, oldvalues):
     """A standard detector is provided that watches for additions to the
@@ -34,8 +37,11 @@ def nosyreaction(db, cl, nodeid, oldvalues):
     The journal recorded by the hyperdatabase on the "recipients" property
     then provides a log of when the message was sent to whom.
     """
-    # send a copy of all new messages to the nosy list
+    # send a copy of all new messages to the nosy list; users who get
+    # coalesced or digest notifications are queued for scripts/pms-admin.py
     for msgid in determineNewMessages(cl, nodeid, oldvalues):
+        if nosy_queue.enqueue(db, cl, nodeid, msgid, oldvalues):
+            continue
         try:
             cl.nosymessage(nodeid, msgid, oldvalues)
         except roundupdb.MessageSendError as message:
@@ -81,10 +87,7 @@ def updatenosy(db, cl, nodeid, newvalues):
     # if the nosy list changed in this transaction, init from the new value
     if "nosy" in newvalues:
         nosy = newvalues.get("nosy", [])
-        for value in nosy:
-            if not db.hasnode("user", value):
-                continue
-            current_nosy.add(value)
+        current_nosy.update(batch_lookup.existing_ids(db, "user", nosy))
 
     new_nosy = set(current_nosy)
 
@@ -107,7 +110,7 @@ def updatenosy(db, cl, nodeid, newvalues):
         else:
             ok = ("yes",)
             # figure which of the messages now on the issue weren't
-            oldmessages = cl.get(nodeid, "messages")
+            oldmessages = set(cl.get(nodeid, "messages"))
             messages = []
             for msgid in newvalues["messages"]:
                 if msgid not in oldmessages:
@@ -117,17 +120,16 @@ def updatenosy(db, cl, nodeid, newvalues):
         add_author = getattr(db.config, "ADD_AUTHOR_TO_NOSY", "new")
         add_recips = getattr(db.config, "ADD_RECIPIENTS_TO_NOSY", "new")
 
-        # now for each new message:
-        msg = db.msg
-        for msgid in messages:
-            if add_author in ok:
-                authid = msg.get(msgid, "author")
-                new_nosy.add(authid)
-
-            # add on the recipients of the message
-            if add_recips in ok:
-                for recipient in msg.get(msgid, "recipients"):
-                    new_nosy.add(recipient)
+        # now for all new messages, read in one batch per property:
+        if messages and add_author in ok:
+            authors = batch_lookup.get_values(db, "msg", messages, "author")
+            new_nosy.update(authors.values())
+
+        # add on the recipients of the messages
+        if messages and add_recips in ok:
+            recipients = batch_lookup.get_values(db, "msg", messages, "recipients")
+            for msg_recipients in recipients.values():
+                new_nosy.update(msg_recipients)
 
     if current_nosy != new_nosy:
         # that's it, save off the new nosy list
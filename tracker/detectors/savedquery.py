@@ -0,0 +1,62 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Materialized saved query detector.
+
+Keeps the matching item IDs of saved queries marked "materialized" up to
+date as items change; see lib/saved_query.py.
+"""
+
+import saved_query
+from roundup.exceptions import Reject
+
+
+def check_materialized(db, cl, nodeid, newvalues):
+    """Only accept materialized queries whose filter can be kept up to date."""
+    if not {"materialized", "klass", "url"} & set(newvalues):
+        return
+
+    def value(name):
+        if name in newvalues or nodeid is None:
+            return newvalues.get(name)
+        return cl.get(nodeid, name)
+
+    if not value("materialized"):
+        return
+    try:
+        saved_query.parse(db, value("klass"), value("url"))
+    except ValueError as message:
+        raise Reject(f"This query cannot be materialized: {message}") from None
+
+
+def refresh_query(db, cl, nodeid, oldvalues):
+    """Recompute the matches of a query marked materialized or changed."""
+    if oldvalues is not None and not any(
+        oldvalues.get(name) != cl.get(nodeid, name) for name in ("materialized", "klass", "url")
+    ):
+        return
+    saved_query.forget(db)
+    saved_query.refresh(db, nodeid)
+
+
+def update_matches(db, cl, nodeid, oldvalues):
+    """Add a changed item to or remove it from the materialized queries of its class."""
+    saved_query.update(db, cl.classname, nodeid)
+
+
+def init(db):
+    saved_query.install(db)
+
+    # fire before changes are made
+    db.query.audit("create", check_materialized)
+    db.query.audit("set", check_materialized)
+
+    # fire after changes are made
+    for event in ("create", "set", "retire", "restore"):
+        db.query.react(event, refresh_query)
+    for classname in db.getclasses():
+        if classname in saved_query.MATERIALIZED_CLASSES:
+            cl = db.getclass(classname)
+            for event in ("create", "set", "retire", "restore"):
+                cl.react(event, update_matches)
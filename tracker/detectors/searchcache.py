@@ -0,0 +1,28 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Search cache detector.
+
+Serves repeated searches of issues, changes, CIs and CI relationships from
+memory and invalidates them whenever an item changes; see
+lib/search_cache.py.
+"""
+
+import search_cache
+
+
+def bump_generation(db, cl, nodeid, oldvalues):
+    """Move the cached searches depending on this class to a new generation."""
+    search_cache.bump(db, cl.classname)
+
+
+def init(db):
+    search_cache.install(db)
+
+    # fire after changes are made, for every class: searches read linked
+    # classes (statuses, users, messages...) too
+    for classname in db.getclasses():
+        cl = db.getclass(classname)
+        for event in ("create", "set", "retire", "restore"):
+            cl.react(event, bump_generation)
@@ -13,11 +13,13 @@ This detector implements ITIL-inspired workflow rules:
 Invalid transitions (e.g., new → closed) are rejected.
 """
 
-import logging
+import functools
 
+import detector_log
+import workflow
 from roundup.exceptions import Reject
 
-logger = logging.getLogger(__name__)
+logger = detector_log.get_logger("detectors.status_workflow")
 
 
 def check_status_transition(db, cl, nodeid, newvalues):
@@ -49,55 +51,37 @@ def check_status_transition(db, cl, nodeid, newvalues):
     if current_status_id == new_status_id:
         return
 
-    # Look up status IDs by name (robust approach - survives database reinitializations)
+    # The rules live in lib/workflow.py and use status names (robust
+    # approach - survives database reinitializations)
     status_class = db.getclass("status")
-    new_id = status_class.lookup("new")
-    in_progress_id = status_class.lookup("in-progress")
-    resolved_id = status_class.lookup("resolved")
-    closed_id = status_class.lookup("closed")
-
-    # Define valid transitions using looked-up IDs
-    VALID_TRANSITIONS = {
-        new_id: [in_progress_id],  # new → in-progress
-        in_progress_id: [resolved_id],  # in-progress → resolved
-        resolved_id: [in_progress_id, closed_id],  # resolved → in-progress (reopen) or closed
-        closed_id: [],  # closed is terminal (no transitions allowed)
-    }
-
-    # Check if transition is valid
-    allowed_statuses = VALID_TRANSITIONS.get(current_status_id, [])
-
-    # Get status names for logging
-    current_status_name = status_class.get(current_status_id, "name")
-    new_status_name = status_class.get(new_status_id, "name")
+    allowed = workflow.is_allowed(db, "issue", current_status_id, new_status_id)
+
+    # Status names are only looked up when a log record is emitted or the
+    # transition is rejected
+    current_status_name = functools.partial(status_class.get, current_status_id, "name")
+    new_status_name = functools.partial(status_class.get, new_status_id, "name")
 
     logger.debug(
         "Checking issue status transition",
-        extra={
-            "nodeid": nodeid,
-            "current_status": current_status_name,
-            "new_status": new_status_name,
-        },
+        nodeid=nodeid,
+        current_status=current_status_name,
+        new_status=new_status_name,
     )
 
-    if new_status_id not in allowed_statuses:
+    if not allowed:
         logger.warning(
             "Invalid issue status transition rejected",
-            extra={
-                "nodeid": nodeid,
-                "current_status": current_status_name,
-                "new_status": new_status_name,
-            },
+            nodeid=nodeid,
+            current_status=current_status_name,
+            new_status=new_status_name,
         )
-        raise Reject(f"Invalid status transition: {current_status_name} -> {new_status_name}")
+        raise Reject(f"Invalid status transition: {current_status_name()} -> {new_status_name()}")
 
     logger.debug(
         "Issue status transition validated",
-        extra={
-            "nodeid": nodeid,
-            "current_status": current_status_name,
-            "new_status": new_status_name,
-        },
+        nodeid=nodeid,
+        current_status=current_status_name,
+        new_status=new_status_name,
     )
 
 
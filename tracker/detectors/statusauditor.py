@@ -19,7 +19,7 @@
 # SOFTWARE.
 #
 
-from roundup.configuration import BooleanOption, InvalidOptionError
+import detector_settings
 
 
 def chatty(db, cl, nodeid, newvalues):
@@ -32,56 +32,46 @@ def chatty(db, cl, nodeid, newvalues):
     without changing it to 'chatting'. 'chatting' should
     indicate at least two people are 'chatting'.
     """
-    # If set to true, change state from 'unread' to 'chatting' only
-    # if the author of the update is not the person who created the
-    # first message (and thus the issue). If false (default ini file
-    # setting) set 'chatting' when the second message is received.
-    try:
-        chatting_requires_two_users = BooleanOption(
-            None, "detector::Statusauditor", "CHATTING_REQUIRES_TWO_USERS"
-        ).str2value(db.config.detectors["STATUSAUDITOR_CHATTING_REQUIRES_TWO_USERS"])
-    except InvalidOptionError:
-        chatting_requires_two_users = False
-        # NOTE if this is hit, detectors/config.ini needs to be updated with:
-        #   [statusauditor]
-        #   chatting_requires_two_users = yes
-        # to enable or no to disable (same as default)
-
     # don't fire if there's no new message (ie. chat)
     if "messages" not in newvalues:
         return
     if newvalues["messages"] == cl.get(nodeid, "messages"):
         return
 
+    # see if there's an explicit change in this transaction
+    if "status" in newvalues:
+        # yep, skip
+        return
+
+    # options and status IDs are parsed/looked up once per database open
+    settings = detector_settings.get(db)
+
     # get the chatting state ID
-    try:
-        chatting_id = db.status.lookup("chatting")
-    except KeyError:
+    chatting_id = settings.item_id("status", "chatting")
+    if chatting_id is None:
         # no chatting state, ignore all this stuff
         return
 
     # get the current value
     current_status = cl.get(nodeid, "status")
 
-    # see if there's an explicit change in this transaction
-    if "status" in newvalues:
-        # yep, skip
-        return
-
-    # determine the id of 'unread', 'resolved' and 'chatting'
-    fromstates = []
-    for state in "unread resolved done-cbb".split():
-        try:
-            fromstates.append(db.status.lookup(state))
-        except KeyError:
-            pass
-
-    unread = fromstates[0]  # grab the 'unread' state which is first
+    # determine the id of 'unread', 'resolved' and 'done-cbb'
+    unread = settings.item_id("status", "unread")
+    fromstates = [
+        settings.item_id("status", state) for state in "unread resolved done-cbb".split()
+    ]
+    fromstates = [state for state in fromstates if state is not None]
 
     # ok, there's no explicit change, so check if we are in a state that
     # should be changed. First see if we should set 'chatting' based on
     # who opened the issue.
-    if current_status == unread and chatting_requires_two_users:
+    #
+    # If [statusauditor] chatting_requires_two_users is true, change state
+    # from 'unread' to 'chatting' only if the author of the update is not
+    # the person who created the first message (and thus the issue). If
+    # false (default ini file setting) set 'chatting' when the second
+    # message is received.
+    if unread is not None and current_status == unread and settings.chatting_requires_two_users:
         # find creator of issue and compare to currentuser making
         # update. If the creator is same as initial author don't
         # change to 'chatting'.
@@ -103,9 +93,8 @@ def presetunread(db, cl, nodeid, newvalues):
         return
 
     # get the unread state ID
-    try:
-        unread_id = db.status.lookup("unread")
-    except KeyError:
+    unread_id = detector_settings.get(db).item_id("status", "unread")
+    if unread_id is None:
         # no unread state, ignore all this stuff
         return
 
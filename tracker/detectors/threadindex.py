@@ -0,0 +1,63 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Thread index detector for routing email replies.
+
+Keeps the Message-ID index (``msgref``) in line with messages and the issues
+and changes holding them; see lib/thread_index.py.
+"""
+
+import functools
+
+import thread_index
+
+
+def index_message(db, cl, nodeid, oldvalues):
+    """Index the Message-ID of a new message."""
+    thread_index.add_message(db, nodeid)
+
+
+def reindex_message(db, cl, nodeid, oldvalues):
+    """Follow a Message-ID set after creation (e.g. when nosy mail is sent)."""
+    messageid = cl.get(nodeid, "messageid")
+    if oldvalues.get("messageid") == messageid:
+        return
+    thread_index.remove_message(db, nodeid, oldvalues.get("messageid"))
+    thread_index.add_message(db, nodeid, thread_index.thread_of(db, nodeid))
+
+
+def unindex_message(db, cl, nodeid, oldvalues):
+    """Retired messages are not reply parents any more."""
+    thread_index.remove_message(db, nodeid, cl.get(nodeid, "messageid"))
+
+
+def restore_message(db, cl, nodeid, oldvalues):
+    """Index a restored message again."""
+    thread_index.add_message(db, nodeid, thread_index.thread_of(db, nodeid))
+
+
+def update_threads(db, cl, nodeid, oldvalues):
+    """Record the item of messages added to or removed from an issue or change."""
+    messages = set(cl.get(nodeid, "messages"))
+    if oldvalues is None:
+        # create, retire or restore: every message changes thread
+        changed = messages
+    else:
+        changed = messages.symmetric_difference(oldvalues.get("messages") or [])
+    thread_index.update_threads(db, sorted(changed, key=int))
+
+
+def init(db):
+    # answer Roundup's own Message-ID searches from the index
+    db.msg.stringFind = functools.partial(thread_index.string_find, db)
+
+    # fire after changes are made
+    db.msg.react("create", index_message)
+    db.msg.react("set", reindex_message)
+    db.msg.react("retire", unindex_message)
+    db.msg.react("restore", restore_message)
+    for classname in thread_index.THREAD_CLASSES:
+        cl = db.getclass(classname)
+        for action in ("create", "set", "retire", "restore"):
+            cl.react(action, update_threads)
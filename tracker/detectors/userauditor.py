@@ -21,6 +21,8 @@
 
 import re
 
+import address_index
+
 # regular expression thanks to: http://www.regular-expressions.info/email.html
 # this is the "99.99% solution for syntax only".
 email_regexp = (
@@ -75,16 +77,10 @@ def audit_user_fields(db, cl, nodeid, newvalues):
         if not valid_address(address):
             raise ValueError('Email address syntax is invalid "%s"' % address)
 
-        check_main = db.user.stringFind(address=address)
-        # allow user to set same address via rest
-        if check_main:
-            check_main = nodeid not in check_main
-
-        # make sure none of the alts are owned by anyone other than us (x!=nodeid)
-        check_alts = [
-            x for x in db.user.filter(None, {"alternate_addresses": address}) if x != nodeid
-        ]
-        if check_main or check_alts:
+        # exact, case-insensitive lookup in the useraddress index; the
+        # address may be in use by us (allow user to set same address via rest)
+        owner = address_index.owner(db, address)
+        if owner is not None and owner != nodeid:
             raise ValueError("Email address %s already in use" % address)
 
     newroles = newvalues.get("roles")
@@ -110,10 +106,38 @@ def audit_user_fields(db, cl, nodeid, newvalues):
             raise ValueError('Timezone "%s" exceeds valid range [-23...23]' % tz)
 
 
+def audit_user_restore(db, cl, nodeid, newvalues):
+    """Make sure the addresses of a restored user are not in use."""
+    addresses = address_index.user_addresses(
+        cl.get(nodeid, "address"), cl.get(nodeid, "alternate_addresses")
+    )
+    for address in sorted(addresses):
+        owner = address_index.owner(db, address)
+        if owner is not None and owner != nodeid:
+            raise ValueError("Email address %s already in use" % address)
+
+
+def update_address_index(db, cl, nodeid, oldvalues):
+    """Keep the useraddress index in line with the user's addresses."""
+    if oldvalues and all(
+        oldvalues.get(prop) == cl.get(nodeid, prop)
+        for prop in ("address", "alternate_addresses")
+    ):
+        return
+    address_index.sync_user(db, nodeid)
+
+
 def init(db):
     # fire before changes are made
     db.user.audit("set", audit_user_fields)
     db.user.audit("create", audit_user_fields)
+    db.user.audit("restore", audit_user_restore)
+
+    # fire after changes are made
+    db.user.react("create", update_address_index)
+    db.user.react("set", update_address_index)
+    db.user.react("retire", update_address_index)
+    db.user.react("restore", update_address_index)
 
 
 # vim: sts=4 sw=4 et si
@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Batch status transitions for issues and changes (web and REST).
+
+Web: POST to the class index with ``@action=batch_status``, one or more
+``items`` fields (IDs, may be comma-separated) and the target ``status``.
+
+REST: ``POST /rest/data/issue/@batch_status`` (or ``change``) with the same
+``items`` and ``status`` fields, as form data or JSON::
+
+    {"items": ["12", "15", "21"], "status": "closed"}
+
+The whole batch is validated first and committed in one transaction; see
+``lib/batch_transition.py``.
+"""
+
+import batch_transition
+from roundup.cgi.actions import Action
+from roundup.cgi.exceptions import NotFound
+from roundup.exceptions import Reject
+from roundup.rest import Routing, _data_decorator
+
+
+class BatchStatusAction(Action):
+    """Move the selected items of the current class to one status."""
+
+    name = "edit"
+    permissionType = "Edit"
+
+    def handle(self):
+        """Validate and apply the batch, then redisplay the index."""
+        # Ensure modification comes via POST
+        if self.client.env["REQUEST_METHOD"] != "POST":
+            raise Reject(self._("Invalid request"))
+
+        status = self.form.getfirst("status", "")
+
+        try:
+            itemids = batch_transition.parse_item_ids(self.form.getlist("items"), self.classname)
+            changed = batch_transition.apply(self.db, self.userid, self.classname, itemids, status)
+            self.db.commit()
+        except (ValueError, Reject) as message:
+            self.db.rollback()
+            self.client.add_error_message(self._("Batch not applied: %s") % str(message))
+            return
+
+        self.client.add_ok_message(
+            self._("%(count)d %(classname)s item(s) moved to the new status")
+            % {"count": len(changed), "classname": self.classname}
+        )
+
+
+class RestfulInstance:
+    """REST endpoints added to roundup.rest (routes are registered globally)."""
+
+    @Routing.route("/data/<:class_name>/@batch_status", "POST")
+    @_data_decorator
+    def post_batch_status(self, class_name, input_payload):
+        """Move several items of a class to one status in one transaction.
+
+        Args:
+            class_name (string): "issue" or "change"
+            input_payload: "items" (list or comma-separated IDs) and "status"
+
+        Returns:
+            int: http status code 200 (OK)
+            dict: changed item IDs and the target status ID
+        """
+        items, status = [], None
+        for field in input_payload.value or []:
+            if field.name == "items":
+                items.extend(field.value if isinstance(field.value, list) else [field.value])
+            elif field.name == "status":
+                status = field.value
+
+        if class_name not in self.db.classes:
+            raise NotFound(f"Class {class_name} not found")
+
+        try:
+            itemids = batch_transition.parse_item_ids(items, class_name)
+            status_id = batch_transition.resolve_status(self.db, class_name, status)
+            changed = batch_transition.apply(
+                self.db, self.db.getuid(), class_name, itemids, status_id
+            )
+            self.db.commit()
+        except (ValueError, Reject):
+            self.db.rollback()
+            raise
+        return 200, {"changed": changed, "status": status_id}
+
+
+def init(instance):
+    """Register custom actions with the tracker."""
+    instance.registerAction("batch_status", BatchStatusAction)
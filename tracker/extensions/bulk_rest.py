@@ -0,0 +1,68 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Bulk create/update of issues, changes, CIs and CI relationships (REST).
+
+``POST /rest/data/@bulk`` with a JSON body::
+
+    {"operations": [
+        {"op": "create", "class": "issue",
+         "props": {"title": "Disk full on nas-01", "priority": "urgent"}},
+        {"op": "update", "class": "ci", "id": "12", "props": {"status": "2"}}
+     ],
+     "@chunk_size": 100}
+
+returns one result per operation, in order, with the item id and link and
+201 (created), 200 (updated) or the error of a failed operation. The
+operations are committed every ``@chunk_size`` operations (default 100, at
+most 250). See ``lib/bulk_operations.py``.
+"""
+
+import bulk_operations
+from roundup.exceptions import UsageError
+from roundup.rest import Routing, _data_decorator
+
+
+class RestfulInstance:
+    """REST endpoints added to roundup.rest (routes are registered globally)."""
+
+    @Routing.route("/data/@bulk", "POST")
+    @_data_decorator
+    def post_bulk(self, input_payload):
+        """Create and update many items in one request.
+
+        Args:
+            input_payload: JSON object with "operations" and optional "@chunk_size"
+
+        Returns:
+            int: http status code 200 (OK), even if some operations failed
+            dict: "results" (one per operation) and the number of "failed" ones
+        """
+        body = getattr(input_payload, "json_dict", None)
+        if not isinstance(body, dict):
+            raise UsageError(
+                "Send the operations as a JSON object (Content-Type: application/json)"
+            )
+        chunk_size = body.get("@chunk_size")
+        if chunk_size is not None and (
+            not isinstance(chunk_size, int) or not 1 <= chunk_size <= bulk_operations.MAX_CHUNK_SIZE
+        ):
+            raise UsageError(
+                f"@chunk_size must be an integer from 1 to {bulk_operations.MAX_CHUNK_SIZE}"
+            )
+        try:
+            operations = bulk_operations.parse_operations(body.get("operations"))
+        except ValueError as message:
+            raise UsageError(str(message)) from None
+
+        results = bulk_operations.apply(self.db, self.db.getuid(), operations, chunk_size)
+        for result in results:
+            if result["id"] and result["status"] < 400:
+                result["link"] = f"{self.data_path}/{result['class']}/{result['id']}"
+        failed = sum(1 for result in results if result["status"] >= 400)
+        return 200, {"results": results, "failed": failed}
+
+
+def init(instance):
+    """Nothing to register: the route above is added when the module is loaded."""
@@ -0,0 +1,97 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+CI hardware range filters and capacity aggregates (web and REST).
+
+Web: the CMDB list takes range conditions on ``cpu_cores``, ``ram_gb``,
+``ports`` and ``capacity_gb`` (e.g. ``ram_gb=>=64``) and
+``ci?@template=capacity`` summarizes those fields per type, status,
+criticality, location or owner.
+
+REST::
+
+    GET /rest/data/ci/@aggregate?group=location&fields=ram_gb,capacity_gb&ram_gb=>=64
+
+See ``lib/capacity.py``.
+"""
+
+import capacity
+from roundup.cgi.exceptions import Unauthorised
+from roundup.exceptions import UsageError
+from roundup.rest import Routing, _data_decorator
+
+
+def invalid_ranges(ranges):
+    """Return the properties whose range condition cannot be parsed."""
+    invalid = []
+    for name, spec in sorted(ranges.items()):
+        try:
+            if spec and spec.strip():
+                capacity.parse_range(spec)
+        except ValueError:
+            invalid.append(name)
+    return invalid
+
+
+def ci_range_ids(db, ranges):
+    """Return the CIs matching the valid range conditions, or None if there are none."""
+    valid = {name: spec for name, spec in ranges.items() if name not in invalid_ranges(ranges)}
+    # templates pass the HTMLDatabase wrapper
+    return capacity.matching_ids(getattr(db, "_db", db), "ci", valid)
+
+
+def ci_capacity(db, group_by, ranges):
+    """Return the capacity summary of the CIs matching some ranges, per group."""
+    db = getattr(db, "_db", db)
+    if group_by not in capacity.CI_GROUP_PROPS:
+        group_by = "type"
+    return capacity.aggregate(
+        db, "ci", group_by, capacity.CI_NUMBER_PROPS, ci_range_ids(db, ranges)
+    )
+
+
+class RestfulInstance:
+    """REST endpoints added to roundup.rest (routes are registered globally)."""
+
+    @Routing.route("/data/ci/@aggregate", "GET")
+    @_data_decorator
+    def get_ci_aggregate(self, input_payload):
+        """Summarize CI hardware fields per group.
+
+        Args:
+            input_payload: "group" (default type), "fields" (comma-separated,
+                default all hardware fields) and range conditions by field,
+                e.g. "ram_gb" = ">=64"
+
+        Returns:
+            int: http status code 200 (OK)
+            dict: groups with count and per-field count, sum, avg, min, max,
+                p50, p90 and p95
+        """
+        if not self.db.security.hasPermission("View", self.db.getuid(), "ci"):
+            raise Unauthorised("Permission to view ci denied")
+
+        group_by, fields, ranges = "type", list(capacity.CI_NUMBER_PROPS), {}
+        for field in input_payload.value or []:
+            if field.name == "group":
+                group_by = field.value
+            elif field.name == "fields":
+                fields = [name.strip() for name in field.value.split(",") if name.strip()]
+            elif field.name in capacity.CI_NUMBER_PROPS:
+                ranges[field.name] = field.value
+
+        if group_by not in capacity.CI_GROUP_PROPS:
+            raise UsageError(f"group must be one of {', '.join(capacity.CI_GROUP_PROPS)}")
+        try:
+            itemids = capacity.matching_ids(self.db, "ci", ranges)
+            groups = capacity.aggregate(self.db, "ci", group_by, fields, itemids)
+        except ValueError as message:
+            raise UsageError(str(message)) from None
+        return 200, {"group": group_by, "groups": groups}
+
+
+def init(instance):
+    instance.registerUtil("ci_range_ids", ci_range_ids)
+    instance.registerUtil("invalid_ranges", invalid_ranges)
+    instance.registerUtil("ci_capacity", ci_capacity)
@@ -0,0 +1,24 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Template helper for facet counts.
+
+``utils.facet_counts(db, classname, selected, text, text_props, itemids)``
+returns ``{property: {ID: count}}`` for the dropdowns of a filtered index
+page, computed in one pass over the class; see ``lib/facet_counts.py``.
+"""
+
+import facet_counts as _facet_counts
+
+
+def facet_counts(db, classname, selected, text="", text_props=(), itemids=None):
+    """Return the number of items each option of some Link filters would list."""
+    # templates pass the HTMLDatabase wrapper
+    return _facet_counts.counts(
+        getattr(db, "_db", db), classname, selected, text, text_props, itemids
+    )
+
+
+def init(instance):
+    instance.registerUtil("facet_counts", facet_counts)
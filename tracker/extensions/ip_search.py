@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+CI searches by IP address or network (web and REST).
+
+Web: the CMDB list takes an ``ip`` filter ("10.0.3.5" or "10.0.3.0/24"),
+and the CI page lists the other CIs sharing one of its addresses, through
+``utils.ci_ids_by_ip(db, spec)`` and ``utils.ip_duplicates(db, ciid)``.
+
+REST::
+
+    GET /rest/data/ci/@ip?address=10.0.3.0/24
+    GET /rest/data/ci/@ip_duplicates
+
+See ``lib/ip_index.py``.
+"""
+
+import ip_index
+from roundup.cgi.exceptions import Unauthorised
+from roundup.exceptions import UsageError
+from roundup.rest import Routing, _data_decorator
+
+
+def ci_ids_by_ip(db, spec):
+    """Return the CI IDs with an address or in a network, or None if ``spec`` is invalid."""
+    try:
+        # templates pass the HTMLDatabase wrapper
+        return ip_index.search(getattr(db, "_db", db), spec)
+    except ValueError:
+        return None
+
+
+def ip_duplicates(db, ciid):
+    """Return ``{address: [other CI IDs]}`` for the addresses a CI shares."""
+    found = ip_index.duplicates(getattr(db, "_db", db), ciid)
+    return {
+        address: [other for other in owners if other != ciid] for address, owners in found.items()
+    }
+
+
+def _visible_cis(db, ciids):
+    """Return the CIs the REST user may view."""
+    uid = db.getuid()
+    if not db.security.hasPermission("View", uid, "ci"):
+        raise Unauthorised("Permission to view ci denied")
+    return [ciid for ciid in ciids if db.security.hasPermission("View", uid, "ci", itemid=ciid)]
+
+
+class RestfulInstance:
+    """REST endpoints added to roundup.rest (routes are registered globally)."""
+
+    @Routing.route("/data/ci/@ip", "GET")
+    @_data_decorator
+    def get_ci_by_ip(self, input_payload):
+        """Find the CIs with an address or in a network.
+
+        Args:
+            input_payload: "address", e.g. "10.0.3.5" or "10.0.3.0/24"
+
+        Returns:
+            int: http status code 200 (OK)
+            dict: collection of matching CIs (id, link, name, ip_address)
+        """
+        spec = ""
+        for field in input_payload.value or []:
+            if field.name == "address":
+                spec = field.value
+        try:
+            ciids = ip_index.search(self.db, spec)
+        except ValueError as message:
+            raise UsageError(f"Invalid address or network: {message}") from None
+        collection = [
+            {
+                "id": ciid,
+                "link": f"{self.data_path}/ci/{ciid}",
+                "name": self.db.ci.get(ciid, "name"),
+                "ip_address": self.db.ci.get(ciid, "ip_address"),
+            }
+            for ciid in _visible_cis(self.db, ciids)
+        ]
+        return 200, {"collection": collection, "@total_size": len(collection)}
+
+    @Routing.route("/data/ci/@ip_duplicates", "GET")
+    @_data_decorator
+    def get_ip_duplicates(self, input_payload):
+        """List the addresses assigned to more than one CI.
+
+        Returns:
+            int: http status code 200 (OK)
+            dict: {address: [CI IDs]}
+        """
+        found = {}
+        for address, owners in ip_index.duplicates(self.db).items():
+            owners = _visible_cis(self.db, owners)
+            if len(owners) > 1:
+                found[address] = owners
+        return 200, {"duplicates": found}
+
+
+def init(instance):
+    instance.registerUtil("ci_ids_by_ip", ci_ids_by_ip)
+    instance.registerUtil("ip_duplicates", ip_duplicates)
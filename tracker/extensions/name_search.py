@@ -0,0 +1,72 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Typo-tolerant CI name lookups (REST).
+
+::
+
+    GET /rest/data/ci/@similar?name=dbserver01&@fields=name,type
+
+returns the CIs with the most similar names, best first, with their
+similarity ("score") and the requested fields. The classhelp popup of issue
+"Affected CIs" falls back to it when a name search finds nothing. See
+``lib/name_index.py``.
+"""
+
+import name_index
+from roundup.cgi.exceptions import Unauthorised
+from roundup.exceptions import UsageError
+from roundup.rest import Routing, _data_decorator
+
+
+class RestfulInstance:
+    """REST endpoints added to roundup.rest (routes are registered globally)."""
+
+    @Routing.route("/data/ci/@similar", "GET")
+    @_data_decorator
+    def get_similar_cis(self, input_payload):
+        """Find the CIs whose name is similar to a name.
+
+        Args:
+            input_payload: "name"; optional "@fields" (comma-separated) and
+                "@page_size" (maximum number of CIs, default 10)
+
+        Returns:
+            int: http status code 200 (OK)
+            dict: collection of CIs (id, link, score and the requested fields)
+        """
+        name, fields, limit = "", [], 10
+        for field in input_payload.value or []:
+            if field.name == "name":
+                name = field.value
+            elif field.name == "@fields":
+                fields = [prop for prop in field.value.split(",") if prop and prop != "id"]
+            elif field.name == "@page_size":
+                try:
+                    limit = int(field.value)
+                except ValueError:
+                    raise UsageError("@page_size must be an integer") from None
+        if not name.strip():
+            raise UsageError("A name is required")
+
+        uid = self.db.getuid()
+        if not self.db.security.hasPermission("View", uid, "ci"):
+            raise Unauthorised("Permission to view ci denied")
+        try:
+            props = set(self.transitive_props("ci", fields))
+        except KeyError as message:
+            raise UsageError(message.args[0]) from None
+        collection = []
+        for ciid, score in name_index.similar(self.db, name, limit=limit):
+            if not self.db.security.hasPermission("View", uid, "ci", itemid=ciid):
+                continue
+            found = {"id": ciid, "link": f"{self.data_path}/ci/{ciid}", "score": round(score, 3)}
+            if props:
+                found.update(self.format_item(self.db.ci.getnode(ciid), ciid, props=props))
+            collection.append(found)
+        return 200, {"collection": collection, "@total_size": len(collection)}
+
+
+def init(instance):
+    """Nothing to register: the route above is added when the module is loaded."""
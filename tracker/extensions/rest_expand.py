@@ -0,0 +1,94 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+``@expand`` support for REST collections and items.
+
+::
+
+    GET /rest/data/issue?@fields=title&@expand=priority,status,affected_cis.name
+    GET /rest/data/issue/12?@expand=assignedto.realname
+
+The collection and item routes of roundup.rest are replaced by routes that
+let Roundup build the response (filters, paging, ``@fields``, permissions)
+and then inline the linked items named by ``@expand``, read with batched
+queries; see ``lib/link_expansion.py``. Requests without ``@expand`` are
+answered by Roundup unchanged. The ``@etag`` of an item is Roundup's: it
+covers the item's own properties, not the expanded linked items.
+"""
+
+import link_expansion
+from roundup import rest
+from roundup.rest import Routing
+
+
+# Roundup's own handlers (already wrapped by _data_decorator)
+_get_collection = rest.RestfulInstance.get_collection
+_get_element = rest.RestfulInstance.get_element
+
+
+def _expand_value(input_payload):
+    """Return the ``@expand`` parameter of a request, or None."""
+    for field in input_payload.value or []:
+        if field.name == "@expand":
+            return field.value
+    return None
+
+
+def _expand(instance, class_name, items, value):
+    """Replace the expanded properties of ``(itemid, dict)`` pairs in place."""
+    db = instance.db
+    spec = link_expansion.parse_expand(db, class_name, value)
+    expanded = link_expansion.expand(
+        db,
+        db.getuid(),
+        class_name,
+        [itemid for itemid, _data in items],
+        spec,
+        instance.data_path,
+    )
+    props = db.getclass(class_name).getprops()
+    for itemid, data in items:
+        for name, linked in expanded[itemid].items():
+            class_path = f"{instance.data_path}/{props[name].classname}"
+            with_links = [
+                {"id": found["id"], "link": f"{class_path}/{found['id']}", **found}
+                for found in (linked if isinstance(linked, list) else [linked] if linked else [])
+            ]
+            data[name] = with_links if isinstance(linked, list) else (with_links or [None])[0]
+
+
+class RestfulInstance:
+    """REST endpoints added to roundup.rest (routes are registered globally)."""
+
+    @Routing.route("/data/<:class_name>", "GET")
+    def get_collection(self, class_name, input_payload):
+        """GET a collection, with the linked items named by @expand inlined."""
+        output = _get_collection(self, class_name, input_payload)
+        value = _expand_value(input_payload)
+        if not value or "data" not in output:
+            return output
+        collection = output["data"]["collection"]
+        try:
+            _expand(self, class_name, [(item["id"], item) for item in collection], value)
+        except ValueError as message:
+            return self.error_obj(400, f"When using @expand: {message}")
+        return output
+
+    @Routing.route("/data/<:class_name>/<:item_id>", "GET")
+    def get_element(self, class_name, item_id, input_payload):
+        """GET an item, with the linked items named by @expand inlined."""
+        output = _get_element(self, class_name, item_id, input_payload)
+        value = _expand_value(input_payload)
+        if not value or "data" not in output:
+            return output
+        data = output["data"]
+        try:
+            _expand(self, class_name, [(data["id"], data["attributes"])], value)
+        except ValueError as message:
+            return self.error_obj(400, f"When using @expand: {message}")
+        return output
+
+
+def init(instance):
+    """Nothing to register: the routes above are added when the module is loaded."""
@@ -0,0 +1,22 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Template helper for materialized saved queries.
+
+``utils.materialized_count(db, queryid)`` returns the number of items
+matching a materialized query, read from its stored matches, or None for
+other queries; see ``lib/saved_query.py``.
+"""
+
+import saved_query
+
+
+def materialized_count(db, queryid):
+    """Return the number of matches of a materialized query, or None."""
+    # templates pass the HTMLDatabase wrapper
+    return saved_query.count(getattr(db, "_db", db), queryid)
+
+
+def init(instance):
+    instance.registerUtil("materialized_count", materialized_count)
@@ -29,6 +29,7 @@ const CSS_STYLESHEET_FILE_NAME = "@@file/classhelper.css";
 const CLASSHELPER_TAG_NAME = "roundup-classhelper";
 const CLASSHELPER_ATTRIBUTE_SEARCH_WITH = "data-search-with";
 const CLASSHELPER_ATTRIBUTE_POPUP_TITLE = "data-popup-title";
+const CLASSHELPER_ATTRIBUTE_SIMILAR_SEARCH = "data-similar-search";
 const CLASSHELPER_ATTRIBUTE_POPUP_TITLE_ITEM_CLASS_LOOKUP = "{className}";
 const CLASSHELPER_ATTRIBUTE_POPUP_TITLE_ITEM_DESIGNATOR_LOOKUP = "{itemDesignator}";
 const CLASSHELPER_POPUP_FEATURES = (width, height) => `popup=yes,width=${width},height=${height}`;
@@ -92,6 +93,11 @@ const ALTERNATIVE_DROPDOWN_PATHNAMES = {
  * the user can use "{itemDesignator}" in the title to replace in the attribute value.
  * and the current context of classhelper will replace "{itemDesignator}".
  *
+ * The data-similar-search attribute of the web component is optional.
+ * Its value is the name of a search field, eg. data-similar-search="name".
+ * When a search with a value in that field finds nothing, the popup lists the
+ * items with a similar value instead, from "rest/data/<class>/@similar".
+ *
  */
 class ClassHelper extends HTMLElement {
 
@@ -1212,6 +1218,37 @@ class ClassHelper extends HTMLElement {
         this.popupRef.close();
     }
 
+    /** method when a search found nothing, list the items with a similar value
+     * in the field named by the data-similar-search attribute, if any.
+     * @param {URL} apiURL the search that found nothing
+     * @param {HelpUrlProps} props
+     * @returns {Promise<Object.<string, any>[]>} the similar items, best first
+     */
+    async similarSearch(apiURL, props) {
+        const field = this.dataset.similarSearch;
+        const value = field ? apiURL.searchParams.get(field) : null;
+        if (!value) {
+            return [];
+        }
+
+        const url = new URL(this.trackerBaseURL + "/rest/data/" + props.apiClassName + "/@similar");
+        url.searchParams.append(field, value);
+        url.searchParams.append("@fields", props.fields.join(","));
+        url.searchParams.append("@page_size", props.pageSize);
+
+        try {
+            const resp = await fetch(url);
+            if (!resp.ok) {
+                return [];
+            }
+            const json = await resp.json();
+            return json.data.collection;
+        } catch (error) {
+            console.error(error, `request data url: ${url.toString()}`);
+            return [];
+        }
+    }
+
     /** method when search is performed within classhelper, here we need to update the classhelper table with search results
      * @param {URL} apiURL
      * @param {HelpUrlProps} props
@@ -1305,6 +1342,10 @@ class ClassHelper extends HTMLElement {
             selfPageURL = new URL(links.self[0].uri);
         }
 
+        if (collection.length === 0) {
+            collection = await this.similarSearch(apiURL, props);
+        }
+
         const preview = this.popupRef.document.getElementById("popup-preview");
         if (preview) {
             accumulatorValues = preview.value.split(",");
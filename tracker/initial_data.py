@@ -79,6 +79,12 @@ user = db.getclass("user")
 user.create(username="admin", password=adminpw, address=admin_email, roles="Admin")
 user.create(username="anonymous", roles="Anonymous")
 
+# the full-text index starts empty, with the prefix indexes of lib/fts_index.py
+if db.config.INDEXER == "native-fts":
+    import fts_index
+
+    fts_index.create_index(db)
+
 # add any additional database creation steps here - but only if you
 # haven't initialised the database with the admin "initialise" command
 
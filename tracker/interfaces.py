@@ -3,6 +3,104 @@
 
 """Roundup tracker interfaces - registers custom actions and extensions."""
 
+import alert_dedup
+import blob_store
+import message_summary
+import thread_index
+from roundup import hyperdb, mailgw
+from roundup.cgi import client
+
+
+class ParsedMessage(mailgw.parsedMessage):
+    """Mail gateway message with indexed reply routing, repeated alert
+    suppression and oversized body handling."""
+
+    # fingerprint once the content is known, before any file or msg is created
+    method_list = list(mailgw.parsedMessage.method_list)
+    method_list.insert(method_list.index(("create_files", False)), ("suppress_duplicate", False))
+
+    alert_fingerprint = None
+
+    def get_nodeid(self):
+        """Find the item the message is about.
+
+        A reply without a designator in its subject whose parent message
+        belongs to exactly one item of the class is routed with one lookup in
+        the Message-ID index. Everything else (designators, unknown parents,
+        parents held by several items, title matching) is left to Roundup.
+        """
+        nodeid = None if self.pfxmode == "none" else self.matches["nodeid"]
+        inreplyto = self.message.get_header("in-reply-to") or ""
+        if nodeid is None and inreplyto:
+            found = thread_index.lookup(self.db, inreplyto)
+            if found and found[1]:
+                classname, itemid = hyperdb.splitDesignator(found[1])
+                if classname == self.classname:
+                    self.nodeid = itemid
+                    return
+        super().get_nodeid()
+
+    def get_content_and_attachments(self):
+        """Extract content, moving bodies above max_body_size to an attachment.
+
+        This runs before the gateway computes the summary, so huge bodies are
+        never parsed in full.
+        """
+        super().get_content_and_attachments()
+        if not message_summary.is_oversized(self.db, self.content):
+            return
+        content = self.content
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        self.attachments = list(self.attachments or [])
+        self.attachments.append((message_summary.OVERSIZED_BODY_NAME, "text/plain", data))
+        self.content = message_summary.preview(content)
+
+    def suppress_duplicate(self):
+        """Count a repeated alert on its issue instead of creating a new one.
+
+        Only emails that would create an issue are fingerprinted; see
+        lib/alert_dedup.py.
+        """
+        if self.nodeid or self.classname != "issue":
+            return
+        self.alert_fingerprint = alert_dedup.fingerprint(self.author, self.subject, self.content)
+        issueid = alert_dedup.fold(self.db, self.alert_fingerprint)
+        if issueid is not None:
+            self.commit_duplicate()
+            raise alert_dedup.DuplicateAlert(f"Repeat of the alert of issue{issueid}")
+
+    def commit_duplicate(self):
+        """Commit the counter of a suppressed alert (the gateway rolls back ignored emails)."""
+        self.db.commit()
+
+    def create_node(self):
+        """Create or update the item, remembering the fingerprint of new issues."""
+        new = self.nodeid is None
+        nodeid = super().create_node()
+        if new and self.alert_fingerprint:
+            alert_dedup.record(self.db, self.alert_fingerprint, nodeid)
+        return nodeid
+
+
+class MailGW(mailgw.MailGW):
+    """Tracker mail gateway."""
+
+    parsed_message_class = ParsedMessage
+
+
+class Client(client.Client):
+    """Tracker web client."""
+
+    def _serve_file(self, lmt, etag, mime_type, content=None, filename=None):
+        """Serve a file, decoding compressed message bodies first.
+
+        Roundup sends stored files straight from disk when it can, which
+        would send compressed bodies as they are stored.
+        """
+        if filename and blob_store.stored_compression(filename) != "none":
+            content, filename = blob_store.read(filename), None
+        super()._serve_file(lmt, etag, mime_type, content, filename)
+
 
 def init(instance):
     """Initialize custom actions and extensions for this tracker.
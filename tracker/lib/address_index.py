@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Normalized index of user email addresses.
+
+Each primary and alternate address of a live (non-retired) user has one
+``useraddress`` item whose key is the lower-cased address. Uniqueness checks
+are then a single lookup on the indexed key column instead of a scan of
+``user.address`` plus a substring match over every ``alternate_addresses``
+string.
+
+The index is maintained by ``detectors/userauditor.py``. On trackers
+created before the index existed it is filled from the user table the first
+time it is used empty; it can also be rebuilt with::
+
+    ./scripts/pms-admin.py rebuild-address-index
+"""
+
+import detector_log
+
+
+logger = detector_log.get_logger(__name__)
+
+
+def normalize(address):
+    """Return the index key for an address (stripped, lower-cased)."""
+    return address.strip().lower()
+
+
+def user_addresses(address, alternate_addresses):
+    """
+    Return the normalized addresses of a user.
+
+    Args:
+        address: Primary address (may be None)
+        alternate_addresses: Newline-separated alternate addresses (may be None)
+
+    Returns:
+        set: Normalized, non-empty addresses
+    """
+    addresses = set()
+    if address:
+        addresses.add(normalize(address))
+    for alternate in (alternate_addresses or "").split("\n"):
+        if alternate.strip():
+            addresses.add(normalize(alternate))
+    addresses.discard("")
+    return addresses
+
+
+def _fill_if_empty(db):
+    """Rebuild an empty index, once per open database.
+
+    An empty index means the tracker predates it, and would accept every
+    address as unused.
+    """
+    # Detectors get a weakref.proxy of the database, so the flag is stored
+    # in the instance dict of the database object itself
+    if db.__dict__.get("_address_index_checked"):
+        return
+    db.__dict__["_address_index_checked"] = True
+    if not db.useraddress.filter(None, {}, limit=1):
+        logger.info("Address index is empty, filling it from the user table")
+        rebuild(db)
+
+
+def owner(db, address):
+    """
+    Return the ID of the user owning an address.
+
+    Args:
+        db: Database instance
+        address: Address in any case
+
+    Returns:
+        str: User ID, or None if the address is not in use
+    """
+    _fill_if_empty(db)
+    try:
+        entryid = db.useraddress.lookup(normalize(address))
+    except KeyError:
+        return None
+    return db.useraddress.get(entryid, "user")
+
+
+def sync_user(db, userid):
+    """
+    Make the index entries of one user match the user's current addresses.
+
+    Retired users have no entries, so their addresses can be reused.
+    Addresses already indexed for another user are skipped with a warning.
+
+    Args:
+        db: Database instance
+        userid: User ID
+    """
+    _fill_if_empty(db)
+    wanted = set()
+    if not db.user.is_retired(userid):
+        wanted = user_addresses(
+            db.user.get(userid, "address"), db.user.get(userid, "alternate_addresses")
+        )
+
+    for entryid in db.useraddress.find(user=userid):
+        address = db.useraddress.get(entryid, "address")
+        if address in wanted:
+            wanted.discard(address)
+        else:
+            db.useraddress.destroy(entryid)
+
+    for address in sorted(wanted):
+        other = owner(db, address)
+        if other is not None:
+            logger.warning(
+                "Address %s of user%s is already indexed for user%s",
+                address,
+                userid,
+                other,
+                user_id=userid,
+                owner_id=other,
+                address=address,
+            )
+            continue
+        db.useraddress.create(address=address, user=userid)
+
+
+def rebuild(db):
+    """
+    Rebuild the whole index from the user table.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        int: Number of indexed addresses
+    """
+    db.__dict__["_address_index_checked"] = True
+    for entryid in db.useraddress.getnodeids(retired=None):
+        db.useraddress.destroy(entryid)
+    for userid in db.user.getnodeids(retired=False):
+        sync_user(db, userid)
+    return len(db.useraddress.getnodeids(retired=False))
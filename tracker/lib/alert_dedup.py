@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Suppression of repeated alert emails at ingest.
+
+Monitoring systems send the same alert, with the same subject and body, over
+and over while an incident lasts. Without suppression each copy becomes a new
+issue (the subject has no designator and no "Re:") along with its message,
+nosy notification and index updates.
+
+The mail gateway (``ParsedMessage`` in ``interfaces.py``) fingerprints every
+email that would create an issue: a SHA-256 of the author and the normalized
+subject and body (case, whitespace, reply prefixes and dates/times ignored).
+The fingerprint of an email that created an issue is kept in an
+``alertfingerprint`` item keyed by the fingerprint. A later email with the
+same fingerprint within ``[alertdedup] dedup_window`` seconds of the previous
+copy is not added to the tracker: the ``suppressed`` counter and
+``last_seen`` date of the entry are updated instead, with one key lookup.
+Once the issue is resolved, closed or retired, the next copy creates a new
+issue, which takes over the entry.
+"""
+
+import hashlib
+import re
+
+import detector_log
+import detector_settings
+from roundup import date, mailgw
+
+
+logger = detector_log.get_logger(__name__)
+
+# Reply/forward prefixes and bracketed designators or tags in subjects
+_SUBJECT_PREFIX = re.compile(r"^\s*(?:(?:re|fwd?|aw|wg)\s*:\s*|\[[^\]]*\]\s*)+", re.IGNORECASE)
+
+# Dates and times that differ between otherwise identical alerts
+_TIMESTAMP = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:[ T]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:z|[+-]\d{2}:?\d{2})?)?"
+    r"|\b\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?\b",
+    re.IGNORECASE,
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Statuses of issues that no longer take repeats of their alert
+ENDED_STATUSES = ("resolved", "closed")
+
+
+class DuplicateAlert(mailgw.IgnoreMessage):
+    """The email repeats an alert that already has an issue."""
+
+
+def normalize(text):
+    """Return text lower-cased, with dates/times masked and whitespace collapsed."""
+    text = _TIMESTAMP.sub("<time>", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def fingerprint(author, subject, content):
+    """
+    Return the fingerprint of an email.
+
+    Args:
+        author: User ID of the author
+        subject: Subject line
+        content: Message body (may be None)
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    subject = normalize(_SUBJECT_PREFIX.sub("", subject or ""))
+    body = normalize(content or "")
+    return hashlib.sha256(f"{author}\0{subject}\0{body}".encode()).hexdigest()
+
+
+def _lookup(db, key):
+    try:
+        return db.alertfingerprint.lookup(key)
+    except KeyError:
+        return None
+
+
+def fold(db, key, now=None):
+    """
+    Count an email as a repeat if its alert has an open issue within the window.
+
+    Args:
+        db: Database instance
+        key: Fingerprint from ``fingerprint()``
+        now: Current date (default: now)
+
+    Returns:
+        str: ID of the issue the email was folded into, or None if the email
+        should be handled normally
+    """
+    settings = detector_settings.get(db)
+    window = settings.dedup_window
+    entryid = _lookup(db, key)
+    if not window or entryid is None:
+        return None
+
+    now = now or date.Date(".")
+    entry = db.alertfingerprint.getnode(entryid)
+    issueid = entry.issue
+    if (
+        issueid is None
+        or db.issue.is_retired(issueid)
+        or now.timestamp() - entry.last_seen.timestamp() > window
+    ):
+        return None
+    ended = {settings.item_id("status", name) for name in ENDED_STATUSES} - {None}
+    if db.issue.get(issueid, "status") in ended:
+        return None
+
+    suppressed = (entry.suppressed or 0) + 1
+    db.alertfingerprint.set(entryid, suppressed=suppressed, last_seen=now)
+    logger.info(
+        "Suppressed repeated alert for issue%s (%d so far)",
+        issueid,
+        suppressed,
+        issue_id=issueid,
+        suppressed=suppressed,
+    )
+    return issueid
+
+
+def record(db, key, issueid, now=None):
+    """
+    Remember the fingerprint of an email that created an issue.
+
+    An expired entry for the same fingerprint is reused for the new issue.
+
+    Args:
+        db: Database instance
+        key: Fingerprint from ``fingerprint()``
+        issueid: ID of the created issue
+        now: Current date (default: now)
+    """
+    now = now or date.Date(".")
+    entryid = _lookup(db, key)
+    if entryid is None:
+        db.alertfingerprint.create(fingerprint=key, issue=issueid, last_seen=now, suppressed=0)
+    else:
+        db.alertfingerprint.set(entryid, issue=issueid, last_seen=now, suppressed=0)
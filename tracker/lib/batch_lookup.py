@@ -0,0 +1,118 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Batched property reads for detectors and actions.
+
+Roundup's ``Class.get()`` fetches one item per query, so loops such as "get
+the author of every new message" issue one SQL statement per item. These
+helpers read the same data for a whole list of items in one query per
+class on the SQL backends, and fall back to per-item ``get()`` calls on
+backends without SQL access.
+"""
+
+from roundup import hyperdb
+
+
+# Keep IN (...) lists well below SQLite's bound parameter limit
+CHUNK_SIZE = 500
+
+
+def _chunks(ids):
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start : start + CHUNK_SIZE]
+
+
+def _is_sql(db):
+    return hasattr(db, "sql") and hasattr(db, "arg")
+
+
+def _unique(nodeids):
+    return list(dict.fromkeys(str(nodeid) for nodeid in nodeids if nodeid))
+
+
+def existing_ids(db, classname, nodeids, retired=None):
+    """
+    Return the subset of ``nodeids`` that exist in ``classname``.
+
+    By default, like ``db.hasnode()``, retired items count as existing.
+
+    Args:
+        db: Database instance
+        classname: Class to look in
+        nodeids: Iterable of item IDs
+        retired: False for live items only, True for retired items only
+
+    Returns:
+        set: The IDs that exist
+    """
+    ids = [nodeid for nodeid in _unique(nodeids) if nodeid.isdigit() and int(nodeid) < 2**31]
+    if not ids:
+        return set()
+    cl = db.getclass(classname)
+    found = set()
+    for chunk in _chunks(ids):
+        found.update(cl.filter(None, {"id": chunk}, retired=retired))
+    return found
+
+
+def prefetch(db, classname, nodeids):
+    """
+    Load the single-valued properties of several items into the node cache.
+
+    Subsequent ``cl.get()`` calls for those items are served from the cache.
+
+    Args:
+        db: Database instance
+        classname: Class of the items
+        nodeids: Iterable of item IDs
+    """
+    cl = db.getclass(classname)
+    if not hasattr(cl, "filter_iter"):
+        return
+    cache = getattr(db, "cache", {})
+    ids = [nodeid for nodeid in _unique(nodeids) if (classname, nodeid) not in cache]
+    for chunk in _chunks(ids):
+        for _nodeid in cl.filter_iter(None, {"id": chunk}, retired=None):
+            pass
+
+
+def get_values(db, classname, nodeids, propname):
+    """
+    Read one property for several items.
+
+    Multilink properties are read from the link table with one query per
+    chunk of items; other properties are prefetched into the node cache.
+
+    Args:
+        db: Database instance
+        classname: Class of the items
+        nodeids: Iterable of item IDs
+        propname: Property to read
+
+    Returns:
+        dict: {nodeid: value}, in the order of ``nodeids``
+    """
+    ids = _unique(nodeids)
+    cl = db.getclass(classname)
+    prop = cl.getprops()[propname]
+
+    if isinstance(prop, hyperdb.Multilink) and _is_sql(db) and not prop.computed:
+        values = {nodeid: [] for nodeid in ids}
+        table = prop.table_name or f"{classname}_{propname}"
+        for chunk in _chunks(ids):
+            placeholders = ",".join([db.arg] * len(chunk))
+            db.sql(
+                f"select {prop.nodeid_name}, {prop.linkid_name} from {table} "
+                f"where {prop.nodeid_name} in ({placeholders})",
+                tuple(chunk),
+            )
+            for nodeid, linkid in db.sql_fetchall():
+                values[str(nodeid)].append(str(linkid))
+        for linkids in values.values():
+            linkids.sort(key=int)
+        return values
+
+    if not isinstance(prop, hyperdb.Multilink):
+        prefetch(db, classname, ids)
+    return {nodeid: cl.get(nodeid, propname) for nodeid in ids}
@@ -0,0 +1,181 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Move many issues or changes to a new status in one transaction.
+
+The whole batch is validated before anything is written: every item must
+exist and not be retired, the user must be allowed to edit its status and the move must be
+allowed by ``workflow``. If any item fails, nothing is changed and
+``BatchTransitionError`` lists every failing item. Otherwise all items are
+set and the caller commits once.
+
+Used by the ``batch_status`` web action and the
+``POST /rest/data/<class>/@batch_status`` REST endpoint
+(``extensions/batch_actions.py``).
+"""
+
+import re
+
+import batch_lookup
+import detector_settings
+import workflow
+
+
+# Upper bound on the number of items in one request
+MAX_BATCH_SIZE = 1000
+
+# "12" or a designator such as "issue12"
+_ITEM_ID = re.compile(r"^([a-z_]*)(\d+)$", re.IGNORECASE)
+
+
+class BatchTransitionError(ValueError):
+    """Raised when a batch cannot be applied; ``errors`` holds (item id, reason) pairs."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(
+            "; ".join(f"{itemid}: {reason}" if itemid else reason for itemid, reason in errors)
+        )
+
+
+def parse_item_ids(values, classname):
+    """
+    Normalize item IDs given as lists and/or comma-separated strings.
+
+    Args:
+        values: Iterable of strings such as "12", "12,13" or "issue12"
+        classname: Class of the items; designators must be of this class
+
+    Returns:
+        list: Unique item IDs without class prefix, in input order
+
+    Raises:
+        BatchTransitionError: Listing every entry that is not an ID or a
+        designator of ``classname``
+    """
+    itemids, errors = [], []
+    for value in values:
+        for part in str(value).split(","):
+            part = part.strip()
+            if not part:
+                continue
+            match = _ITEM_ID.match(part)
+            if match is None:
+                errors.append((part, "not an item id"))
+            elif match.group(1) and match.group(1).lower() != classname:
+                errors.append((part, f"not in class {classname}"))
+            elif match.group(2) not in itemids:
+                itemids.append(match.group(2))
+    if errors:
+        raise BatchTransitionError(errors)
+    return itemids
+
+
+def resolve_status(db, classname, status):
+    """
+    Resolve a status name or ID for a class with a workflow.
+
+    Args:
+        db: Database instance
+        classname: "issue" or "change"
+        status: Status name or ID
+
+    Returns:
+        str: Status ID
+
+    Raises:
+        BatchTransitionError: If the class has no workflow or the status is unknown
+    """
+    if classname not in workflow.WORKFLOWS:
+        raise BatchTransitionError([(None, f"{classname} has no status workflow")])
+    status_classname = workflow.WORKFLOWS[classname][0]
+    status = (status or "").strip()
+    status_id = detector_settings.get(db).item_id(status_classname, status)
+    if status_id is None and status.isdigit() and db.getclass(status_classname).hasnode(status):
+        status_id = status
+    if status_id is None:
+        raise BatchTransitionError([(None, f"unknown {status_classname} {status!r}")])
+    return status_id
+
+
+def validate(db, userid, classname, itemids, status):
+    """
+    Check a whole batch without changing anything.
+
+    Args:
+        db: Database instance
+        userid: User performing the change
+        classname: "issue" or "change"
+        itemids: Item IDs (see ``parse_item_ids()``)
+        status: Target status name or ID
+
+    Returns:
+        tuple: (status ID, IDs of the items whose status changes)
+
+    Raises:
+        BatchTransitionError: Listing every item that cannot be moved
+    """
+    status_id = resolve_status(db, classname, status)
+    if not itemids:
+        raise BatchTransitionError([(None, "no items selected")])
+    if len(itemids) > MAX_BATCH_SIZE:
+        raise BatchTransitionError([(None, f"at most {MAX_BATCH_SIZE} items per batch")])
+
+    errors = []
+    # retired items cannot change status
+    existing = batch_lookup.existing_ids(db, classname, itemids, retired=False)
+    current = batch_lookup.get_values(
+        db, classname, [i for i in itemids if i in existing], "status"
+    )
+    status_class = db.getclass(workflow.WORKFLOWS[classname][0])
+    todo = []
+    for itemid in itemids:
+        if itemid not in existing:
+            errors.append((f"{classname}{itemid}", "no such item"))
+        elif not db.security.hasPermission(
+            "Edit", userid, classname, property="status", itemid=itemid
+        ):
+            errors.append((f"{classname}{itemid}", "permission denied"))
+        elif current[itemid] == status_id:
+            continue
+        elif not workflow.is_allowed(db, classname, current[itemid], status_id):
+            current_name = status_class.get(current[itemid], "name") if current[itemid] else None
+            errors.append(
+                (
+                    f"{classname}{itemid}",
+                    f"invalid status transition: {current_name} -> "
+                    f"{status_class.get(status_id, 'name')}",
+                )
+            )
+        else:
+            todo.append(itemid)
+    if errors:
+        raise BatchTransitionError(errors)
+    return status_id, todo
+
+
+def apply(db, userid, classname, itemids, status):
+    """
+    Validate a batch and set the new status on every item.
+
+    The caller commits (or rolls back if an auditor rejects an item).
+
+    Args:
+        db: Database instance
+        userid: User performing the change
+        classname: "issue" or "change"
+        itemids: Item IDs (see ``parse_item_ids()``)
+        status: Target status name or ID
+
+    Returns:
+        list: IDs of the items that changed status
+
+    Raises:
+        BatchTransitionError: If validation fails; nothing is changed
+    """
+    status_id, todo = validate(db, userid, classname, itemids, status)
+    cl = db.getclass(classname)
+    for itemid in todo:
+        cl.set(itemid, status=status_id)
+    return todo
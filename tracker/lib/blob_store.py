@@ -0,0 +1,339 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Content-addressed, deduplicated storage for msg and file content.
+
+Roundup keeps the content of every FileClass item in its own file under
+``db/files/<class>/``. With the blob store, content is written once to
+``db/blobs/<aa>/<sha256>`` and the item file is a hard link to that blob:
+identical attachments share one copy on disk, and storing content that is
+already known is a link instead of a write.
+
+The hard link count is the reference count: a blob with N links is used by
+N - 1 items. Roundup never rewrites an item file in place (new content goes
+to a temporary file that is renamed over it on commit, a rollback removes
+the temporary file) and deletes the file when an item is destroyed, so the
+count follows commits, rollbacks and edits without any bookkeeping in the
+database. Blobs that no item uses any more are removed with::
+
+    ./scripts/pms-admin.py gc-blobs
+
+Trackers with content stored before the blob store existed are converted
+with ``pms-admin.py dedupe-files``. Backups must preserve hard links
+(``rsync -H``, ``tar``) to keep the savings.
+
+Message bodies can also be compressed (``[blobstore] compression`` in
+``detectors/config.ini``: none, zlib or lzma). Compressed content starts with
+a header naming the algorithm and is decoded in chunks by ``db.getfile()``,
+so templates, mail, REST and the full-text indexer see plain text.
+Compressed blobs are named ``<sha256>.<algorithm>`` after the uncompressed
+content, so known bodies are linked without compressing them again.
+``pms-admin.py compress-messages`` converts existing messages to the
+configured compression.
+"""
+
+import functools
+import hashlib
+import lzma
+import os
+import tempfile
+import time
+import zlib
+
+import detector_log
+import detector_settings
+
+
+logger = detector_log.get_logger(__name__)
+
+# FileClasses whose content goes through the blob store
+CLASSES = ("msg", "file")
+
+# FileClasses whose content is compressed (attachments are often compressed already)
+COMPRESSED_CLASSES = ("msg",)
+
+# Content below this size (bytes) is not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+# Stored content of compressed bodies starts with one of these headers;
+# text never starts with a NUL byte
+HEADERS = {"zlib": b"\x00PMSz", "lzma": b"\x00PMSx"}
+HEADER_SIZE = 5
+
+READ_CHUNK_SIZE = 64 * 1024
+
+BLOB_DIR = "blobs"
+
+# Temporary files older than this (seconds) are left over from a crash
+STALE_TEMP_AGE = 3600
+
+
+def compression_for(db, classname, content):
+    """Return the compression to store ``content`` of ``classname`` with."""
+    if classname not in COMPRESSED_CLASSES or len(content) < MIN_COMPRESS_SIZE:
+        return "none"
+    return detector_settings.get(db).compression
+
+
+def encode(content, compression):
+    """Return content as stored with the given compression."""
+    if compression == "zlib":
+        return HEADERS["zlib"] + zlib.compress(content)
+    if compression == "lzma":
+        return HEADERS["lzma"] + lzma.compress(content)
+    return content
+
+
+def _decompressor(header):
+    if header == HEADERS["zlib"]:
+        return zlib.decompressobj()
+    if header == HEADERS["lzma"]:
+        return lzma.LZMADecompressor()
+    return None
+
+
+def stored_compression(path):
+    """Return the compression of a stored file ("none" if not compressed)."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    for compression, value in HEADERS.items():
+        if header == value:
+            return compression
+    return "none"
+
+
+def read(path):
+    """
+    Read a stored file, decoding compressed content in chunks.
+
+    Args:
+        path: Item file or blob
+
+    Returns:
+        bytes: Uncompressed content
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+        decompressor = _decompressor(header)
+        if decompressor is None:
+            return header + f.read()
+        chunks = []
+        while chunk := f.read(READ_CHUNK_SIZE):
+            chunks.append(decompressor.decompress(chunk))
+        return b"".join(chunks)
+
+
+def getfile(db, classname, nodeid, property_):
+    """Replacement for ``db.getfile()`` that decodes compressed message bodies."""
+    if classname not in COMPRESSED_CLASSES:
+        return db.__class__.getfile(db, classname, nodeid, property_)
+    return read(db.filename(classname, nodeid, property_))
+
+
+def blob_path(db, digest, compression="none"):
+    """Return the path of the blob for a SHA-256 hex digest of uncompressed content."""
+    name = digest if compression == "none" else f"{digest}.{compression}"
+    return os.path.join(db.dir, BLOB_DIR, digest[:2], name)
+
+
+def store(db, content, compression="none"):
+    """
+    Store content in the blob store unless it is already there.
+
+    Args:
+        db: Database instance
+        content: Uncompressed content as bytes
+        compression: "none", "zlib" or "lzma"
+
+    Returns:
+        str: Path of the blob holding the content
+    """
+    path = blob_path(db, hashlib.sha256(content).hexdigest(), compression)
+    if os.path.exists(path):
+        return path
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    os.umask(db.umask)
+    fd, temp = tempfile.mkstemp(prefix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(encode(content, compression))
+        # link, not rename: a blob that appeared meanwhile must keep its inode
+        os.link(temp, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(temp)
+    return path
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _link_over(blob, path):
+    """Atomically replace ``path`` by a hard link to ``blob``."""
+    temp = path + ".relink"
+    _unlink(temp)
+    os.link(blob, temp)
+    os.replace(temp, path)
+
+
+def storefile(db, classname, nodeid, property_, content):
+    """
+    Replacement for ``db.storefile()`` that links content from the blob store.
+
+    The temporary item file is a hard link to the blob; Roundup renames it to
+    the item file on commit or removes it on rollback as usual. Other classes,
+    and any filesystem error (e.g. no hard link support), fall back to
+    Roundup's own copy.
+    """
+    temp = db._tempfile(db.filename(classname, nodeid, property_, create=1))
+    # a temporary file from an earlier store in this transaction may be a
+    # link to a blob; writing into it would change the blob
+    _unlink(temp)
+
+    compression = "none" if property_ else compression_for(db, classname, content)
+
+    if classname in CLASSES and property_ is None:
+        try:
+            blob = store(db, content, compression)
+            os.makedirs(os.path.dirname(temp), exist_ok=True)
+            os.link(blob, temp)
+        except OSError as error:
+            logger.warning(
+                "Storing %s%s without blob store: %s",
+                classname,
+                nodeid,
+                error,
+                classname=classname,
+                nodeid=nodeid,
+            )
+        else:
+            if not db._editInProgress(classname, nodeid, property_):
+                db.transactions.append((db.doStoreFile, (classname, nodeid, property_)))
+            return
+
+    db.__class__.storefile(db, classname, nodeid, property_, encode(content, compression))
+
+
+def install(db):
+    """Route msg and file content of this database through the blob store."""
+    if isinstance(db.__dict__.get("storefile"), functools.partial):
+        return
+    db.storefile = functools.partial(storefile, db)
+    db.getfile = functools.partial(getfile, db)
+
+
+def dedupe_files(db):
+    """
+    Move existing msg and file content into the blob store.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        tuple: (number of item files converted, bytes freed)
+    """
+    converted = freed = 0
+    for classname in CLASSES:
+        for nodeid in db.getclass(classname).getnodeids(retired=None):
+            try:
+                path = db.filename(classname, nodeid)
+            except OSError:
+                continue
+            if path.endswith(db.tempext) or os.stat(path).st_nlink > 1:
+                continue
+
+            if classname in COMPRESSED_CLASSES:
+                compression, content = stored_compression(path), read(path)
+            else:
+                with open(path, "rb") as f:
+                    compression, content = "none", f.read()
+            blob = blob_path(db, hashlib.sha256(content).hexdigest(), compression)
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            try:
+                # unique content: the item file itself becomes the blob
+                os.link(path, blob)
+                converted += 1
+                continue
+            except FileExistsError:
+                pass
+
+            size = os.path.getsize(path)
+            _link_over(blob, path)
+            converted += 1
+            freed += size
+    return converted, freed
+
+
+def compress_messages(db):
+    """
+    Store every message body with the configured compression.
+
+    Also decompresses messages when compression is set to "none".
+
+    Args:
+        db: Database instance
+
+    Returns:
+        tuple: (number of messages converted, bytes before, bytes after)
+    """
+    converted = before = after = 0
+    for nodeid in db.getclass("msg").getnodeids(retired=None):
+        try:
+            path = db.filename("msg", nodeid)
+        except OSError:
+            continue
+        if path.endswith(db.tempext):
+            continue
+        content = read(path)
+        compression = compression_for(db, "msg", content)
+        if stored_compression(path) == compression:
+            continue
+
+        before += os.path.getsize(path)
+        blob = store(db, content, compression)
+        try:
+            _link_over(blob, path)
+        except OSError:
+            with open(path + ".relink", "wb") as f:
+                f.write(encode(content, compression))
+            os.replace(path + ".relink", path)
+        after += os.path.getsize(path)
+        converted += 1
+    return converted, before, after
+
+
+def gc(db):
+    """
+    Remove blobs that no item file links to any more.
+
+    Safe while the tracker is running: removing a blob only removes its name,
+    so an item linked to it at the same moment keeps its content.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        tuple: (number of blobs removed, bytes freed)
+    """
+    removed = freed = 0
+    stale = time.time() - STALE_TEMP_AGE
+    for directory, _subdirs, names in os.walk(os.path.join(db.dir, BLOB_DIR)):
+        for name in names:
+            path = os.path.join(directory, name)
+            stat = os.stat(path)
+            if name.startswith(".tmp"):
+                if stat.st_mtime < stale:
+                    _unlink(path)
+            elif stat.st_nlink == 1:
+                _unlink(path)
+                removed += 1
+                freed += stat.st_size
+    return removed, freed
@@ -0,0 +1,210 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Create and update many issues, changes, CIs and CI relationships at once.
+
+Automation (monitoring alerts, inventory imports) would otherwise need one
+REST request, and one commit, per item. A bulk request carries a list of
+operations::
+
+    {"op": "create", "class": "issue", "props": {"title": "Disk full", "priority": "urgent"}}
+    {"op": "update", "class": "ci", "id": "12", "props": {"status": "retired"}}
+
+Property values are given as in the web interface and the REST API (names
+or IDs of linked items, lists or comma-separated strings for Multilinks).
+Each operation is checked against the user's permissions and goes through
+the class detectors like a single create or set. An operation that fails
+(unknown property, permission denied, rejected by an auditor) is reported
+and leaves nothing behind; the others are still applied.
+
+The operations are committed every ``chunk_size`` operations (at most
+``MAX_CHUNK_SIZE``), so a long import keeps its transactions short and what
+was committed survives a later failure. Until then nothing is committed, on
+sqlite too (``lib/sqlite_ids.py``): an unexpected error rolls back the
+current chunk. On sqlite a chunk holds the database write lock from its
+first write until its commit, so the chunk size bounds how long web users
+wait for a bulk request.
+
+Used by ``POST /rest/data/@bulk`` (``extensions/bulk_rest.py``).
+"""
+
+import detector_log
+import sqlite_ids
+from roundup import hyperdb
+from roundup.exceptions import Reject
+
+
+logger = detector_log.get_logger(__name__)
+
+# Classes that bulk operations can create and update
+BULK_CLASSES = ("issue", "change", "ci", "cirelationship")
+
+# Upper bound on the number of operations in one request
+MAX_OPERATIONS = 1000
+
+# Operations per transaction, by default and at most
+DEFAULT_CHUNK_SIZE = 100
+MAX_CHUNK_SIZE = 250
+
+OPERATIONS = ("create", "update")
+
+
+class BulkOperationError(ValueError):
+    """Raised for one operation; ``status`` is the matching HTTP status code."""
+
+    def __init__(self, message, status=400):
+        self.status = status
+        super().__init__(message)
+
+
+def parse_operations(operations):
+    """
+    Check the structure of a list of operations.
+
+    Args:
+        operations: Decoded JSON list of ``{"op", "class", "id", "props"}`` dicts
+
+    Returns:
+        list: ``(op, classname, item ID or None, props)`` tuples
+
+    Raises:
+        ValueError: If the list or one of its operations is malformed; nothing
+        is applied in that case
+    """
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("operations must be a non-empty list")
+    if len(operations) > MAX_OPERATIONS:
+        raise ValueError(f"at most {MAX_OPERATIONS} operations per request")
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise ValueError(f"operation {index}: not an object")
+        op = operation.get("op")
+        classname = operation.get("class")
+        itemid = operation.get("id")
+        props = operation.get("props", {})
+        if op not in OPERATIONS:
+            raise ValueError(f"operation {index}: op must be one of {', '.join(OPERATIONS)}")
+        if classname not in BULK_CLASSES:
+            raise ValueError(f"operation {index}: class must be one of {', '.join(BULK_CLASSES)}")
+        if op == "update" and not str(itemid or "").isdigit():
+            raise ValueError(f"operation {index}: update needs the item id")
+        if not isinstance(props, dict) or (op == "update" and not props):
+            raise ValueError(f"operation {index}: props must be an object of property values")
+        parsed.append((op, classname, str(itemid) if op == "update" else None, props))
+    return parsed
+
+
+def convert_props(db, userid, classname, itemid, props):
+    """
+    Convert the raw values of one operation and check the user may set them.
+
+    Args:
+        db: Database instance
+        userid: User performing the operation
+        classname: Class of the item
+        itemid: Item ID, or None for a new item
+        props: ``{property: raw value}``
+
+    Returns:
+        dict: Property values ready for ``create()`` or ``set()``
+
+    Raises:
+        BulkOperationError: With status 403 (permission), 404 (no such item)
+        or 400 (invalid property or value)
+    """
+    cl = db.getclass(classname)
+    permission = "Edit" if itemid else "Create"
+    if itemid and not cl.hasnode(itemid):
+        raise BulkOperationError(f"{classname}{itemid} does not exist", 404)
+    if not db.security.hasPermission(permission, userid, classname, itemid=itemid):
+        raise BulkOperationError(f"Permission to {permission.lower()} {classname} denied", 403)
+
+    values = {}
+    for name, raw in props.items():
+        if name not in cl.getprops(protected=False):
+            raise BulkOperationError(f"{name!r} is not a property of {classname}")
+        if not db.security.hasPermission(
+            permission, userid, classname, property=name, itemid=itemid
+        ):
+            raise BulkOperationError(
+                f"Permission to {permission.lower()} {classname}.{name} denied", 403
+            )
+        if raw is None or raw == "" or raw == []:
+            values[name] = None
+            continue
+        if not isinstance(raw, (str, list)):
+            raw = str(raw)
+        try:
+            values[name] = hyperdb.rawToHyperdb(db, cl, itemid, name, raw)
+        except hyperdb.HyperdbValueError as message:
+            raise BulkOperationError(str(message)) from None
+    return values
+
+
+def _apply_one(db, userid, op, classname, itemid, props):
+    """Run one operation; return the item ID."""
+    cl = db.getclass(classname)
+    values = convert_props(db, userid, classname, itemid, props)
+    try:
+        if op == "create":
+            return cl.create(**values)
+        cl.set(itemid, **values)
+        return itemid
+    except (Reject, ValueError, TypeError, IndexError) as message:
+        raise BulkOperationError(str(message)) from None
+    except KeyError as message:
+        raise BulkOperationError(f"Must provide the {message} property") from None
+
+
+def apply(db, userid, operations, chunk_size=None):
+    """
+    Apply operations in order, committing every ``chunk_size`` operations.
+
+    Args:
+        db: Database instance
+        userid: User performing the operations
+        operations: Output of ``parse_operations()``
+        chunk_size: Operations per transaction (default ``DEFAULT_CHUNK_SIZE``,
+            capped at ``MAX_CHUNK_SIZE``)
+
+    Returns:
+        list: One result per operation, in order:
+        ``{"op", "class", "id", "status"}`` (201 created, 200 updated) or
+        ``{"op", "class", "id", "status", "error"}`` for failed operations
+    """
+    chunk_size = min(chunk_size or DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE)
+    results = []
+    pending = 0
+    # create() would otherwise commit on every new ID
+    sqlite_ids.install(db)
+    try:
+        for op, classname, itemid, props in operations:
+            result = {"op": op, "class": classname, "id": itemid}
+            try:
+                result["id"] = _apply_one(db, userid, op, classname, itemid, props)
+                result["status"] = 201 if op == "create" else 200
+            except BulkOperationError as error:
+                result.update(status=error.status, error=str(error))
+            results.append(result)
+            pending += 1
+            if pending >= chunk_size:
+                db.commit()
+                pending = 0
+        if pending:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        sqlite_ids.uninstall(db)
+
+    failed = sum(1 for result in results if result["status"] >= 400)
+    logger.info(
+        "Applied bulk operations",
+        operations=len(results),
+        failed=failed,
+        chunk_size=chunk_size,
+    )
+    return results
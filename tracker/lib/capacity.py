@@ -0,0 +1,183 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Range filters and capacity aggregates over CI hardware fields.
+
+Roundup only searches Number properties for equal values. The CMDB list,
+the capacity report (``ci?@template=capacity``) and
+``GET /rest/data/ci/@aggregate`` take range conditions instead::
+
+    ram_gb=>=64        at least 64
+    cpu_cores=<8       less than 8
+    capacity_gb=1000..4000   from 1000 to 4000 inclusive
+    ports=48           exactly 48
+
+``matching_ids()`` turns the conditions of several properties into one SQL
+``where`` clause and returns the IDs of the live items that satisfy them
+all. ``aggregate()`` reads the grouping property and the numeric properties
+of the selected items in one query and, in a single pass, collects count,
+sum, average, minimum, maximum and percentiles per group (e.g. per CI type,
+location or owner).
+"""
+
+import re
+
+from roundup import hyperdb
+
+
+# CI hardware properties offered in the list filters and the capacity report
+CI_NUMBER_PROPS = ("cpu_cores", "ram_gb", "ports", "capacity_gb")
+
+# CI properties the capacity report can group by
+CI_GROUP_PROPS = ("type", "status", "criticality", "location", "owner")
+
+PERCENTILES = (50, 90, 95)
+
+_CONDITION = re.compile(r"^(>=|<=|>|<|=)?\s*(-?\d+(?:\.\d+)?)$")
+_RANGE = re.compile(r"^(-?\d+(?:\.\d+)?)\s*\.\.\s*(-?\d+(?:\.\d+)?)$")
+
+
+def parse_range(spec):
+    """
+    Parse a range condition.
+
+    Args:
+        spec: ">=64", "<8", "=48", "48" or "1000..4000"
+
+    Returns:
+        list: ``(operator, number)`` conditions, all of which must hold
+
+    Raises:
+        ValueError: If ``spec`` is not a range condition
+    """
+    spec = spec.strip()
+    match = _RANGE.match(spec)
+    if match:
+        low, high = float(match.group(1)), float(match.group(2))
+        if low > high:
+            raise ValueError(f"empty range {spec!r}")
+        return [(">=", low), ("<=", high)]
+    match = _CONDITION.match(spec)
+    if not match:
+        raise ValueError(f"{spec!r} is not a range (e.g. >=64, <8, 16..32)")
+    return [(match.group(1) or "=", float(match.group(2)))]
+
+
+def _number_prop(db, classname, name):
+    """Check that ``name`` is a Number property of the class."""
+    prop = db.getclass(classname).getprops().get(name)
+    if not isinstance(prop, hyperdb.Number):
+        raise ValueError(f"{classname}.{name} is not a Number property")
+
+
+def matching_ids(db, classname, ranges):
+    """
+    Return the live items whose numeric properties are in some ranges.
+
+    Args:
+        db: Database instance
+        classname: Class of the items, e.g. "ci"
+        ranges: ``{property: range condition}``; empty conditions are ignored
+
+    Returns:
+        list: Item IDs (numerically sorted), or None if no condition was given
+
+    Raises:
+        ValueError: If a property is not a Number or a condition is invalid
+    """
+    where, args = [], []
+    for name, spec in ranges.items():
+        if not spec or not spec.strip():
+            continue
+        _number_prop(db, classname, name)
+        for operator, number in parse_range(spec):
+            where.append(f"_{name} {operator} {db.arg}")
+            args.append(number)
+    if not where:
+        return None
+    db.sql(
+        f"select id from _{classname} where __retired__ = 0 and " + " and ".join(where),
+        tuple(args),
+    )
+    return sorted((str(row[0]) for row in db.cursor.fetchall()), key=int)
+
+
+def percentile(values, percent):
+    """Return a percentile of sorted values, interpolating between neighbours."""
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _label(db, classname, group_by, value):
+    """Return the display label of a group value."""
+    if value is None:
+        return ""
+    prop = db.getclass(classname).getprops()[group_by]
+    if isinstance(prop, hyperdb.Link):
+        linkcl = db.getclass(prop.classname)
+        return linkcl.get(str(value), linkcl.labelprop())
+    return str(value)
+
+
+def aggregate(db, classname, group_by, props, itemids=None):
+    """
+    Summarize numeric properties per value of a grouping property.
+
+    Args:
+        db: Database instance
+        classname: Class of the items, e.g. "ci"
+        group_by: Link or String property to group by, e.g. "type"
+        props: Number properties to summarize
+        itemids: Only summarize these items, if not None
+
+    Returns:
+        list: One dict per group, ordered by label::
+
+            {"group": "1", "label": "Server", "count": 42,
+             "fields": {"ram_gb": {"count": 40, "sum": ..., "avg": ...,
+                                   "min": ..., "max": ..., "p50": ..., ...}}}
+
+        ``group`` is the Link ID or String value (None for items without one).
+
+    Raises:
+        ValueError: If ``group_by`` or a property cannot be used
+    """
+    group_prop = db.getclass(classname).getprops().get(group_by)
+    if not isinstance(group_prop, (hyperdb.Link, hyperdb.String)):
+        raise ValueError(f"cannot group {classname} by {group_by!r}")
+    for name in props:
+        _number_prop(db, classname, name)
+    if itemids is not None:
+        itemids = {str(itemid) for itemid in itemids}
+
+    columns = ", ".join(["id", f"_{group_by}"] + [f"_{name}" for name in props])
+    db.sql(f"select {columns} from _{classname} where __retired__ = 0")
+    groups = {}
+    for itemid, group, *numbers in db.cursor.fetchall():
+        if itemids is not None and str(itemid) not in itemids:
+            continue
+        group = str(group) if group is not None else None
+        counted = groups.setdefault(group, {"count": 0, "values": [[] for _name in props]})
+        counted["count"] += 1
+        for values, number in zip(counted["values"], numbers):
+            if number is not None:
+                values.append(number)
+
+    result = []
+    for group, counted in groups.items():
+        fields = {}
+        for name, values in zip(props, counted["values"]):
+            values.sort()
+            summary = {"count": len(values), "sum": sum(values)}
+            if values:
+                summary.update(avg=summary["sum"] / len(values), min=values[0], max=values[-1])
+                for percent in PERCENTILES:
+                    summary[f"p{percent}"] = percentile(values, percent)
+            fields[name] = summary
+        label = _label(db, classname, group_by, group)
+        result.append({"group": group, "label": label, "count": counted["count"], "fields": fields})
+    result.sort(key=lambda row: (row["group"] is None, row["label"].lower()))
+    return result
@@ -0,0 +1,170 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Low-overhead structured logging for detectors.
+
+Detectors run inside the save path of every change, so their logging must
+cost next to nothing when a level is disabled and must never block on I/O:
+
+- ``DetectorLogger`` checks the level before building anything. Fields are
+  passed as keyword arguments and become ``extra`` attributes of the record;
+  a callable field is only evaluated when the record is actually emitted::
+
+      log = detector_log.get_logger("detectors.ci_relationship_validator")
+      log.debug("Validator called", nodeid=nodeid, fields=lambda: sorted(newvalues))
+
+- All ``pms.*`` loggers hand their records to a ``QueueHandler``. A
+  ``QueueListener`` thread passes them on to the handlers configured for the
+  root logger (``[logging]`` in ``config.ini``), so file or syslog writes
+  happen in the background. The queue is bounded; when the writer cannot keep
+  up, records are dropped and counted rather than slowing down saves.
+
+Detectors cannot use ``logging.getLogger(__name__)``: Roundup executes them
+without a module name, so ``__name__`` is ``"builtins"`` there.
+"""
+
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+ROOT_LOGGER = "pms"
+
+QUEUE_SIZE = 10000
+
+# LogRecord attributes that fields must not overwrite
+_RESERVED = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+_listener = None
+
+
+class _BoundedQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _RootForwarder(logging.Handler):
+    """Pass records from the queue to the root logger's handlers."""
+
+    def __init__(self, queue_handler):
+        super().__init__()
+        self.queue_handler = queue_handler
+
+    def emit(self, record):
+        root = logging.getLogger()
+        dropped, self.queue_handler.dropped = self.queue_handler.dropped, 0
+        if dropped:
+            root.handle(
+                logging.makeLogRecord(
+                    {
+                        "name": ROOT_LOGGER,
+                        "levelno": logging.WARNING,
+                        "levelname": "WARNING",
+                        "msg": f"{dropped} log record(s) dropped: log queue full",
+                    }
+                )
+            )
+        root.handle(record)
+
+
+def start():
+    """Route ``pms.*`` records through a queue to a background writer thread."""
+    global _listener
+    if _listener is not None:
+        return
+    logger = logging.getLogger(ROOT_LOGGER)
+    for handler in [h for h in logger.handlers if isinstance(h, _BoundedQueueHandler)]:
+        logger.removeHandler(handler)
+
+    queue_handler = _BoundedQueueHandler(queue.Queue(QUEUE_SIZE))
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+    _listener = QueueListener(queue_handler.queue, _RootForwarder(queue_handler))
+    _listener.start()
+
+
+def stop():
+    """Write out queued records and stop the writer thread."""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+
+
+def _restart_in_child():
+    # the writer thread does not survive fork() (e.g. forking roundup-server)
+    global _listener
+    if _listener is not None:
+        _listener = None
+        start()
+
+
+atexit.register(stop)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_in_child)
+
+
+class DetectorLogger:
+    """Logger wrapper with level guards and lazily evaluated fields."""
+
+    __slots__ = ("logger",)
+
+    def __init__(self, logger):
+        self.logger = logger
+
+    def isEnabledFor(self, level):  # noqa: N802 - mirrors logging.Logger
+        """Return True if records of ``level`` would be emitted."""
+        return self.logger.isEnabledFor(level)
+
+    def _log(self, level, msg, args, fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        extra = {}
+        for key, value in fields.items():
+            if key in _RESERVED:
+                key = f"field_{key}"
+            extra[key] = value() if callable(value) else value
+        self.logger.log(level, msg, *args, extra=extra, stacklevel=3)
+
+    def debug(self, msg, *args, **fields):
+        """Log ``msg % args`` at DEBUG with ``fields`` as record attributes."""
+        self._log(logging.DEBUG, msg, args, fields)
+
+    def info(self, msg, *args, **fields):
+        """Log ``msg % args`` at INFO with ``fields`` as record attributes."""
+        self._log(logging.INFO, msg, args, fields)
+
+    def warning(self, msg, *args, **fields):
+        """Log ``msg % args`` at WARNING with ``fields`` as record attributes."""
+        self._log(logging.WARNING, msg, args, fields)
+
+    def error(self, msg, *args, **fields):
+        """Log ``msg % args`` at ERROR with ``fields`` as record attributes."""
+        self._log(logging.ERROR, msg, args, fields)
+
+
+def get_logger(name):
+    """
+    Return a detector logger, starting the background writer if needed.
+
+    Args:
+        name: Logger name below ``pms``, e.g. "detectors.status_workflow"
+
+    Returns:
+        DetectorLogger: Logger named ``pms.<name>``
+    """
+    start()
+    return DetectorLogger(logging.getLogger(f"{ROOT_LOGGER}.{name}"))
@@ -0,0 +1,133 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Typed detector settings shared by all detectors.
+
+``detectors/config.ini`` options are parsed once per open database (i.e. per
+``tracker.open()``) instead of on every auditor call, and the IDs of status
+items are looked up once and kept until a status item changes::
+
+    settings = detector_settings.get(db)
+    if settings.chatting_requires_two_users: ...
+    chatting_id = settings.item_id("status", "chatting")
+
+New options are declared in ``OPTIONS`` together with their Roundup option
+type and default value.
+"""
+
+import detector_log
+from roundup.configuration import (
+    BooleanOption,
+    IntegerNumberGeqZeroOption,
+    Option,
+    OptionValueError,
+    WordListOption,
+)
+
+
+logger = detector_log.get_logger(__name__)
+
+
+class CompressionOption(Option):
+    """Compression of stored message bodies: none, zlib, lzma"""
+
+    class_description = "Allowed values: none, zlib, lzma"
+
+    def str2value(self, value):
+        _val = value.lower()
+        if _val in ("none", "zlib", "lzma"):
+            return _val
+        raise OptionValueError(self, value, self.class_description)
+
+
+# attribute name: (config.ini section, option type, default)
+OPTIONS = {
+    "chatting_requires_two_users": ("statusauditor", BooleanOption, False),
+    "coalesce_window": ("nosyreaction", IntegerNumberGeqZeroOption, 0),
+    "digest_hour": ("nosyreaction", IntegerNumberGeqZeroOption, 7),
+    "max_body_size": ("messagesummary", IntegerNumberGeqZeroOption, 256 * 1024),
+    "compression": ("blobstore", CompressionOption, "none"),
+    "dedup_window": ("alertdedup", IntegerNumberGeqZeroOption, 0),
+    "deferred_classes": ("fulltext", WordListOption, []),
+    "search_cache_size": ("searchcache", IntegerNumberGeqZeroOption, 256),
+}
+
+
+def _parse_option(config, name, section, option_class, default):
+    """Parse one option, falling back to ``default`` if missing or invalid."""
+    key = f"{section}_{name}".upper()
+    try:
+        raw = config.detectors[key]
+    except KeyError:
+        # also catches InvalidOptionError for options missing from config.ini
+        return default
+    try:
+        return option_class(None, f"detector::{section.capitalize()}", name.upper()).str2value(raw)
+    except OptionValueError:
+        logger.warning(
+            "Invalid value for [%s] %s in detectors/config.ini: %r",
+            section,
+            name,
+            raw,
+            section=section,
+            option=name,
+            value=raw,
+        )
+        return default
+
+
+class DetectorSettings:
+    """Parsed detector options and cached item IDs for one open database."""
+
+    def __init__(self, db):
+        self._db = db
+        self._item_ids = {}
+        self._watched = set()
+        for name, (section, option_class, default) in OPTIONS.items():
+            setattr(self, name, _parse_option(db.config, name, section, option_class, default))
+
+    def item_id(self, classname, name):
+        """
+        Return the ID of a keyed item (e.g. a status) by name.
+
+        Args:
+            classname: Class of the item, e.g. "status" or "changestatus"
+            name: Key value of the item
+
+        Returns:
+            str: Item ID, or None if no live item has that name
+        """
+        if classname not in self._item_ids:
+            cl = self._db.getclass(classname)
+            key = cl.getkey()
+            self._item_ids[classname] = {
+                cl.get(itemid, key): itemid for itemid in cl.getnodeids(retired=False)
+            }
+            if classname not in self._watched:
+                # forget the IDs whenever an item of the class changes
+                for event in ("create", "set", "retire", "restore"):
+                    cl.react(event, self._forget_item_ids)
+                self._watched.add(classname)
+        return self._item_ids[classname].get(name)
+
+    def _forget_item_ids(self, db, cl, nodeid, oldvalues):
+        self._item_ids.pop(cl.classname, None)
+
+
+def get(db):
+    """
+    Return the detector settings of an open database.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        DetectorSettings: Settings parsed on first use for this database
+    """
+    # Detectors get a weakref.proxy of the database, so the settings are
+    # stored in the instance dict of the database object itself
+    settings = db.__dict__.get("_detector_settings")
+    if settings is None:
+        settings = db.__dict__["_detector_settings"] = DetectorSettings(db)
+    return settings
@@ -0,0 +1,174 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Property directives embedded in email messages.
+
+A message can carry one or more bracketed directives, e.g.::
+
+    [status=in-progress] [priority=urgent]
+    [assignedto=alice;keyword=+network,-storage]
+    [affected_cis=web-01,db-01]
+
+``=`` and ``:`` are both accepted as separators and several assignments can
+share one bracket when separated by ``;``. For Multilink properties a plain
+comma-separated list replaces the current value, while ``+name`` and
+``-name`` add or remove single entries. A CI name that does not exist as
+written ("dbserver01" for "db-srv-01") is resolved to the CI with the most
+similar name, if there is a clear one (see ``name_index.best_match()``).
+
+Directives are resolved against the database in one pass so that all of
+them can be applied to an issue with a single ``set()``.
+"""
+
+import re
+
+import detector_log
+import name_index
+from roundup import hyperdb
+
+
+logger = detector_log.get_logger(__name__)
+
+# Properties that may be changed by directives, in application order
+DIRECTIVE_PROPERTIES = ("status", "priority", "assignedto", "keyword", "affected_cis")
+
+_PROPERTY_PATTERN = "|".join(DIRECTIVE_PROPERTIES)
+_DIRECTIVE_RE = re.compile(rf"\[\s*((?:{_PROPERTY_PATTERN})\s*[=:][^\]]*)\]", re.IGNORECASE)
+_ASSIGNMENT_RE = re.compile(rf"^\s*({_PROPERTY_PATTERN})\s*[=:]\s*(.*?)\s*$", re.IGNORECASE)
+_DESIGNATOR_RE = re.compile(r"^([a-z_]+)?(\d+)$", re.IGNORECASE)
+
+
+def parse_directives(text):
+    """
+    Extract property directives from a line of text.
+
+    Args:
+        text: Message summary or subject line
+
+    Returns:
+        dict: {property name: raw value}; a later directive for the same
+        property overrides an earlier one
+    """
+    directives = {}
+    if not text:
+        return directives
+    for block in _DIRECTIVE_RE.finditer(text):
+        for assignment in block.group(1).split(";"):
+            match = _ASSIGNMENT_RE.match(assignment)
+            if match:
+                directives[match.group(1).lower()] = match.group(2)
+    return directives
+
+
+def lookup_item(db, classname, value):
+    """
+    Resolve a user-supplied name to an item ID.
+
+    Accepts an item ID or designator (``12``, ``ci12``), the class key
+    (case-insensitive for lower-case keys such as status names) or, for
+    classes without a key, an exact match on the label property. CIs are
+    also found by a similar name.
+
+    Args:
+        db: Database instance
+        classname: Class to look in
+        value: Name, ID or designator
+
+    Returns:
+        str: Item ID
+
+    Raises:
+        KeyError: If no single item matches
+    """
+    cl = db.getclass(classname)
+    value = value.strip()
+
+    match = _DESIGNATOR_RE.match(value)
+    if match and match.group(1) in (None, classname) and cl.hasnode(match.group(2)):
+        return match.group(2)
+
+    if cl.getkey():
+        for candidate in (value, value.lower()):
+            try:
+                return cl.lookup(candidate)
+            except KeyError:
+                pass
+        if classname == "user":
+            found = db.user.stringFind(address=value)
+            if len(found) == 1:
+                return found[0]
+        raise KeyError(value)
+
+    found = cl.stringFind(**{cl.labelprop(): value})
+    if not found and classname == "ci":
+        found = [itemid for itemid in [name_index.best_match(db, value)] if itemid]
+    if len(found) != 1:
+        raise KeyError(value)
+    return found[0]
+
+
+def _resolve_multilink(db, classname, raw, current):
+    """Apply a ``a,b`` / ``+a,-b`` Multilink directive to the current value."""
+    names = [name.strip() for name in raw.split(",") if name.strip()]
+    incremental = names and all(name[0] in "+-" for name in names)
+    result = list(current) if incremental else []
+    for name in names:
+        if incremental:
+            itemid = lookup_item(db, classname, name[1:])
+            if name[0] == "+" and itemid not in result:
+                result.append(itemid)
+            elif name[0] == "-" and itemid in result:
+                result.remove(itemid)
+        else:
+            itemid = lookup_item(db, classname, name)
+            if itemid not in result:
+                result.append(itemid)
+    return result
+
+
+def resolve_changes(db, cl, itemid, directives):
+    """
+    Turn parsed directives into property values for one item.
+
+    Directives that cannot be resolved (unknown status, user, CI, ...) are
+    logged and skipped; values equal to the current ones are dropped.
+
+    Args:
+        db: Database instance
+        cl: Class of the item (e.g. issue)
+        itemid: Item ID, or None for an item being created
+        directives: Output of ``parse_directives()``
+
+    Returns:
+        dict: {property name: new value} ready to pass to ``cl.set()``
+    """
+    props = cl.getprops()
+    changes = {}
+    for propname in DIRECTIVE_PROPERTIES:
+        if propname not in directives or propname not in props:
+            continue
+        raw = directives[propname]
+        prop = props[propname]
+        current = cl.get(itemid, propname) if itemid else None
+        try:
+            if isinstance(prop, hyperdb.Multilink):
+                value = _resolve_multilink(db, prop.classname, raw, current or [])
+                if sorted(value, key=int) == sorted(current or [], key=int):
+                    continue
+            else:
+                value = lookup_item(db, prop.classname, raw)
+                if value == current:
+                    continue
+        except KeyError:
+            logger.warning(
+                "Unknown %s in email directive: %s",
+                propname,
+                raw,
+                item_id=itemid,
+                property=propname,
+                value=raw,
+            )
+            continue
+        changes[propname] = value
+    return changes
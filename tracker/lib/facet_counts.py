@@ -0,0 +1,69 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Facet counts for filtered index pages.
+
+The CMDB list (``ci.index.html``) filters CIs by type, status and
+criticality and shows, next to every option of those dropdowns, how many
+CIs it would list if that option were chosen with the other filters kept,
+e.g. "Server (42)".
+
+Counting with one ``Class.filter()`` per option would search the class
+once per option on every page load. ``counts()`` instead reads the facet
+properties (and the properties matched by the search box) of all live items
+in one query and tallies every facet in a single pass: an item passing all
+filters counts for its value of every facet, an item failing only the
+filter of one facet counts for its value of that facet only.
+"""
+
+from roundup import hyperdb
+
+
+def _rows(db, classname, props):
+    """Return ``(id, value, ...)`` tuples of ``props`` for every live item."""
+    columns = ", ".join(["id"] + [f"_{prop}" for prop in props])
+    db.sql(f"select {columns} from _{classname} where __retired__ = 0")
+    return [tuple(row) for row in db.cursor.fetchall()]
+
+
+def counts(db, classname, selected, text="", text_props=(), itemids=None):
+    """
+    Count the items matching each value of some Link properties.
+
+    Args:
+        db: Database instance
+        classname: Class of the items, e.g. "ci"
+        selected: ``{property: selected ID or None}`` for every facet
+        text: Case-insensitive substring that one of ``text_props`` must contain
+        text_props: String properties searched for ``text``
+        itemids: Only count these items (e.g. the CIs of a subnet), if not None
+
+    Returns:
+        dict: ``{property: {ID: count}}``, counting for each facet the items
+        that match the text and the selections of the other facets
+    """
+    props = db.getclass(classname).getprops()
+    facets = list(selected)
+    for name in facets:
+        if not isinstance(props[name], hyperdb.Link):
+            raise ValueError(f"{classname}.{name} is not a Link property")
+    wanted = [str(selected[name]) if selected[name] else None for name in facets]
+    needle = text.lower() if text else ""
+    if itemids is not None:
+        itemids = {str(itemid) for itemid in itemids}
+
+    found = {name: {} for name in facets}
+    for itemid, *row in _rows(db, classname, facets + list(text_props)):
+        if itemids is not None and str(itemid) not in itemids:
+            continue
+        values = [str(value) if value is not None else None for value in row[: len(facets)]]
+        if needle and not any(needle in (value or "").lower() for value in row[len(facets) :]):
+            continue
+        failed = [i for i, want in enumerate(wanted) if want and values[i] != want]
+        if len(failed) > 1:
+            continue
+        for i, name in enumerate(facets):
+            if values[i] is not None and (not failed or failed == [i]):
+                found[name][values[i]] = found[name].get(values[i], 0) + 1
+    return found
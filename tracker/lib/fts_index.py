@@ -0,0 +1,492 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+SQLite FTS5 full-text index with ranked search.
+
+The tracker uses Roundup's ``native-fts`` indexer (``indexer = native-fts`` in
+``config.ini``): the text of every ``indexme`` property, message and file is
+kept in the ``__fts`` FTS5 table of the tracker database, updated in the same
+transaction as the item, and searched with the FTS5 query syntax (``disk*``
+prefixes, ``"exact phrase"``, ``AND``/``OR``/``NOT``, ``NEAR``).
+
+The indexer installed by ``detectors/fulltext.py`` adds to Roundup's:
+
+- Incremental updates with an index lookup: Roundup finds the row of an
+  indexed property by class, item and property, which FTS5 answers by
+  reading the whole table; here the lookup goes through the FTS index and
+  unchanged text is not rewritten.
+- BM25 ranking: hits come back best first, and ``ranked()`` returns the
+  best items of a class, counting hits in their messages and files.
+- Prefix indexes: ``rebuild()`` recreates ``__fts`` with two- and
+  three-character prefix indexes (Roundup creates it without), so short
+  prefix queries do not scan the term list.
+- A parallel, resumable rebuild: where ``roundup-admin reindex`` reads every
+  item one by one in a single transaction, ``rebuild()`` reads message and
+  file content in a process pool, writes the texts of ``chunk_size`` items
+  at a time and commits a checkpoint per chunk. FTS5 tokenizes the text in
+  SQLite either way. An interrupted rebuild is resumed with ``--resume``::
+
+      ./scripts/pms-admin.py rebuild-fulltext --workers 4
+      ./scripts/pms-admin.py rebuild-fulltext --resume
+
+- Deferred indexing: saves of items of the ``[fulltext] deferred_classes``
+  (``detectors/config.ini``) only record the item in ``__fts_queue``, and
+  ``drain()``, run in the background by
+  ``./scripts/pms-admin.py index-queue --watch``, indexes the queued items
+  in batches from their current values.
+"""
+
+import functools
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import batch_lookup
+import blob_store
+import detector_log
+import detector_settings
+import search_cache
+from roundup import hyperdb
+from roundup.backends import indexer_sqlite_fts
+from roundup.cgi.exceptions import IndexerQueryError
+
+
+logger = detector_log.get_logger(__name__)
+
+
+# Prefix lengths with their own FTS5 index
+PREFIX_LENGTHS = "2 3"
+
+# Items reindexed per transaction by rebuild()
+CHUNK_SIZE = 500
+
+# Content files sent to a reader process at a time
+READ_CHUNK_SIZE = 16
+
+# Last reindexed ID per class of a rebuild in progress
+CHECKPOINT_TABLE = "__fts_reindex"
+
+# Items of deferred classes saved since the last drain()
+QUEUE_TABLE = "__fts_queue"
+
+
+class RebuildResult(namedtuple("RebuildResult", "items texts seconds")):
+    """Counters of one full-text rebuild."""
+
+    __slots__ = ()
+
+    @property
+    def rate(self):
+        """Items reindexed per second."""
+        return self.items / self.seconds if self.seconds else 0.0
+
+
+def is_built(db):
+    """
+    Return whether ``__fts`` was created by ``create_index()``.
+
+    Roundup creates ``__fts`` without prefix indexes when a database is
+    created or upgraded, including on trackers that used another indexer
+    until then. Such a table lacks the texts of every existing item, so it
+    is only searched once ``rebuild()`` has recreated and filled it.
+
+    Args:
+        db: Database instance using the FTS5 indexer
+
+    Returns:
+        bool: True if the table has the prefix indexes of ``create_index()``
+    """
+    db.sql("select sql from sqlite_master where type='table' and name='__fts'")
+    row = db.cursor.fetchone()
+    return bool(row) and "prefix=" in row[0]
+
+
+def _phrase(value):
+    """Quote a value as an FTS5 string (a phrase of its tokens)."""
+    escaped = str(value).replace('"', '""')
+    return f'"{escaped}"'
+
+
+class Indexer(indexer_sqlite_fts.Indexer):
+    """Roundup's FTS5 indexer with indexed updates, BM25-ordered hits and deferral."""
+
+    def __init__(self, db):
+        super().__init__(db)
+        self.built = is_built(db)
+        self.deferred = {
+            classname.strip()
+            for classname in detector_settings.get(db).deferred_classes
+            if classname.strip()
+        }
+
+    def _rowid(self, identifier):
+        """Return the rowid of (classname, itemid, property), or None."""
+        classname, itemid, prop = identifier
+        a = self.db.arg
+        # the MATCH narrows the rows through the index, the equality tests
+        # drop rows whose columns merely contain the same tokens
+        sql = (
+            f"select rowid from __fts where __fts match {a} "
+            f"and _class={a} and _itemid={a} and _prop={a}"
+        )
+        query = (
+            f"_class:{_phrase(classname)} AND _itemid:{_phrase(itemid)} AND _prop:{_phrase(prop)}"
+        )
+        self.db.cursor.execute(sql, (query, classname, itemid, prop))
+        row = self.db.cursor.fetchone()
+        return row[0] if row else None
+
+    def add_text(self, identifier, text, mime_type="text/plain"):
+        """Index the text of (classname, itemid, property), replacing any previous text."""
+        if mime_type != "text/plain":
+            return
+        identifier = tuple(map(str, identifier))
+        if identifier[0] in self.deferred:
+            self._enqueue(*identifier[:2])
+            return
+        a = self.db.arg
+        rowid = self._rowid(identifier)
+        if rowid is None:
+            sql = (
+                f"insert into __fts (_class, _itemid, _prop, _textblob) values ({a}, {a}, {a}, {a})"
+            )
+            self.db.cursor.execute(sql, (*identifier, text))
+            return
+        self.db.cursor.execute(f"select _textblob from __fts where rowid={a}", (rowid,))
+        if self.db.cursor.fetchone()[0] != text:
+            self.db.cursor.execute(f"update __fts set _textblob={a} where rowid={a}", (text, rowid))
+
+    def _enqueue(self, classname, itemid):
+        """Record an item of a deferred class for ``drain()``."""
+        a = self.db.arg
+        sql = f"insert or ignore into {QUEUE_TABLE} (_class, _itemid) values ({a}, {a})"
+        try:
+            self.db.cursor.execute(sql, (classname, itemid))
+        except indexer_sqlite_fts.sqlite.OperationalError:
+            # first deferred save of this tracker
+            self.db.cursor.execute(
+                f"create table if not exists {QUEUE_TABLE} "
+                "(_class varchar, _itemid varchar, primary key (_class, _itemid))"
+            )
+            self.db.cursor.execute(sql, (classname, itemid))
+
+    def find(self, wordlist):
+        """Return the (class, itemid, property) hits of a query, best first."""
+        wordlist = [w for w in wordlist if not self.is_stopword(w.upper())]
+        if not wordlist:
+            return []
+        return [row[:3] for row in self.find_ranked(" ".join(wordlist))]
+
+    def find_ranked(self, query, limit=None):
+        """
+        Return the hits of an FTS5 query with their BM25 score, best first.
+
+        Args:
+            query: FTS5 query, e.g. 'backup* AND "db01"'
+            limit: Maximum number of hits (default: all)
+
+        Returns:
+            list: (classname, itemid, property, score) tuples; lower scores
+            are better matches
+
+        Raises:
+            IndexerQueryError: If the query is not valid FTS5 syntax, or the
+            index has not been built with ``rebuild()``
+        """
+        if not self.built:
+            logger.error("Full-text index not built, run scripts/pms-admin.py rebuild-fulltext")
+            raise IndexerQueryError(
+                "The full-text index has not been built yet. "
+                "Ask the administrator to run 'scripts/pms-admin.py rebuild-fulltext'."
+            )
+        a = self.db.arg
+        sql = (
+            "select _class, _itemid, _prop, bm25(__fts) from __fts "
+            f"where _textblob match {a} order by bm25(__fts)"
+        )
+        params = (query,)
+        if limit is not None:
+            sql += f" limit {a}"
+            params += (limit,)
+        try:
+            self.db.cursor.execute(sql, params)
+        except indexer_sqlite_fts.sqlite.OperationalError as e:
+            if "no such column" in e.args[0]:
+                raise IndexerQueryError(
+                    "Search failed. Try quoting any terms that include a '-' and retry the search."
+                ) from e
+            raise IndexerQueryError(e.args[0].replace("fts5:", "Query error:")) from e
+        return [tuple(row) for row in self.db.cursor.fetchall()]
+
+
+def install(db):
+    """Replace Roundup's FTS5 indexer of an open database with ``Indexer``."""
+    if type(db.indexer) is indexer_sqlite_fts.Indexer:
+        db.indexer = Indexer(db)
+
+
+def ranked(db, query, classname, limit=20):
+    """
+    Return the items of a class best matching a full-text query.
+
+    An item matches through its own indexed properties or through the
+    messages and files it links to; its score is that of its best hit.
+
+    Args:
+        db: Database instance using the FTS5 indexer
+        query: FTS5 query
+        classname: Class of the items to return, e.g. "change"
+        limit: Maximum number of items
+
+    Returns:
+        list: (itemid, score) tuples, best first; lower scores are better
+
+    Raises:
+        IndexerQueryError: If the query is not valid FTS5 syntax
+    """
+    klass = db.getclass(classname)
+    linkprops = {}
+    for name, prop in klass.getprops().items():
+        if isinstance(prop, (hyperdb.Link, hyperdb.Multilink)):
+            linkprops.setdefault(prop.classname, []).append(name)
+
+    results = {}
+    for hitclass, hitid, _prop, score in db.indexer.find_ranked(query):
+        if hitclass == classname:
+            itemids = [hitid]
+        elif hitclass in linkprops:
+            itemids = klass.find(**{name: hitid for name in linkprops[hitclass]})
+        else:
+            continue
+        for itemid in itemids:
+            # hits come best first, so the first score of an item is its best
+            if itemid not in results and not klass.is_retired(itemid):
+                results[itemid] = score
+        if len(results) >= limit:
+            break
+    return list(results.items())[:limit]
+
+
+def create_index(db):
+    """Recreate ``__fts`` empty, with prefix indexes (``initial_data.py`` and ``rebuild()``)."""
+    db.sql("drop table if exists __fts")
+    db.sql(
+        "create virtual table __fts using fts5(_class, _itemid, _prop, _textblob, "
+        f"prefix='{PREFIX_LENGTHS}')"
+    )
+
+
+def _checkpoints(db):
+    """Return {classname: last reindexed ID} of an interrupted rebuild, or None."""
+    try:
+        db.sql(f"select _class, _lastid from {CHECKPOINT_TABLE}")
+    except indexer_sqlite_fts.sqlite.OperationalError:
+        # no such table: no rebuild in progress
+        return None
+    return {classname: lastid for classname, lastid in db.cursor.fetchall()}
+
+
+def _indexed_properties(klass):
+    """Return the indexed String properties of a class, "content" first for FileClasses."""
+    props = [
+        name
+        for name, prop in sorted(klass.getprops().items())
+        if isinstance(prop, hyperdb.String) and prop.indexme
+    ]
+    if "content" in props:
+        props.remove("content")
+        props.insert(0, "content")
+    return props
+
+
+def read_text(path):
+    """
+    Read stored content as text (runs in the reader processes).
+
+    Args:
+        path: Item file
+
+    Returns:
+        str: Content decoded as UTF-8, or None if the file is missing
+    """
+    try:
+        return blob_store.read(path).decode("utf-8", errors="ignore")
+    except FileNotFoundError:
+        return None
+
+
+def _texts(db, klass, itemids, props, read):
+    """Return the (classname, itemid, property, text) rows of a chunk of items."""
+    classname = klass.classname
+    rows = []
+    for prop in props:
+        if prop == "content":
+            types = batch_lookup.get_values(db, classname, itemids, "type")
+            # like FileClass.index(), only plain text content is indexed
+            plain = [i for i in itemids if (types[i] or klass.default_mime_type) == "text/plain"]
+            paths = [db.filename(classname, itemid) for itemid in plain]
+            for itemid, text in zip(plain, read(paths)):
+                if text is None:
+                    logger.warning(
+                        "No content file for %s%s", classname, itemid, classname=classname
+                    )
+                else:
+                    rows.append((classname, itemid, prop, text))
+        else:
+            values = batch_lookup.get_values(db, classname, itemids, prop)
+            # str() as Class.index() does, so None is indexed as "None"
+            rows.extend((classname, itemid, prop, str(values[itemid])) for itemid in itemids)
+    return rows
+
+
+def _replace_rows(db, classname, itemids, rows):
+    """Replace every index row of some items of a class."""
+    a = db.arg
+    query = f"_class:{_phrase(classname)} AND _itemid:({' OR '.join(map(_phrase, itemids))})"
+    db.sql(
+        f"delete from __fts where rowid in (select rowid from __fts where __fts match {a} "
+        f"and _class={a})",
+        (query, classname),
+    )
+    db.cursor.executemany(
+        f"insert into __fts (_class, _itemid, _prop, _textblob) values ({a}, {a}, {a}, {a})",
+        rows,
+    )
+
+
+def _write_chunk(db, classname, itemids, rows):
+    """Replace the index rows of a chunk of items and move the checkpoint past it."""
+    # items changed while the rebuild runs were already indexed by add_text()
+    _replace_rows(db, classname, itemids, rows)
+    db.sql(
+        f"update {CHECKPOINT_TABLE} set _lastid={db.arg} where _class={db.arg}",
+        (int(itemids[-1]), classname),
+    )
+
+
+def rebuild(db, workers=None, chunk_size=CHUNK_SIZE, resume=False):
+    """
+    Recreate the full-text index with prefix indexes and reindex every item.
+
+    Items are reindexed class by class in ID order, ``chunk_size`` items per
+    transaction, with the texts of each chunk written in bulk. Message and
+    file content is read and decompressed in a process pool. Each commit
+    records the last reindexed ID of the class in ``__fts_reindex``, so an
+    interrupted rebuild continues from there with ``resume``. Searches work
+    during the rebuild, but only find items reindexed so far.
+
+    Args:
+        db: Database instance using the FTS5 indexer
+        workers: Reader processes (default: CPU count; 1 reads in-process)
+        chunk_size: Items per transaction
+        resume: Continue an interrupted rebuild (starts over if there is none)
+
+    Returns:
+        RebuildResult: Counters and elapsed time
+    """
+    start = time.monotonic()
+    checkpoints = _checkpoints(db) if resume else None
+    classnames = [
+        classname for classname in sorted(db.classes) if _indexed_properties(db.getclass(classname))
+    ]
+    if checkpoints is None:
+        create_index(db)
+        db.sql(f"drop table if exists {CHECKPOINT_TABLE}")
+        db.sql(f"create table {CHECKPOINT_TABLE} (_class varchar primary key, _lastid integer)")
+        db.cursor.executemany(
+            f"insert into {CHECKPOINT_TABLE} (_class, _lastid) values ({db.arg}, 0)",
+            [(classname,) for classname in classnames],
+        )
+        db.commit()
+        checkpoints = dict.fromkeys(classnames, 0)
+    else:
+        logger.info("Resuming full-text rebuild", checkpoints=checkpoints)
+
+    executor = None
+    items = texts = 0
+    try:
+        if workers == 1:
+            read = functools.partial(map, read_text)
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            read = functools.partial(executor.map, read_text, chunksize=READ_CHUNK_SIZE)
+
+        for classname in classnames:
+            klass = db.getclass(classname)
+            props = _indexed_properties(klass)
+            lastid = checkpoints.get(classname, 0)
+            itemids = sorted((i for i in klass.list() if int(i) > lastid), key=int)
+            for offset in range(0, len(itemids), chunk_size):
+                chunk = itemids[offset : offset + chunk_size]
+                rows = _texts(db, klass, chunk, props, read)
+                _write_chunk(db, classname, chunk, rows)
+                db.commit()
+                # the node cache of a whole class is not worth keeping
+                db.clearCache()
+                items += len(chunk)
+                texts += len(rows)
+            logger.info(
+                "Reindexed %s, %d item(s) so far, %.1f/s",
+                classname,
+                items,
+                items / (time.monotonic() - start),
+                classname=classname,
+                items=items,
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    db.sql(f"drop table {CHECKPOINT_TABLE}")
+    for classname in classnames:
+        search_cache.bump(db, classname)
+    db.sql("insert into __fts(__fts) values ('optimize')")
+    db.commit()
+    return RebuildResult(items, texts, time.monotonic() - start)
+
+
+def drain(db, limit=CHUNK_SIZE):
+    """
+    Index up to ``limit`` items saved since the last drain (deferred classes).
+
+    Every indexed property of an item is reindexed from its current values,
+    so several saves of an item are indexed once.
+
+    Args:
+        db: Database instance using the FTS5 indexer
+        limit: Maximum number of items to index in this transaction
+
+    Returns:
+        int: Number of items taken from the queue (0 when it is empty)
+    """
+    a = db.arg
+    try:
+        db.sql(f"select _class, _itemid from {QUEUE_TABLE} order by rowid limit {a}", (limit,))
+    except indexer_sqlite_fts.sqlite.OperationalError:
+        # no deferred save yet
+        return 0
+    entries = [tuple(entry) for entry in db.cursor.fetchall()]
+    if not entries:
+        return 0
+
+    # dequeue first: the write lock keeps saves from committing until the
+    # values read below are indexed, so a save is never dequeued unindexed
+    db.cursor.executemany(f"delete from {QUEUE_TABLE} where _class={a} and _itemid={a}", entries)
+    db.clearCache()
+    byclass = {}
+    for classname, itemid in entries:
+        byclass.setdefault(classname, []).append(itemid)
+    for classname, itemids in byclass.items():
+        klass = db.getclass(classname)
+        existing = batch_lookup.existing_ids(db, classname, itemids)
+        itemids = [itemid for itemid in itemids if itemid in existing]
+        if itemids:
+            rows = _texts(
+                db, klass, itemids, _indexed_properties(klass), functools.partial(map, read_text)
+            )
+            _replace_rows(db, classname, itemids, rows)
+        search_cache.bump(db, classname)
+    db.commit()
+    logger.info("Indexed %d queued item(s)", len(entries), items=len(entries))
+    return len(entries)
@@ -0,0 +1,225 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+IP address index of configuration items.
+
+``ci.ip_address`` is a free-text String, so Roundup can only find CIs by a
+substring of it: "10.0.3.1" also matches 10.0.3.10-19 and a subnet cannot
+be searched at all. Each address of a live CI (IPv4 or IPv6, several
+separated by commas or spaces, "10.0.3.5/24" interface notation accepted)
+has one row in the ``__ci_ip`` table of the tracker database, holding the
+address as a fixed-width hex integer next to its IP version. Exact lookups,
+subnet searches (a range of that integer) and duplicate detection are then
+single indexed queries:
+
+- ``lookup(db, "10.0.3.5")`` and ``in_network(db, "10.0.3.0/24")`` return
+  CI IDs; ``search()`` takes either form, as the CMDB list filter and
+  ``GET /rest/data/ci/@ip?address=...`` do;
+- ``duplicates(db)`` lists addresses assigned to more than one CI.
+
+The index is maintained by ``detectors/ipindex.py``, which also rejects CIs
+with an unparsable address. Trackers created before the index existed fill
+it once with::
+
+    ./scripts/pms-admin.py rebuild-ip-index
+"""
+
+import ipaddress
+import re
+import sqlite3
+
+import detector_log
+
+
+logger = detector_log.get_logger(__name__)
+
+INDEX_TABLE = "__ci_ip"
+
+
+def parse(value):
+    """
+    Return the addresses in an ``ip_address`` value.
+
+    Args:
+        value: Addresses separated by commas or whitespace (may be None)
+
+    Returns:
+        list: ``ipaddress.IPv4Address``/``IPv6Address`` objects, without duplicates
+
+    Raises:
+        ValueError: If an entry is not an IP address
+    """
+    addresses = []
+    for entry in re.split(r"[,\s]+", value or ""):
+        if not entry:
+            continue
+        address = ipaddress.ip_interface(entry).ip
+        if address not in addresses:
+            addresses.append(address)
+    return addresses
+
+
+def _key(address):
+    """Return the (version, fixed-width hex) index key of an address."""
+    return address.version, f"{int(address):032x}"
+
+
+def _sql(db, sql, args=()):
+    """Run a statement on the index table, creating it on first use."""
+    try:
+        db.sql(sql, args)
+    except sqlite3.OperationalError:
+        db.sql(
+            f"create table if not exists {INDEX_TABLE} "
+            "(_ci varchar, _version integer, _ip varchar, primary key (_ci, _version, _ip))"
+        )
+        db.sql(f"create index if not exists {INDEX_TABLE}_ip_idx on {INDEX_TABLE} (_version, _ip)")
+        db.sql(sql, args)
+
+
+def _ids(db):
+    """Return the distinct CI IDs of the last query, numerically sorted."""
+    return sorted({str(row[0]) for row in db.cursor.fetchall()}, key=int)
+
+
+def sync_ci(db, ciid):
+    """
+    Make the index rows of one CI match its current addresses.
+
+    Retired CIs have no rows. Unparsable values (stored before the auditor
+    existed) are not indexed.
+
+    Args:
+        db: Database instance
+        ciid: CI ID
+    """
+    _sql(db, f"delete from {INDEX_TABLE} where _ci = {db.arg}", (ciid,))
+    if db.ci.is_retired(ciid):
+        return
+    value = db.ci.get(ciid, "ip_address")
+    try:
+        addresses = parse(value)
+    except ValueError:
+        logger.warning("IP address %r of ci%s is not indexed", value, ciid, ci_id=ciid)
+        return
+    for address in addresses:
+        _sql(
+            db,
+            f"insert into {INDEX_TABLE} (_ci, _version, _ip) values ({db.arg}, {db.arg}, {db.arg})",
+            (ciid, *_key(address)),
+        )
+
+
+def lookup(db, address):
+    """
+    Return the CIs with an address.
+
+    Args:
+        db: Database instance
+        address: IP address, e.g. "10.0.3.5" or "2001:db8::1"
+
+    Returns:
+        list: CI IDs
+
+    Raises:
+        ValueError: If ``address`` is not an IP address
+    """
+    key = _key(ipaddress.ip_address(address.strip()))
+    _sql(db, f"select _ci from {INDEX_TABLE} where _version = {db.arg} and _ip = {db.arg}", key)
+    return _ids(db)
+
+
+def in_network(db, network):
+    """
+    Return the CIs with an address in a network.
+
+    Args:
+        db: Database instance
+        network: CIDR network, e.g. "10.0.3.0/24"; host bits are ignored
+
+    Returns:
+        list: CI IDs
+
+    Raises:
+        ValueError: If ``network`` is not a network
+    """
+    network = ipaddress.ip_network(network.strip(), strict=False)
+    version, first = _key(network.network_address)
+    last = _key(network.broadcast_address)[1]
+    _sql(
+        db,
+        f"select _ci from {INDEX_TABLE} "
+        f"where _version = {db.arg} and _ip between {db.arg} and {db.arg}",
+        (version, first, last),
+    )
+    return _ids(db)
+
+
+def search(db, spec):
+    """
+    Return the CIs matching an address or, if it has a prefix length, a network.
+
+    Args:
+        db: Database instance
+        spec: "10.0.3.5" or "10.0.3.0/24"
+
+    Returns:
+        list: CI IDs
+
+    Raises:
+        ValueError: If ``spec`` is neither
+    """
+    if "/" in spec:
+        return in_network(db, spec)
+    return lookup(db, spec)
+
+
+def duplicates(db, ciid=None):
+    """
+    Return the addresses assigned to more than one live CI.
+
+    Args:
+        db: Database instance
+        ciid: Only report the addresses of this CI
+
+    Returns:
+        dict: ``{address: [CI IDs]}``, in address order
+    """
+    sql = (
+        f"select _version, _ip, _ci from {INDEX_TABLE} where (_version, _ip) in "
+        f"(select _version, _ip from {INDEX_TABLE} group by _version, _ip having count(*) > 1)"
+    )
+    args = ()
+    if ciid is not None:
+        sql += (
+            f" and (_version, _ip) in "
+            f"(select _version, _ip from {INDEX_TABLE} where _ci = {db.arg})"
+        )
+        args = (ciid,)
+    _sql(db, sql + " order by _version, _ip", args)
+    found = {}
+    for version, ip, owner in db.cursor.fetchall():
+        address_class = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+        address = address_class(int(ip, 16))
+        found.setdefault(str(address), []).append(str(owner))
+    for owners in found.values():
+        owners.sort(key=int)
+    return found
+
+
+def rebuild(db):
+    """
+    Rebuild the whole index from the ci table.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        int: Number of indexed addresses
+    """
+    _sql(db, f"delete from {INDEX_TABLE}")
+    for ciid in db.ci.getnodeids(retired=False):
+        sync_ci(db, ciid)
+    _sql(db, f"select count(*) from {INDEX_TABLE}")
+    return db.cursor.fetchone()[0]
@@ -0,0 +1,181 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Inline the linked items of REST results (``@expand``).
+
+Roundup's REST API returns Link and Multilink values as ``{"id", "link"}``
+references, so a client listing issues with their priority, status,
+assignee and affected CI names has to GET every linked item. With::
+
+    GET /rest/data/issue?@fields=title&@expand=priority,status,assignedto.realname,affected_cis.name
+
+each of those properties holds the linked item(s) with the requested
+properties instead::
+
+    "priority": {"id": "2", "link": ".../priority/2", "name": "urgent"},
+    "affected_cis": [{"id": "12", "link": ".../ci/12", "name": "web-01"}, ...]
+
+``prop`` alone adds the label property of the linked class ("name",
+"realname", ...); ``prop.field`` adds ``field``, and several fields of the
+same property are combined. Expansion is one level deep. Fields are
+formatted like Roundup formats item properties: passwords are hidden,
+links are ``{"id", "link"}`` references and message or file ``content`` is
+a download link.
+
+The ``@etag`` of an item (and its ETag header) covers the item's own
+properties only, since it is what ``If-Match`` checks when the item is
+updated: it does not change when only an expanded linked item does.
+
+``expand()`` reads the expanded properties of all items of a page with one
+query per property, then the requested properties of all linked items with
+one query per linked class (``lib/batch_lookup.py``), instead of one query
+per item and link. The REST routes are in ``extensions/rest_expand.py``.
+"""
+
+import batch_lookup
+from roundup import hyperdb
+
+
+def parse_expand(db, classname, value):
+    """
+    Parse an ``@expand`` value.
+
+    Args:
+        db: Database instance
+        classname: Class of the returned items
+        value: Comma-separated ``prop`` or ``prop.field`` entries
+
+    Returns:
+        dict: ``{Link/Multilink property: [fields of the linked class]}``
+
+    Raises:
+        ValueError: If an entry is not a Link or Multilink property, a field
+        does not exist or expansion is deeper than one level
+    """
+    props = db.getclass(classname).getprops()
+    spec = {}
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _dot, field = entry.partition(".")
+        prop = props.get(name)
+        if not isinstance(prop, (hyperdb.Link, hyperdb.Multilink)):
+            raise ValueError(f"{classname}.{name} is not a Link or Multilink property")
+        linkcl = db.getclass(prop.classname)
+        field = field or linkcl.labelprop()
+        if "." in field:
+            raise ValueError(f"Cannot expand {entry}: only one level is supported")
+        if field not in linkcl.getprops():
+            raise ValueError(f"{field!r} is not a property of {prop.classname}")
+        fields = spec.setdefault(name, [])
+        if field not in fields:
+            fields.append(field)
+    return spec
+
+
+def expand(db, userid, classname, itemids, spec, data_path=""):
+    """
+    Return the expanded linked items of several items.
+
+    Properties the user may not view are left out: an item property is
+    omitted for that item, a field of a linked item is omitted from it.
+
+    Args:
+        db: Database instance
+        userid: User making the request
+        classname: Class of the items
+        itemids: Item IDs, e.g. the IDs of a collection page
+        spec: Output of ``parse_expand()``
+        data_path: URL of the REST data, for the links of Link and Multilink fields
+
+    Returns:
+        dict: ``{itemid: {property: linked item, list of linked items or None}}``
+        where a linked item is ``{"id": ..., field: value, ...}``
+    """
+    props = db.getclass(classname).getprops()
+    security = db.security
+    expanded = {itemid: {} for itemid in itemids}
+
+    # linked item IDs per linked class, so each class is read once
+    values, wanted = {}, {}
+    for name, fields in spec.items():
+        visible = [
+            itemid
+            for itemid in itemids
+            if security.hasPermission("View", userid, classname, name, itemid)
+        ]
+        values[name] = batch_lookup.get_values(db, classname, visible, name)
+        linked = wanted.setdefault(props[name].classname, {})
+        for value in values[name].values():
+            for linkid in value if isinstance(value, list) else [value]:
+                if linkid:
+                    linked.setdefault(linkid, set()).update(fields)
+
+    # {(linked class, linked ID): {field: value}}
+    details = {}
+    for linkclass, linked in wanted.items():
+        linkprops = db.getclass(linkclass).getprops()
+        for field in sorted(set().union(*linked.values())):
+            linkids = [linkid for linkid, fields in linked.items() if field in fields]
+            if field == "content":
+                # never read, format_value() links to the download instead
+                found = dict.fromkeys(linkids)
+            else:
+                found = batch_lookup.get_values(db, linkclass, linkids, field)
+            for linkid in linkids:
+                if security.hasPermission("View", userid, linkclass, field, linkid):
+                    details.setdefault((linkclass, linkid), {})[field] = format_value(
+                        db, data_path, linkclass, linkid, field, linkprops[field], found[linkid]
+                    )
+
+    for name, fields in spec.items():
+        linkclass = props[name].classname
+        for itemid, value in values[name].items():
+            if isinstance(value, list):
+                expanded[itemid][name] = [
+                    _linked(details, linkclass, linkid, fields) for linkid in value
+                ]
+            else:
+                expanded[itemid][name] = (
+                    _linked(details, linkclass, value, fields) if value else None
+                )
+    return expanded
+
+
+def format_value(db, data_path, linkclass, linkid, field, prop, value):
+    """
+    Format a field of a linked item like ``RestfulInstance.format_item()``.
+
+    Args:
+        db: Database instance
+        data_path: URL of the REST data
+        linkclass: Class of the linked item
+        linkid: Linked item ID
+        field: Property name
+        prop: Property of the linked class
+        value: Value of the property
+
+    Returns:
+        The value as returned by the REST API
+    """
+    if isinstance(prop, hyperdb.Password):
+        # locked users like anonymous have None; do not divulge it
+        return f"[password hidden scheme {value.scheme if value else 'PBKDF2'}]"
+    if isinstance(prop, (hyperdb.Link, hyperdb.Multilink)):
+        class_path = f"{data_path}/{prop.classname}/"
+        if isinstance(value, list):
+            return [{"id": found, "link": class_path + found} for found in value]
+        return {"id": value, "link": class_path + value} if value else value
+    if isinstance(prop, hyperdb.String) and field == "content":
+        return {"link": f"{db.config.TRACKER_WEB}{linkclass}{linkid}/"}
+    return value
+
+
+def _linked(details, linkclass, linkid, fields):
+    """Return one expanded linked item with the requested fields."""
+    found = {"id": linkid}
+    known = details.get((linkclass, linkid), {})
+    found.update((field, known[field]) for field in fields if field in known)
+    return found
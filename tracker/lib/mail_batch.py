@@ -0,0 +1,274 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Batch ingestion of a maildir or mbox through the tracker's mail gateway.
+
+``roundup-mailgw`` opens the database, handles one message and commits (twice)
+per invocation, which takes hours for the backlog of alert emails left by a
+mail outage. ``ingest()`` drains a whole mailbox instead::
+
+    ./scripts/pms-admin.py ingest-mail /var/mail/pms --workers 4
+
+- MIME parsing runs in a process pool; messages are handled in mailbox order.
+- Messages are handled in groups of ``batch_size`` on one open database and
+  committed once per group. If a message of a group fails, the group is
+  rolled back and its messages are handled again one at a time by the
+  regular gateway, which bounces the failing one as ``roundup-mailgw`` would.
+- Nosy messages of a group are held back and sent once the group is
+  committed, so a rolled-back group never sends mail. Coalesced and digest
+  notifications are queued as usual (``nosy_queue``).
+- Handled messages are removed from the mailbox after each commit, so an
+  interrupted run does not handle them again.
+
+Messages are only kept in the mailbox with ``keep``.
+"""
+
+import argparse
+import email
+import functools
+import mailbox
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import detector_log
+import sqlite_ids
+from roundup import i18n, mailgw
+from roundup.mailer import MessageSendError
+
+
+logger = detector_log.get_logger(__name__)
+
+# Messages handled per database transaction
+BATCH_SIZE = 100
+
+# Messages sent to a parser process at a time
+PARSE_CHUNK_SIZE = 16
+
+
+class IngestResult(namedtuple("IngestResult", "messages ignored retried seconds")):
+    """Counters of one ingestion run."""
+
+    __slots__ = ()
+
+    @property
+    def rate(self):
+        """Messages handled per second."""
+        return self.messages / self.seconds if self.seconds else 0.0
+
+
+class _BatchParsedMessage:
+    """Parsed message mixin that leaves commits to the batch."""
+
+    def commit_and_reopen_as_author(self):
+        if self.mailgw.batch_db is None:
+            return super().commit_and_reopen_as_author()
+        # the author created for this message is visible in the open transaction
+        self.db.setCurrentUser(self.db.user.get(self.author, "username"))
+        self.cl = self.db.getclass(self.classname)
+
+    def commit_duplicate(self):
+        if self.mailgw.batch_db is None:
+            super().commit_duplicate()
+
+
+class _BatchMailGW:
+    """Mail gateway mixin that handles messages on a shared open database."""
+
+    batch_db = None
+
+    def handle_message(self, message):
+        if self.batch_db is None:
+            return super().handle_message(message)
+        self.db = self.batch_db
+        self.db.setCurrentUser("admin")
+        self.parsed_message = self.parsed_message_class(self, message)
+        return self.parsed_message.parse()
+
+
+def make_gateway(instance):
+    """Return the tracker's mail gateway extended for batch handling."""
+    gateway_class = type("BatchMailGW", (_BatchMailGW, instance.MailGW), {})
+    gateway_class.parsed_message_class = type(
+        "BatchParsedMessage", (_BatchParsedMessage, instance.MailGW.parsed_message_class), {}
+    )
+    return gateway_class(instance, argparse.Namespace(default_class="", set_value=[]))
+
+
+def open_mailbox(path):
+    """Open a maildir (directory) or mbox (file) without creating it."""
+    if os.path.isdir(path):
+        return mailbox.Maildir(path, factory=None, create=False)
+    box = mailbox.mbox(path, create=False)
+    box.lock()
+    return box
+
+
+def parse(raw):
+    """Parse one raw message (runs in the parser processes)."""
+    return email.message_from_bytes(raw, mailgw.RoundupMessage)
+
+
+def _hold_nosymessage(held, cl, *args, **kwargs):
+    held.append((cl, args, kwargs))
+
+
+def _open_db(instance):
+    """
+    Open the database the way the mail gateway does for one message.
+
+    The nosy messages of the classes are held in ``db.held_nosymessages``
+    until ``_send_held()`` sends them.
+    """
+    db = instance.open("admin")
+    config = instance.config
+    language = config["MAILGW_LANGUAGE"] or config["TRACKER_LANGUAGE"]
+    db.i18n = i18n.get_translation(language, tracker_home=config["TRACKER_HOME"])
+    mailgw._ = db.i18n.gettext
+    db.tx_Source = "email"
+    # a group commits or rolls back as a whole
+    sqlite_ids.install(db)
+    db.held_nosymessages = []
+    for classname in db.getclasses():
+        cl = db.getclass(classname)
+        if hasattr(cl, "nosymessage"):
+            cl.nosymessage = functools.partial(_hold_nosymessage, db.held_nosymessages, cl)
+    return db
+
+
+def _send_held(db):
+    """Send the nosy messages held during a committed group, and commit their recipients."""
+    if not db.held_nosymessages:
+        return
+    for cl, args, kwargs in db.held_nosymessages:
+        try:
+            type(cl).nosymessage(cl, *args, **kwargs)
+        except MessageSendError as e:
+            logger.error("Failed to send nosy message: %s", e, message_id=args[1])
+    db.held_nosymessages.clear()
+    db.commit()
+
+
+def _groups(keys, size):
+    """Yield lists of at most ``size`` keys."""
+    for start in range(0, len(keys), size):
+        yield keys[start : start + size]
+
+
+def _parsed_groups(box, keys, size, executor):
+    """
+    Yield (keys, parsed messages) per group of ``size`` messages.
+
+    Only one group is parsed ahead, in the executor while the previous one
+    is handled, so the mailbox is never read into memory as a whole.
+    """
+
+    def submit(group_keys):
+        raws = [box.get_bytes(key) for key in group_keys]
+        if executor is None:
+            return map(parse, raws)
+        return executor.map(parse, raws, chunksize=PARSE_CHUNK_SIZE)
+
+    ahead = None
+    for group_keys in _groups(keys, size):
+        parsing = group_keys, submit(group_keys)
+        if ahead is not None:
+            yield ahead[0], list(ahead[1])
+        ahead = parsing
+    if ahead is not None:
+        yield ahead[0], list(ahead[1])
+
+
+def _handle_group(gateway, db, messages):
+    """
+    Handle a group of messages in one transaction.
+
+    Args:
+        gateway: Gateway from ``make_gateway()``
+        db: Open database shared by the groups, from ``_open_db()``
+        messages: Parsed messages
+
+    Returns:
+        tuple: (number of ignored messages, number of messages handled again
+        one at a time after a failure)
+    """
+    ignored = 0
+    gateway.batch_db, gateway.trapExceptions = db, 0
+    try:
+        for message in messages:
+            try:
+                gateway.handle_Message(message)
+            except mailgw.IgnoreMessage:
+                ignored += 1
+        db.commit()
+    except Exception as error:
+        db.rollback()
+        db.held_nosymessages.clear()
+        logger.warning(
+            "Group of %d message(s) rolled back (%s), handling them one at a time",
+            len(messages),
+            error,
+            messages=len(messages),
+        )
+        gateway.batch_db, gateway.trapExceptions = None, 1
+        for message in messages:
+            gateway.handle_Message(message)
+        return 0, len(messages)
+    finally:
+        gateway.batch_db, gateway.trapExceptions = None, 1
+
+    _send_held(db)
+    return ignored, 0
+
+
+def ingest(instance, path, workers=None, batch_size=BATCH_SIZE, keep=False):
+    """
+    Feed every message of a maildir or mbox to the mail gateway.
+
+    Args:
+        instance: Tracker instance
+        path: Maildir directory or mbox file
+        workers: Parser processes (default: CPU count; 1 parses in-process)
+        batch_size: Messages per transaction
+        keep: Leave handled messages in the mailbox
+
+    Returns:
+        IngestResult: Counters and elapsed time
+    """
+    start = time.monotonic()
+    box = open_mailbox(path)
+    gateway = make_gateway(instance)
+    db = _open_db(instance)
+
+    executor = None if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+    messages = ignored = retried = 0
+    try:
+        keys = box.keys()
+        for group_keys, group in _parsed_groups(box, keys, batch_size, executor):
+            group_ignored, group_retried = _handle_group(gateway, db, group)
+            messages += len(group)
+            ignored += group_ignored
+            retried += group_retried
+            if not keep:
+                for key in group_keys:
+                    box.remove(key)
+                if isinstance(box, mailbox.mbox):
+                    box.flush()
+            logger.info(
+                "Ingested %d of %d message(s), %.1f/s",
+                messages,
+                len(keys),
+                messages / (time.monotonic() - start),
+                messages=messages,
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        db.close()
+        if isinstance(box, mailbox.mbox):
+            box.unlock()
+        box.close()
+
+    return IngestResult(messages, ignored, retried, time.monotonic() - start)
@@ -0,0 +1,125 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Bounded-cost message summaries and oversized message bodies.
+
+Roundup's ``parseContent`` splits the whole message body into sections before
+it picks the summary, so its cost grows with the size of the message. A
+multi-megabyte log paste then stalls the mail gateway. ``extract_summary()``
+only hands ``parseContent`` the part of the body that can contain the
+summary: everything up to the end of the first non-quoted paragraph, and
+never more than ``SUMMARY_SCAN_LIMIT`` characters.
+
+Bodies larger than ``[messagesummary] max_body_size`` (``detectors/config.ini``)
+are not stored as message content at all: the full text becomes a
+``message-body.txt`` attachment and the message keeps a short preview.
+"""
+
+import re
+
+import detector_settings
+from roundup.mailgw import parseContent
+
+
+# Never look further than this into a body to find its summary
+SUMMARY_SCAN_LIMIT = 64 * 1024
+
+# Size of the preview kept as message content for oversized bodies
+PREVIEW_SIZE = 4 * 1024
+
+OVERSIZED_BODY_NAME = "message-body.txt"
+
+_BLANKLINE_RE = re.compile(r"[\r\n]+\s*[\r\n]+")
+
+
+def _is_quoted(section):
+    lines = section.lstrip("\r\n").splitlines()
+    return bool(lines) and any(line[:1] in (">", "|") for line in lines[:2])
+
+
+def summary_head(content, limit=SUMMARY_SCAN_LIMIT):
+    """
+    Return the leading part of a body that determines its summary.
+
+    Scanning stops at the end of the first paragraph that is not a quotation
+    (the paragraph ``parseContent`` takes the summary from), or at ``limit``
+    characters, whichever comes first.
+
+    Args:
+        content: Message body
+        limit: Maximum number of characters to scan
+
+    Returns:
+        str: Prefix of ``content``
+    """
+    head = content[:limit]
+    start = 0
+    for blank in _BLANKLINE_RE.finditer(head):
+        section = head[start : blank.start()]
+        if section.strip() and not _is_quoted(section):
+            return head[: blank.start()]
+        start = blank.end()
+    return head
+
+
+def extract_summary(content, config, limit=SUMMARY_SCAN_LIMIT):
+    """
+    Compute a message summary in time bounded by ``limit``.
+
+    Args:
+        content: Message body
+        config: Tracker configuration (for the mailgw parsing options)
+        limit: Maximum number of characters to scan
+
+    Returns:
+        str: The summary ``parseContent`` would produce for the full body
+    """
+    if isinstance(content, bytes):
+        content = content[:limit].decode("utf-8", "replace")
+    summary, _content = parseContent(summary_head(content, limit), keep_body=True, config=config)
+    return summary
+
+
+def max_body_size(db):
+    """
+    Return the configured maximum message body size.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        int: Size in characters; 0 disables the oversized body policy
+    """
+    return detector_settings.get(db).max_body_size
+
+
+def is_oversized(db, content):
+    """Return True if ``content`` must be stored as an attachment."""
+    limit = max_body_size(db)
+    return bool(limit and content and len(content) > limit)
+
+
+def preview(content, size=PREVIEW_SIZE):
+    """
+    Build the message content kept for an oversized body.
+
+    Args:
+        content: Full message body
+        size: Approximate preview size in characters
+
+    Returns:
+        str: The first lines of the body followed by a pointer to the attachment
+    """
+    total = len(content)
+    head = content[:size]
+    if isinstance(head, bytes):
+        head = head.decode("utf-8", "replace")
+    cut = head.rfind("\n")
+    if cut > 0:
+        head = head[:cut]
+    return (
+        f"{head.rstrip()}\n\n"
+        f"[Message body of {total} characters truncated; "
+        f"the full text is attached as {OVERSIZED_BODY_NAME}]"
+    )
@@ -0,0 +1,185 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Trigram index of CI names for typo-tolerant lookups.
+
+Hostnames are written in many ways: "db-srv-01", "dbsrv01" and
+"dbserver01" defeat both exact and substring matching. A name is
+normalized (lower-cased, separators dropped) and cut into trigrams, padded
+at both ends so that beginnings and endings weigh more::
+
+    "DB-Srv-01" -> "dbsrv01" -> "  d", " db", "dbs", "bsr", ..., "01 "
+
+Each trigram of a live CI has one row in the ``__ci_trigram`` table of the
+tracker database, keyed by trigram. ``similar(db, name)`` reads only the
+rows of the trigrams of ``name`` (an index lookup per trigram, not a scan of
+all CIs) and ranks the CIs sharing them by Dice similarity::
+
+    2 * shared trigrams / (trigrams of name + trigrams of the CI name)
+
+It is used by the CI classhelp popups of issues and changes (through
+``GET /rest/data/ci/@similar?name=...`` when a name search finds nothing)
+and, through ``best_match()``, by ``[affected_cis=...]`` email directives
+naming a CI that does not exist as written.
+
+The index is maintained by ``detectors/nameindex.py``. Trackers created
+before the index existed fill it once with::
+
+    ./scripts/pms-admin.py rebuild-name-index
+"""
+
+import re
+import sqlite3
+
+
+INDEX_TABLE = "__ci_trigram"
+
+# Lowest similarity of the CIs returned by similar()
+THRESHOLD = 0.3
+
+# Lowest similarity for best_match() to pick a CI on its own
+MATCH_THRESHOLD = 0.4
+
+
+def normalize(name):
+    """Return the indexed form of a name (lower-case letters and digits only)."""
+    return re.sub(r"[^0-9a-z]", "", (name or "").lower())
+
+
+def trigrams(name):
+    """
+    Return the trigrams of a name.
+
+    Args:
+        name: CI name (may be None)
+
+    Returns:
+        set: Trigrams of the normalized name, empty if it has no letter or digit
+    """
+    normalized = normalize(name)
+    if not normalized:
+        return set()
+    padded = f"  {normalized} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _digits(name):
+    """Return the digits of a name, e.g. "01" for "db-srv-01"."""
+    return re.sub(r"\D", "", name or "")
+
+
+def _sql(db, sql, args=()):
+    """Run a statement on the index table, creating it on first use."""
+    try:
+        db.sql(sql, args)
+    except sqlite3.OperationalError:
+        db.sql(
+            f"create table if not exists {INDEX_TABLE} "
+            "(_trigram varchar, _ci varchar, _size integer, primary key (_trigram, _ci))"
+        )
+        db.sql(f"create index if not exists {INDEX_TABLE}_ci_idx on {INDEX_TABLE} (_ci)")
+        db.sql(sql, args)
+
+
+def sync_ci(db, ciid):
+    """
+    Make the index rows of one CI match its current name.
+
+    Retired CIs have no rows.
+
+    Args:
+        db: Database instance
+        ciid: CI ID
+    """
+    _sql(db, f"delete from {INDEX_TABLE} where _ci = {db.arg}", (ciid,))
+    if db.ci.is_retired(ciid):
+        return
+    grams = trigrams(db.ci.get(ciid, "name"))
+    for gram in grams:
+        _sql(
+            db,
+            f"insert into {INDEX_TABLE} (_trigram, _ci, _size) values ({db.arg}, {db.arg}, {db.arg})",
+            (gram, ciid, len(grams)),
+        )
+
+
+def similar(db, name, limit=10, threshold=THRESHOLD):
+    """
+    Return the CIs whose name is most similar to a name.
+
+    Only CIs sharing at least one trigram with ``name`` are read, and of
+    those only the ones whose trigram count allows a similarity above
+    ``threshold``.
+
+    Args:
+        db: Database instance
+        name: Name as typed, e.g. "dbserver01"
+        limit: Maximum number of CIs returned
+        threshold: Lowest similarity returned, between 0 and 1
+
+    Returns:
+        list: ``(CI ID, similarity)`` tuples, most similar first
+    """
+    grams = sorted(trigrams(name))
+    if not grams:
+        return []
+    # 2s / (n + m) >= t with s <= min(n, m) bounds the size m of candidates
+    size = len(grams)
+    low, high = size * threshold / (2 - threshold), size * (2 - threshold) / max(threshold, 0.01)
+    marks = ", ".join([db.arg] * size)
+    _sql(
+        db,
+        f"select _ci, count(*), max(_size) from {INDEX_TABLE} "
+        f"where _trigram in ({marks}) and _size between {db.arg} and {db.arg} group by _ci",
+        (*grams, low, high),
+    )
+    ranked = []
+    for ciid, shared, ci_size in db.cursor.fetchall():
+        score = 2 * shared / (size + ci_size)
+        if score >= threshold:
+            ranked.append((str(ciid), score))
+    ranked.sort(key=lambda found: (-found[1], int(found[0])))
+    return ranked[:limit]
+
+
+def best_match(db, name):
+    """
+    Return the CI a misspelled name most likely refers to.
+
+    The most similar CI is only returned if it is clearly the best one and
+    has the same digits as ``name``: "web-03" never stands for "web-01".
+
+    Args:
+        db: Database instance
+        name: Name as typed
+
+    Returns:
+        str: CI ID, or None if no CI is a convincing match
+    """
+    wanted = _digits(name)
+    ranked = [
+        (ciid, score)
+        for ciid, score in similar(db, name, limit=20, threshold=MATCH_THRESHOLD)
+        if _digits(db.ci.get(ciid, "name")) == wanted
+    ]
+    if not ranked or (len(ranked) > 1 and ranked[1][1] == ranked[0][1]):
+        return None
+    return ranked[0][0]
+
+
+def rebuild(db):
+    """
+    Rebuild the whole index from the ci table.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        int: Number of indexed CIs
+    """
+    _sql(db, f"delete from {INDEX_TABLE}")
+    for ciid in db.ci.getnodeids(retired=False):
+        sync_ci(db, ciid)
+    _sql(db, f"select count(distinct _ci) from {INDEX_TABLE}")
+    return db.cursor.fetchone()[0]
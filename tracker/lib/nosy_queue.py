@@ -0,0 +1,445 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Nosy notification queue for coalesced and digest delivery.
+
+By default ``nosyreaction`` mails every new message to the nosy list as soon
+as it is added. With a coalescing window configured (``[nosyreaction]
+coalesce_window`` in ``detectors/config.ini``), notifications are instead
+queued in the ``nosyqueue`` class, one entry per (user, issue), and all
+messages that arrive within the window are sent as a single email. Users who
+set ``nosy_digest`` on their account receive a single daily email covering
+every issue that changed, sent at ``digest_hour``.
+
+Queued entries are delivered by ``flush()``, which is run periodically with
+``scripts/pms-admin.py flush-nosy`` (e.g. from cron every minute).
+"""
+
+import base64
+import datetime
+import mimetypes
+import secrets
+import time
+from email import encoders
+from email.header import Header
+from email.mime.base import MIMEBase
+
+import batch_lookup
+import detector_log
+import detector_settings
+from roundup import date, hyperdb
+from roundup.mailer import Mailer, MessageSendError, nice_sender_header
+
+
+logger = detector_log.get_logger(__name__)
+
+
+def get_settings(db):
+    """
+    Return the queueing settings for this tracker.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        tuple: (coalesce_window in seconds, digest_hour in UTC)
+    """
+    settings = detector_settings.get(db)
+    return settings.coalesce_window, settings.digest_hour % 24
+
+
+def next_digest_time(now, digest_hour):
+    """
+    Return the next time the daily digest is due.
+
+    Args:
+        now: Current time as a naive UTC ``datetime``
+        digest_hour: Hour of the day (0-23) at which digests are sent
+
+    Returns:
+        datetime: Today at ``digest_hour`` if still ahead, else tomorrow
+    """
+    due = now.replace(hour=digest_hour, minute=0, second=0, microsecond=0)
+    if due <= now:
+        due += datetime.timedelta(days=1)
+    return due
+
+
+def _to_roundup_date(value):
+    return date.Date(value.strftime("%Y-%m-%d.%H:%M:%S"))
+
+
+def _utcnow():
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def pending_recipients(db, cl, issueid, msgid, oldvalues):
+    """
+    List the users who would be notified of a new message right now.
+
+    This mirrors the recipient selection of ``IssueClass.nosymessage``: the
+    author according to ``messages_to_author``, then every nosy user who is
+    not anonymous, may view the message and has not already received it.
+
+    Args:
+        db: Database instance
+        cl: Issue class
+        issueid: Issue the message was added to
+        msgid: New message ID
+        oldvalues: Old values of the issue (None on create)
+
+    Returns:
+        list: User IDs, in notification order
+    """
+    authid = db.msg.get(msgid, "author")
+    seen = set(db.msg.get(msgid, "recipients") or [])
+    nosy = cl.get(issueid, "nosy")
+    users = []
+
+    def good_recipient(userid):
+        if not userid or userid in seen:
+            return False
+        if db.user.get(userid, "username") == "anonymous":
+            return False
+        if not db.user.get(userid, "address"):
+            return False
+        for prop in "content", "files":
+            if not db.security.hasPermission("View", userid, "msg", prop, msgid):
+                return False
+        return True
+
+    to_author = db.config.MESSAGES_TO_AUTHOR
+    if good_recipient(authid) and (
+        to_author == "yes"
+        or (to_author == "new" and not oldvalues)
+        or (to_author == "nosy" and authid in nosy)
+    ):
+        users.append(authid)
+    if authid:
+        seen.add(authid)
+
+    for userid in nosy:
+        if good_recipient(userid):
+            users.append(userid)
+            seen.add(userid)
+    return users
+
+
+def enqueue(db, cl, issueid, msgid, oldvalues, now=None):
+    """
+    Queue notifications for a new message instead of sending them.
+
+    Digest users are always queued. Everybody else is queued only when a
+    coalescing window is configured. Queued users are added to the message's
+    ``recipients`` so that ``nosymessage`` will not mail them a second time.
+
+    Args:
+        db: Database instance
+        cl: Issue class
+        issueid: Issue the message was added to
+        msgid: New message ID
+        oldvalues: Old values of the issue (None on create)
+        now: Current time as a naive UTC ``datetime`` (for tests)
+
+    Returns:
+        bool: True if every recipient was queued, so no immediate send is needed
+    """
+    window, digest_hour = get_settings(db)
+    digest_users = {
+        userid
+        for userid, digest in batch_lookup.get_values(
+            db, "user", cl.get(issueid, "nosy"), "nosy_digest"
+        ).items()
+        if digest
+    }
+    if not window and not digest_users:
+        # nothing to hold back: let nosymessage send as usual
+        return False
+
+    recipients = pending_recipients(db, cl, issueid, msgid, oldvalues)
+    if not recipients:
+        return True
+
+    if now is None:
+        now = _utcnow()
+    queued = []
+    for userid in recipients:
+        digest = userid in digest_users
+        if digest:
+            due = next_digest_time(now, digest_hour)
+        elif window:
+            due = now + datetime.timedelta(seconds=window)
+        else:
+            continue
+        _add_to_queue(db, userid, issueid, msgid, digest, due)
+        queued.append(userid)
+
+    if queued:
+        db.msg.set(msgid, recipients=list(db.msg.get(msgid, "recipients")) + queued)
+        logger.debug(
+            "Queued nosy notifications for issue%s",
+            issueid,
+            issue_id=issueid,
+            message_id=msgid,
+            users=queued,
+        )
+    return len(queued) == len(recipients)
+
+
+def _add_to_queue(db, userid, issueid, msgid, digest, due):
+    """Fold a message into the pending entry for (user, issue), or create one.
+
+    The due time of an existing entry is not pushed back, so a steady stream
+    of messages is still delivered at most one window after the first one.
+    """
+    for entryid in db.nosyqueue.filter(None, {"user": userid, "issue": issueid}):
+        if bool(db.nosyqueue.get(entryid, "digest")) == digest:
+            messages = db.nosyqueue.get(entryid, "messages")
+            if msgid not in messages:
+                db.nosyqueue.set(entryid, messages=messages + [msgid])
+            return entryid
+    return db.nosyqueue.create(
+        user=userid,
+        issue=issueid,
+        messages=[msgid],
+        digest=digest,
+        due=_to_roundup_date(due),
+    )
+
+
+def _format_message(db, msgid):
+    """Render one queued message for inclusion in a combined email."""
+    msg = db.msg
+    authid = msg.get(msgid, "author")
+    author = db.user.get(authid, "realname") or db.user.get(authid, "username")
+    when = msg.get(msgid, "date")
+    heading = f"{author} added the comment"
+    if when:
+        heading += f" ({when.pretty('%Y-%m-%d %H:%M')})"
+    return f"--- {heading}:\n\n{msg.get(msgid, 'content', '')}\n"
+
+
+def _format_issue(db, issueid, messages, links):
+    """Render all queued messages of one issue, signed like nosy messages."""
+    title = db.issue.get(issueid, "title")
+    parts = [f"[issue{issueid}] {title}", ""]
+    signature = db.issue.email_signature(issueid, None)
+    if db.config.EMAIL_SIGNATURE_POSITION == "top":
+        parts.append(signature)
+    parts.extend(_format_message(db, msgid) for msgid in messages)
+    parts.extend(links)
+    if db.config.EMAIL_SIGNATURE_POSITION == "bottom":
+        parts.append(signature)
+    return "\n".join(parts)
+
+
+def _attachments(db, messages):
+    """Split the files of ``messages`` into attachments and download notes.
+
+    Files larger than ``NOSY_MAX_ATTACHMENT_SIZE`` are linked instead of
+    attached, as in ``IssueClass.send_message``.
+    """
+    files = []
+    links = []
+    for msgid in messages:
+        for fileid in db.msg.get(msgid, "files"):
+            if db.filesize("file", fileid, None) <= db.config.NOSY_MAX_ATTACHMENT_SIZE:
+                files.append(fileid)
+            else:
+                name = db.file.get(fileid, "name")
+                links.append(
+                    f"File '{name}' not attached - you can download it from "
+                    f"{db.config.TRACKER_WEB}file{fileid}."
+                )
+    return files, links
+
+
+def _attach(db, mailer, message, fileid):
+    name = db.file.get(fileid, "name")
+    mime_type = (
+        db.file.get(fileid, "type") or mimetypes.guess_type(name)[0] or "application/octet-stream"
+    )
+    main, sub = mime_type.split("/", 1)
+    if main == "text":
+        part = mailer.get_text_message("utf-8", sub)
+        part.set_payload(db.file.get(fileid, "content"), part.get_charset())
+    else:
+        part = MIMEBase(main, sub)
+        part.set_payload(db.file.get(fileid, "binary_content"))
+        encoders.encode_base64(part)
+    part["Content-Disposition"] = f'attachment;\n filename="{name}"'
+    message.attach(part)
+
+
+def _message_id(db, issueid):
+    """Make up a Message-ID like ``IssueClass.send_message`` does."""
+    token = base64.b32encode(secrets.token_bytes(10)).decode("ascii")
+    return f"<{time.time()}.{token}.issue{issueid}@{db.config.MAIL_DOMAIN}>"
+
+
+def _header(value):
+    try:
+        value.encode("ascii")
+    except UnicodeError:
+        return Header(value, "utf-8")
+    return value
+
+
+def _issue_headers(db, message, issueid):
+    """Add the ``X-Roundup-issue-*`` headers of ``IssueClass.send_message``."""
+    for propname, prop in db.issue.getprops().items():
+        if not isinstance(prop, (hyperdb.Link, hyperdb.Multilink)):
+            continue
+        cl = db.getclass(prop.classname)
+        label = "name" if "name" in cl.getprops() else None
+        if prop.msg_header_property in cl.getprops():
+            label = prop.msg_header_property
+        if prop.msg_header_property == "":
+            label = None
+        value = db.issue.get(issueid, propname)
+        if not label or not value:
+            continue
+        values = [value] if isinstance(prop, hyperdb.Link) else value
+        message[f"X-Roundup-issue-{propname}"] = _header(
+            ", ".join(cl.get(v, label) for v in values)
+        )
+    message["X-Roundup-issue-Id"] = issueid
+
+
+def _send(db, mailer, userid, subject, entries):
+    """
+    Mail the queued messages of ``entries`` to one user.
+
+    The email is built like ``IssueClass.send_message`` builds nosy
+    messages: it comes from the tracker address, replies go to
+    ``TRACKER_REPLYTO_ADDRESS`` (the tracker by default) and files are
+    attached. An email about a single issue answers the last queued message,
+    so that replies reach the issue through the mail gateway.
+
+    Returns:
+        bool: True if the entries are done with (sent, or never deliverable)
+    """
+    address = db.user.get(userid, "address")
+    if not address:
+        # nothing we can ever deliver to; drop the entry
+        return True
+    config = db.config
+    charset = getattr(config, "EMAIL_CHARSET", "utf-8")
+    messages = []
+    files = []
+    parts = []
+    for entry in entries:
+        attached, links = _attachments(db, entry.messages)
+        messages.extend(entry.messages)
+        files.extend(attached)
+        parts.append(_format_issue(db, entry.issue, entry.messages, links))
+    body = "\n\n".join(parts)
+
+    authors = {db.msg.get(msgid, "author") for msgid in messages}
+    if len(entries) == 1 and len(authors) == 1:
+        [authid] = authors
+        name = db.user.get(authid, "realname") or db.user.get(authid, "username")
+        from_tag = getattr(config, "EMAIL_FROM_TAG", "")
+        if from_tag:
+            name += " " + from_tag
+    else:
+        name = config.TRACKER_NAME
+        authid = None
+
+    message = mailer.get_standard_message(multipart=bool(files))
+    replyto = config.TRACKER_REPLYTO_ADDRESS
+    if replyto == "AUTHOR" and authid:
+        replyto = nice_sender_header(name, db.user.get(authid, "address"), charset)
+    elif not replyto or replyto == "AUTHOR":
+        replyto = nice_sender_header(config.TRACKER_NAME, config.TRACKER_EMAIL, charset)
+    message["Reply-To"] = replyto
+    message["Message-Id"] = _message_id(db, entries[0].issue)
+    if len(entries) == 1:
+        # web messages get their Message-ID when first mailed, as in
+        # IssueClass.send_message
+        inreplyto = db.msg.get(messages[-1], "messageid")
+        if not inreplyto:
+            inreplyto = _message_id(db, entries[0].issue)
+            db.msg.set(messages[-1], messageid=inreplyto)
+        message["In-Reply-To"] = inreplyto
+        _issue_headers(db, message, entries[0].issue)
+
+    if files:
+        part = mailer.get_standard_message()
+        part.set_payload(body, part.get_charset())
+        message.attach(part)
+        for fileid in files:
+            _attach(db, mailer, message, fileid)
+    else:
+        message.set_payload(body, message.get_charset())
+    mailer.set_message_attributes(message, [address], subject, (name, config.TRACKER_EMAIL))
+
+    try:
+        mailer.smtp_send([address], message.as_string())
+    except MessageSendError as e:
+        logger.error("Failed to send queued notification: %s", e, user_id=userid)
+        return False
+    return True
+
+
+def flush(db, now=None):
+    """
+    Send every queued notification that is due.
+
+    Coalesced entries become one email per (user, issue); digest entries are
+    grouped into one email per user. Sent entries are destroyed; entries whose
+    delivery fails are kept for the next run. The caller commits.
+
+    Args:
+        db: Database instance (opened as admin)
+        now: Current time as a naive UTC ``datetime`` (for tests)
+
+    Returns:
+        int: Number of emails sent
+    """
+    if now is None:
+        now = _utcnow()
+    cutoff = _to_roundup_date(now)
+
+    single = []
+    digests = {}
+    for entryid in db.nosyqueue.list():
+        entry = db.nosyqueue.getnode(entryid)
+        if entry.due is not None and entry.due > cutoff:
+            continue
+        if entry.digest:
+            digests.setdefault(entry.user, []).append(entry)
+        else:
+            single.append(entry)
+
+    mailer = Mailer(db.config)
+    sent = 0
+    done = []
+    for entry in single:
+        title = db.issue.get(entry.issue, "title")
+        subject = f"[issue{entry.issue}] {title}"
+        if _send(db, mailer, entry.user, subject, [entry]):
+            done.append(entry.id)
+            sent += 1
+
+    for userid, entries in digests.items():
+        entries.sort(key=lambda e: int(e.issue))
+        count = sum(len(e.messages) for e in entries)
+        subject = (
+            f"[{db.config.TRACKER_NAME}] Daily digest: "
+            f"{count} new message(s) on {len(entries)} issue(s)"
+        )
+        if _send(db, mailer, userid, subject, entries):
+            done.extend(entry.id for entry in entries)
+            sent += 1
+
+    for entryid in done:
+        db.nosyqueue.destroy(entryid)
+    if done:
+        # destroying a node leaves its key in Roundup's node cache LRU list,
+        # which breaks the next cache eviction on a long-lived database
+        db.clearCache()
+
+    logger.info("Flushed nosy queue: %d email(s) sent", sent, emails_sent=sent)
+    return sent
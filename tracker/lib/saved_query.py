@@ -0,0 +1,287 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Materialized saved queries.
+
+A saved query (``query`` item) is a search URL that is run again each time
+it is opened. A query marked ``materialized`` also keeps the IDs of its
+matching items in the ``__query_matches`` table of the tracker database:
+
+- the whole set is computed when the query is marked materialized or its
+  class or URL changes;
+- afterwards, each time an item of its class is created, changed, retired
+  or restored, ``detectors/savedquery.py`` evaluates the query's filter on
+  that one item only and adds or removes it.
+
+"Your Queries" in the sidebar shows the number of matches of materialized
+queries with a single count, and opening such a query lists the stored IDs
+instead of searching the whole class.
+
+Only queries of issues, changes, CIs and CI relationships whose result
+depends on the item's own properties can be kept up to date this way. Queries with a full-text search, a filter on a property
+of a linked item (``assignedto.username``), on the current user or on a date
+relative to now (``-1w;``) cannot be materialized. Items changed without
+running the reactors (``roundup-admin import``) are picked up by::
+
+    ./scripts/pms-admin.py refresh-queries
+
+The materialized queries are read and parsed once per transaction (and
+again after a query changes), not on every search and save.
+"""
+
+import functools
+import sqlite3
+from urllib.parse import parse_qsl
+
+import search_cache
+from roundup import hyperdb
+from roundup.cgi.templating import lookupIds
+
+
+MATCHES_TABLE = "__query_matches"
+
+# Classes whose saved queries can be materialized
+MATERIALIZED_CLASSES = ("issue", "change", "ci", "cirelationship")
+
+
+def _form(url):
+    """Return the arguments of a query URL by name, without the ``@``/``:`` prefix."""
+    form = {}
+    for name, value in parse_qsl(url or "", keep_blank_values=True):
+        if name[:1] in ("@", ":"):
+            name = "@" + name[1:]
+        form.setdefault(name, []).append(value)
+    return form
+
+
+def _split(values):
+    """Return the comma-separated entries of form values, like the web interface."""
+    return [entry.strip() for value in values for entry in value.split(",") if entry.strip()]
+
+
+def parse(db, classname, url):
+    """
+    Return the filterspec of a saved query, as the web interface builds it.
+
+    Args:
+        db: Database instance
+        classname: Searched class
+        url: Query URL (the part after "?")
+
+    Returns:
+        dict: ``Class.filter()`` filterspec
+
+    Raises:
+        ValueError: If the query cannot be materialized
+    """
+    try:
+        klass = db.getclass(classname)
+    except KeyError:
+        raise ValueError(f"unknown class {classname!r}") from None
+    if classname not in MATERIALIZED_CLASSES:
+        raise ValueError(f"queries of {classname} cannot be materialized")
+    form = _form(url)
+    if any(value.strip() for value in form.get("@search_text", [])):
+        raise ValueError("full-text searches cannot be materialized")
+
+    props = klass.getprops()
+    filterspec = {}
+    for name in _split(form.get("@filter", [])):
+        if name not in form:
+            continue
+        if "." in name:
+            raise ValueError(f"filters on linked items ({name}) cannot be materialized")
+        prop = props.get(name)
+        if prop is None:
+            raise ValueError(f"unknown property {name!r}")
+        values = form[name]
+        if isinstance(prop, (hyperdb.Link, hyperdb.Multilink)):
+            if "@current_user" in _split(values):
+                raise ValueError("filters on the current user cannot be materialized")
+            filterspec[name] = lookupIds(db, prop, _split(values))
+        elif name == "id":
+            filterspec[name] = _split(values)
+        else:
+            if isinstance(prop, hyperdb.Date) and any(
+                search_cache.RELATIVE_DATE.match(bound)
+                for value in values
+                for bound in value.split(";")
+            ):
+                raise ValueError(f"dates relative to now ({name}) cannot be materialized")
+            filterspec[name] = values if len(values) > 1 else values[0]
+    return filterspec
+
+
+def _transaction_queries(queries):
+    """Hold the parsed materialized queries in ``db.transactions``; run by ``db.commit()``."""
+
+
+def _materialized(db, classname):
+    """Return ``[(query ID, filterspec)]`` for the live materialized queries of a class."""
+    for method, args in db.transactions:
+        if method is _transaction_queries:
+            return args[0].get(classname, [])
+    queries = {}
+    for queryid in db.query.filter(None, {"materialized": True}):
+        klass = db.query.get(queryid, "klass")
+        try:
+            filterspec = parse(db, klass, db.query.get(queryid, "url"))
+        except ValueError:
+            # changed without running the auditor; matches are not kept
+            continue
+        queries.setdefault(klass, []).append((queryid, filterspec))
+    db.transactions.append((_transaction_queries, (queries,)))
+    return queries.get(classname, [])
+
+
+def forget(db):
+    """Read the materialized queries again on next use, after a query changed."""
+    db.transactions[:] = [
+        entry for entry in db.transactions if entry[0] is not _transaction_queries
+    ]
+
+
+def _sql(db, sql, args=()):
+    """Run a statement on the matches table, creating it on first use."""
+    try:
+        db.sql(sql, args)
+    except sqlite3.OperationalError:
+        db.sql(
+            f"create table if not exists {MATCHES_TABLE} "
+            "(_query varchar, _itemid varchar, primary key (_query, _itemid))"
+        )
+        db.sql(sql, args)
+
+
+def refresh(db, queryid):
+    """
+    Recompute the matches of a saved query.
+
+    Args:
+        db: Database instance
+        queryid: Query ID
+
+    Returns:
+        int: Number of matches, or None if the query is not materialized
+    """
+    _sql(db, f"delete from {MATCHES_TABLE} where _query = {db.arg}", (queryid,))
+    if db.query.is_retired(queryid) or not db.query.get(queryid, "materialized"):
+        return None
+    classname = db.query.get(queryid, "klass")
+    klass = db.getclass(classname)
+    filterspec = parse(db, classname, db.query.get(queryid, "url"))
+    # bypass the search cache and materialized results
+    itemids = type(klass).filter(klass, None, filterspec)
+    for itemid in itemids:
+        _sql(
+            db,
+            f"insert into {MATCHES_TABLE} (_query, _itemid) values ({db.arg}, {db.arg})",
+            (queryid, itemid),
+        )
+    return len(itemids)
+
+
+def refresh_all(db):
+    """
+    Recompute the matches of every materialized query.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        int: Number of materialized queries
+    """
+    _sql(db, f"delete from {MATCHES_TABLE}")
+    queryids = db.query.filter(None, {"materialized": True})
+    for queryid in queryids:
+        try:
+            refresh(db, queryid)
+        except ValueError:
+            # changed without running the auditor; matches are not kept
+            continue
+    return len(queryids)
+
+
+def update(db, classname, itemid):
+    """
+    Add an item to or remove it from the matches of the materialized queries of its class.
+
+    Args:
+        db: Database instance
+        classname: Class of the changed item
+        itemid: Changed item ID
+    """
+    klass = db.getclass(classname)
+    for queryid, filterspec in _materialized(db, classname):
+        if type(klass).filter(klass, [itemid], filterspec):
+            sql = f"insert or ignore into {MATCHES_TABLE} (_query, _itemid) values ({db.arg}, {db.arg})"
+        else:
+            sql = f"delete from {MATCHES_TABLE} where _query = {db.arg} and _itemid = {db.arg}"
+        _sql(db, sql, (queryid, itemid))
+
+
+def matches(db, queryid):
+    """
+    Return the matching item IDs of a materialized query.
+
+    Args:
+        db: Database instance
+        queryid: Query ID
+
+    Returns:
+        list: Item IDs, or None if the query is not materialized
+    """
+    if not db.query.get(queryid, "materialized"):
+        return None
+    _sql(db, f"select _itemid from {MATCHES_TABLE} where _query = {db.arg}", (queryid,))
+    return [row[0] for row in db.cursor.fetchall()]
+
+
+def count(db, queryid):
+    """
+    Return the number of matches of a materialized query.
+
+    Args:
+        db: Database instance
+        queryid: Query ID
+
+    Returns:
+        int: Number of matches, or None if the query is not materialized
+    """
+    if not db.query.get(queryid, "materialized"):
+        return None
+    _sql(db, f"select count(*) from {MATCHES_TABLE} where _query = {db.arg}", (queryid,))
+    return db.cursor.fetchone()[0]
+
+
+def filter(
+    db,
+    klass,
+    inner,
+    search_matches,
+    filterspec,
+    sort=[],  # noqa: B006 - same signature as Class.filter()
+    group=[],  # noqa: B006
+    retired=False,
+    exact_match_spec={},  # noqa: B006
+    limit=None,
+    offset=None,
+):
+    """Replacement for ``Class.filter()`` (``inner``) listing the matches of materialized queries."""
+    if search_matches is None and retired is False and not exact_match_spec:
+        for queryid, spec in _materialized(db, klass.classname):
+            if spec == filterspec:
+                # only sort the stored IDs; retired items were removed when retired
+                search_matches = matches(db, queryid)
+                filterspec = {}
+                break
+    return inner(search_matches, filterspec, sort, group, retired, exact_match_spec, limit, offset)
+
+
+def install(db):
+    """List the matches of materialized queries of an open database without searching."""
+    for classname in db.getclasses():
+        if classname in MATERIALIZED_CLASSES:
+            klass = db.getclass(classname)
+            klass.filter = functools.partial(filter, db, klass, klass.filter)
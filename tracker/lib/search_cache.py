@@ -0,0 +1,261 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Result cache for searches of issues, changes, CIs and CI relationships.
+
+Index pages, saved queries and REST collections run ``Class.filter()`` (and,
+with a text search, ``db.indexer.search()``) on every request, although the
+same few searches are repeated all day. The ``searchcache`` detector routes
+both through an in-memory LRU cache shared by the requests of a process.
+
+Each class has a generation number in the ``__search_generation`` table of
+the tracker database, bumped by a reactor in the transaction of every
+create, set, retire and restore (and by the full-text queue and rebuild of
+``fts_index`` when they change what text searches find). A cached result is
+keyed by the search arguments and the generations of the classes it depends
+on: the searched class and the classes reached by its filtered and sorted
+properties (for text searches, every class it links to). Any change in
+those classes, from any process, moves the key on; stale entries are never
+served and age out of the LRU. Searches with dates relative to now
+("-1d;", ".") and searches inside a transaction that changed data are not
+cached.
+
+The number of cached searches per process is set by ``[searchcache]
+search_cache_size`` in ``detectors/config.ini`` (0 disables the cache).
+"""
+
+import collections
+import functools
+import re
+import sqlite3
+import threading
+
+import detector_settings
+from roundup import hyperdb
+
+
+# Classes whose searches are cached
+CACHED_CLASSES = ("issue", "change", "ci", "cirelationship")
+
+GENERATION_TABLE = "__search_generation"
+
+# date range bounds relative to now: intervals ("-1w", "3d") and "."
+RELATIVE_DATE = re.compile(r"^\s*(?:[-+.]|.*[a-zA-Z])")
+
+_cache = collections.OrderedDict()
+_lock = threading.Lock()
+
+# Lookups served from and added to the cache, for monitoring and tests
+counters = collections.Counter()
+
+
+def _freeze(value):
+    """Return a hashable, order-independent form of search arguments."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(map(str, value)))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _sort_props(spec):
+    """Return the property names of a sort or group spec."""
+    if not spec:
+        return []
+    if isinstance(spec, tuple) and len(spec) == 2 and not isinstance(spec[0], tuple):
+        spec = [spec]
+    return [prop for _direction, prop in spec if prop]
+
+
+def _classes(db, klass, names):
+    """Return the classes a search on ``names`` (dotted paths) of ``klass`` reads."""
+    found = {klass.classname}
+    for name in names:
+        cl = klass
+        for part in str(name).split("."):
+            prop = cl.getprops().get(part)
+            if not isinstance(prop, (hyperdb.Link, hyperdb.Multilink)):
+                break
+            cl = db.getclass(prop.classname)
+            found.add(cl.classname)
+    return found
+
+
+def _relative_dates(db, klass, filterspec):
+    """Return True if a Date value of ``filterspec`` (dotted paths) is relative to now."""
+    for name, value in filterspec.items():
+        cl, prop = klass, None
+        for part in str(name).split("."):
+            prop = cl.getprops().get(part)
+            if not isinstance(prop, (hyperdb.Link, hyperdb.Multilink)):
+                break
+            cl = db.getclass(prop.classname)
+        if not isinstance(prop, hyperdb.Date):
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        if any(
+            RELATIVE_DATE.match(bound)
+            for value in values
+            if isinstance(value, str)
+            for bound in value.split(";")
+        ):
+            return True
+    return False
+
+
+def _generations(db, classnames):
+    """Return the generations of some classes (0 for never changed)."""
+    classnames = sorted(classnames)
+    placeholders = ",".join([db.arg] * len(classnames))
+    try:
+        db.sql(
+            f"select _class, _generation from {GENERATION_TABLE} where _class in ({placeholders})",
+            tuple(classnames),
+        )
+        found = dict(db.cursor.fetchall())
+    except sqlite3.OperationalError:
+        # no such table: nothing changed since the cache was installed
+        found = {}
+    return tuple((classname, found.get(classname, 0)) for classname in classnames)
+
+
+def _transaction_changed():
+    """Mark the current transaction as changing data; run by ``db.commit()``."""
+
+
+def _changed_in_transaction(db):
+    """Return True if the current transaction changed data.
+
+    ``db.commit()`` and ``db.rollback()`` drop the mark with the rest of
+    ``db.transactions``.
+    """
+    return any(method is _transaction_changed for method, _args in db.transactions)
+
+
+def bump(db, classname):
+    """
+    Invalidate the cached searches depending on a class.
+
+    Args:
+        db: Database instance
+        classname: Class whose items changed
+    """
+    if not _changed_in_transaction(db):
+        # results computed before this transaction ends are not cached
+        db.transactions.append((_transaction_changed, ()))
+    sql = (
+        f"insert into {GENERATION_TABLE} (_class, _generation) values ({db.arg}, 1) "
+        "on conflict (_class) do update set _generation = _generation + 1"
+    )
+    try:
+        db.sql(sql, (classname,))
+    except sqlite3.OperationalError:
+        # first change since the cache was installed
+        db.sql(
+            f"create table if not exists {GENERATION_TABLE} "
+            "(_class varchar primary key, _generation integer)"
+        )
+        db.sql(sql, (classname,))
+
+
+def _cached(db, key, compute):
+    """Return the cached value for ``key``, computing and storing it if needed."""
+    size = detector_settings.get(db).search_cache_size
+    if not size or _changed_in_transaction(db):
+        return compute()
+    key = (db.config.DATABASE, *key)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            counters["hits"] += 1
+            return _cache[key]
+    value = compute()
+    with _lock:
+        counters["misses"] += 1
+        _cache[key] = value
+        while len(_cache) > size:
+            _cache.popitem(last=False)
+    return value
+
+
+def filter(
+    db,
+    klass,
+    inner,
+    search_matches,
+    filterspec,
+    sort=[],  # noqa: B006 - same signature as Class.filter()
+    group=[],  # noqa: B006
+    retired=False,
+    exact_match_spec={},  # noqa: B006
+    limit=None,
+    offset=None,
+):
+    """Replacement for ``Class.filter()`` (``inner``) answering repeated searches from the cache."""
+    compute = functools.partial(
+        inner,
+        search_matches,
+        filterspec,
+        sort,
+        group,
+        retired,
+        exact_match_spec,
+        limit,
+        offset,
+    )
+    if _relative_dates(db, klass, filterspec):
+        # "-1d;" finds other items tomorrow without any change
+        return compute()
+    names = [*filterspec, *exact_match_spec, *_sort_props(sort), *_sort_props(group)]
+    key = (
+        "filter",
+        klass.classname,
+        _freeze(search_matches),
+        _freeze(filterspec),
+        _freeze(sort),
+        _freeze(group),
+        retired,
+        _freeze(exact_match_spec),
+        limit,
+        offset,
+        _generations(db, _classes(db, klass, names)),
+    )
+    return list(_cached(db, key, compute))
+
+
+def search(db, search_terms, klass, ignore=None):
+    """Replacement for ``db.indexer.search()`` answering repeated text searches from the cache."""
+    compute = functools.partial(type(db.indexer).search, db.indexer, search_terms, klass, ignore)
+    if klass.classname not in CACHED_CLASSES:
+        return compute()
+    linked = [
+        name
+        for name, prop in klass.getprops().items()
+        if isinstance(prop, (hyperdb.Link, hyperdb.Multilink))
+    ]
+    key = (
+        "search",
+        klass.classname,
+        _freeze(search_terms),
+        _freeze(ignore),
+        _generations(db, _classes(db, klass, linked)),
+    )
+    return dict(_cached(db, key, compute))
+
+
+def install(db):
+    """Route the searches of the cached classes of an open database through the cache."""
+    for classname in CACHED_CLASSES:
+        klass = db.getclass(classname)
+        klass.filter = functools.partial(filter, db, klass, klass.filter)
+    db.indexer.search = functools.partial(search, db)
+
+
+def clear():
+    """Empty the cache of this process."""
+    with _lock:
+        _cache.clear()
+        counters.clear()
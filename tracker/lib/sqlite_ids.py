@@ -0,0 +1,56 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Allocate item IDs on sqlite without committing.
+
+Roundup's sqlite backend commits after every ID allocation, so a
+``create()`` commits everything done so far in the transaction. Code that
+creates several items and commits (or rolls back) them together, like
+batch mail ingestion (``lib/mail_batch.py``) and bulk REST operations
+(``lib/bulk_operations.py``), installs ``newid()`` instead::
+
+    sqlite_ids.install(db)
+    try:
+        ...  # create items, then db.commit() or db.rollback()
+    finally:
+        sqlite_ids.uninstall(db)
+
+The first write of the transaction takes the database write lock
+(``BEGIN IMMEDIATE``) and keeps it until the commit or rollback, so other
+writers wait instead of allocating the same IDs.
+"""
+
+import functools
+
+
+def newid(db, classname):
+    """
+    Allocate an ID like Roundup's sqlite backend, without committing.
+
+    Args:
+        db: sqlite database instance
+        classname: Class of the new item
+
+    Returns:
+        str: New item ID
+    """
+    if not db.conn.in_transaction:
+        db.conn.isolation_level = None
+        db.sql("BEGIN IMMEDIATE")
+        db.conn.isolation_level = ""
+    db.sql(f"select num from ids where name={db.arg}", (classname,))
+    found = int(db.cursor.fetchone()[0])
+    db.sql(f"update ids set num=num+1 where name={db.arg}", (classname,))
+    return str(found)
+
+
+def install(db):
+    """Make ``db`` allocate IDs with ``newid()``; other backends are left alone."""
+    if db.dbtype == "sqlite":
+        db.newid = functools.partial(newid, db)
+
+
+def uninstall(db):
+    """Restore the backend's own ID allocation."""
+    vars(db).pop("newid", None)
@@ -0,0 +1,211 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Message-ID index for routing email replies to their thread.
+
+Roundup stores ``msg.messageid`` as a plain string and finds the parent of a
+reply with a case-insensitive scan of every message, then looks for the issue
+holding that message. With hundreds of thousands of messages that scan is the
+slowest part of handling a reply.
+
+Each live message with a Message-ID has one ``msgref`` item whose key is the
+lower-cased Message-ID. It also records the designator of the issue or change
+the message belongs to, so the mail gateway routes a reply with a single key
+lookup (``ParsedMessage.get_nodeid`` in ``interfaces.py``). Messages attached
+to no item or to several items have no designator there and are routed by
+Roundup, whose parent lookup (``db.msg.stringFind(messageid=...)``) also
+answers from the index.
+
+Only the first message with a given Message-ID is indexed.
+
+The index is maintained by ``detectors/threadindex.py``. Messages stored
+before the index existed, or with ``roundup-admin import``, are found by
+Roundup's scan and indexed when a reply first refers to them; fill the whole
+index at once with::
+
+    ./scripts/pms-admin.py rebuild-thread-index
+"""
+
+import functools
+
+import batch_lookup
+import detector_log
+
+
+logger = detector_log.get_logger(__name__)
+
+# IssueClasses whose messages are indexed with their item
+THREAD_CLASSES = ("issue", "change")
+
+
+def normalize(messageid):
+    """Return the index key for a Message-ID (stripped, lower-cased)."""
+    return messageid.strip().lower()
+
+
+def lookup(db, messageid):
+    """
+    Return the message with a Message-ID and the item it belongs to.
+
+    Args:
+        db: Database instance
+        messageid: Message-ID in any case, e.g. from an In-Reply-To header
+
+    Returns:
+        tuple: (msg ID, item designator or None), or None if the Message-ID
+        is not indexed
+    """
+    try:
+        entryid = db.msgref.lookup(normalize(messageid))
+    except KeyError:
+        return None
+    return db.msgref.get(entryid, "msg"), db.msgref.get(entryid, "item")
+
+
+def string_find(db, **requirements):
+    """
+    Replacement for ``db.msg.stringFind()`` answering Message-ID searches from the index.
+
+    A Message-ID missing from the index is searched by Roundup, and the
+    messages found are indexed, so that replies to messages stored before
+    the index existed are still routed.
+    """
+    string_find = functools.partial(type(db.msg).stringFind, db.msg)
+    if set(requirements) != {"messageid"}:
+        return string_find(**requirements)
+    found = lookup(db, requirements["messageid"])
+    if found:
+        return [found[0]]
+    msgids = string_find(**requirements)
+    for msgid in msgids:
+        add_message(db, msgid, thread_of(db, msgid))
+    return msgids
+
+
+def thread_of(db, msgid):
+    """
+    Return the designator of the only live item holding a message.
+
+    Args:
+        db: Database instance
+        msgid: Message ID
+
+    Returns:
+        str: Designator such as "issue12", or None if no item or several
+        items hold the message
+    """
+    designators = []
+    for classname in THREAD_CLASSES:
+        for itemid in db.getclass(classname).find(messages=msgid):
+            designators.append(f"{classname}{itemid}")
+    return designators[0] if len(designators) == 1 else None
+
+
+def _entry(db, msgid, messageid):
+    """Return the index entry of a message, or None if it is not the indexed one."""
+    if not messageid:
+        return None
+    try:
+        entryid = db.msgref.lookup(normalize(messageid))
+    except KeyError:
+        return None
+    return entryid if db.msgref.get(entryid, "msg") == msgid else None
+
+
+def _create(db, key, msgid, item):
+    # Roundup only takes strings for String properties on create
+    if item:
+        return db.msgref.create(messageid=key, msg=msgid, item=item)
+    return db.msgref.create(messageid=key, msg=msgid)
+
+
+def add_message(db, msgid, item=None):
+    """
+    Index the Message-ID of a message.
+
+    Args:
+        db: Database instance
+        msgid: Message ID
+        item: Designator of the item holding the message, if known
+    """
+    messageid = db.msg.get(msgid, "messageid")
+    if not messageid:
+        return
+    key = normalize(messageid)
+    try:
+        entryid = db.msgref.lookup(key)
+    except KeyError:
+        _create(db, key, msgid, item)
+        return
+    logger.debug(
+        "Message-ID %s of msg%s is already indexed for msg%s",
+        key,
+        msgid,
+        db.msgref.get(entryid, "msg"),
+        msg_id=msgid,
+    )
+
+
+def remove_message(db, msgid, messageid):
+    """
+    Remove the index entry of a message.
+
+    Args:
+        db: Database instance
+        msgid: Message ID
+        messageid: Message-ID the message was indexed with
+    """
+    entryid = _entry(db, msgid, messageid)
+    if entryid is not None:
+        db.msgref.destroy(entryid)
+
+
+def update_threads(db, msgids):
+    """
+    Record the item each message now belongs to.
+
+    Args:
+        db: Database instance
+        msgids: IDs of messages added to or removed from an item
+    """
+    for msgid in msgids:
+        entryid = _entry(db, msgid, db.msg.get(msgid, "messageid"))
+        if entryid is None:
+            continue
+        item = thread_of(db, msgid)
+        if db.msgref.get(entryid, "item") != item:
+            db.msgref.set(entryid, item=item)
+
+
+def rebuild(db):
+    """
+    Rebuild the whole index from the msg, issue and change tables.
+
+    Args:
+        db: Database instance
+
+    Returns:
+        int: Number of indexed Message-IDs
+    """
+    for entryid in db.msgref.getnodeids(retired=None):
+        db.msgref.destroy(entryid)
+    db.clearCache()
+
+    threads = {}
+    for classname in THREAD_CLASSES:
+        itemids = db.getclass(classname).getnodeids(retired=False)
+        for itemid, msgids in batch_lookup.get_values(db, classname, itemids, "messages").items():
+            for msgid in msgids:
+                threads.setdefault(msgid, []).append(f"{classname}{itemid}")
+
+    msgids = sorted(db.msg.getnodeids(retired=False), key=int)
+    indexed = set()
+    for msgid, messageid in batch_lookup.get_values(db, "msg", msgids, "messageid").items():
+        if not messageid or normalize(messageid) in indexed:
+            continue
+        indexed.add(normalize(messageid))
+        designators = threads.get(msgid, [])
+        item = designators[0] if len(designators) == 1 else None
+        _create(db, normalize(messageid), msgid, item)
+    return len(indexed)
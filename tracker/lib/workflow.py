@@ -0,0 +1,71 @@
+# SPDX-FileCopyrightText: 2025 Georges Martin <jrjsmrtn@gmail.com>
+# SPDX-License-Identifier: MIT
+
+"""
+Status workflow rules for issues and changes.
+
+The rules are expressed with status names so that they survive database
+reinitializations; ``allowed_status_ids()`` maps them to the item IDs of the
+current database. They are enforced by ``detectors/status_workflow.py`` and
+``detectors/change_workflow.py`` and checked up front for whole batches by
+``batch_transition``.
+"""
+
+import detector_settings
+
+
+# ITIL-inspired incident workflow: status name -> statuses it may move to
+ISSUE_TRANSITIONS = {
+    "new": ["in-progress"],
+    "in-progress": ["resolved"],
+    "resolved": ["in-progress", "closed"],  # reopen or close
+    "closed": [],  # terminal
+}
+
+# ITIL change management workflow; any open stage can be cancelled
+CHANGE_TRANSITIONS = {
+    "planning": ["approved", "cancelled"],
+    "approved": ["implementing", "cancelled"],
+    "implementing": ["completed", "cancelled"],
+    "completed": [],  # terminal
+    "cancelled": [],  # terminal
+}
+
+# class name -> (status class name, transitions)
+WORKFLOWS = {
+    "issue": ("status", ISSUE_TRANSITIONS),
+    "change": ("changestatus", CHANGE_TRANSITIONS),
+}
+
+
+def allowed_status_ids(db, classname, current_status_id):
+    """
+    Return the status IDs an item may move to from its current status.
+
+    Args:
+        db: Database instance
+        classname: Class with a workflow ("issue" or "change")
+        current_status_id: Current status ID of the item
+
+    Returns:
+        set: Allowed status IDs; empty for terminal or unknown statuses
+    """
+    status_classname, transitions = WORKFLOWS[classname]
+    if current_status_id is None:
+        return set()
+    settings = detector_settings.get(db)
+    for name, targets in transitions.items():
+        if settings.item_id(status_classname, name) == current_status_id:
+            return {
+                status_id
+                for status_id in (settings.item_id(status_classname, t) for t in targets)
+                if status_id is not None
+            }
+    return set()
+
+
+def is_allowed(db, classname, current_status_id, new_status_id):
+    """Return True if moving from ``current_status_id`` to ``new_status_id`` is valid."""
+    if current_status_id == new_status_id:
+        return True
+    return new_status_id in allowed_status_ids(db, classname, current_status_id)
@@ -27,7 +27,15 @@ keyword.setlabelprop("name")
 keyword.setorderprop("name")
 
 # User-defined saved searches
-query = Class(db, "query", klass=String(), name=String(), url=String(), private_for=Link("user"))
+query = Class(
+    db,
+    "query",
+    klass=String(),
+    name=String(),
+    url=String(),
+    private_for=Link("user"),
+    materialized=Boolean(),
+)
 query.setlabelprop("name")
 query.setorderprop("name")
 
@@ -92,6 +100,7 @@ user = Class(
     queries=Multilink("query"),
     roles=String(),  # comma-separated string of Role names
     timezone=String(),
+    nosy_digest=Boolean(),  # receive nosy mail as a daily digest
 )
 user.setkey("username")
 user.setlabelprop("username")
@@ -100,6 +109,12 @@ db.security.addPermission(
     name="Register", klass="user", description="User is allowed to register new user"
 )
 
+# Normalized (lower-case) primary and alternate user addresses, maintained by
+# detectors/userauditor.py for exact address uniqueness checks
+useraddress = Class(db, "useraddress", address=String(), user=Link("user", do_journal="no"))
+useraddress.setkey("address")
+useraddress.disableJournalling()
+
 # FileClass automatically gets this property in addition to the Class ones:
 #   content = String()    [saved to disk in <tracker home>/db/files/]
 #   type = String()       [MIME type of the content, default 'text/plain']
@@ -117,6 +132,41 @@ msg = FileClass(
 msg.setlabelprop("summary")
 msg.setorderprop("date")
 
+# Lower-cased Message-ID -> message and the issue or change it belongs to
+# ("issue12", unset if none or several), maintained by detectors/threadindex.py
+# so that the mail gateway routes replies with one indexed lookup
+msgref = Class(db, "msgref", messageid=String(), msg=Link("msg", do_journal="no"), item=String())
+msgref.setkey("messageid")
+msgref.disableJournalling()
+
+# Fingerprints (author, normalized subject and body) of emails that created an
+# issue; repeats within [alertdedup] dedup_window are counted here instead of
+# becoming issues. Maintained by the mail gateway, see lib/alert_dedup.py
+alertfingerprint = Class(
+    db,
+    "alertfingerprint",
+    fingerprint=String(),
+    issue=Link("issue", do_journal="no"),
+    last_seen=Date(),
+    suppressed=Number(),
+)
+alertfingerprint.setkey("fingerprint")
+alertfingerprint.disableJournalling()
+
+# Pending nosy notifications, held back for the coalescing window or the
+# daily digest and delivered by "scripts/pms-admin.py flush-nosy"
+nosyqueue = Class(
+    db,
+    "nosyqueue",
+    user=Link("user", do_journal="no"),
+    issue=Link("issue", do_journal="no"),
+    messages=Multilink("msg", do_journal="no"),
+    due=Date(),
+    digest=Boolean(),
+)
+nosyqueue.setlabelprop("id")
+nosyqueue.setorderprop("due")
+
 file = FileClass(db, "file", name=String())
 file.setlabelprop("name")
 file.setorderprop("name")
@@ -232,6 +282,7 @@ for cl in (
     "cistatus",
     "cicriticality",
     "cirelationshiptype",
+    "alertfingerprint",
 ):
     db.security.addPermissionToRole("User", "View", cl)
 
@@ -273,6 +324,7 @@ p = db.security.addPermission(
         "alternate_addresses",
         "queries",
         "timezone",
+        "nosy_digest",
     ),
     description="User is allowed to edit their own user details",
 )